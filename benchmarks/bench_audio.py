@@ -0,0 +1,50 @@
+"""Per-chunk cost of the mic uplink and speaker downlink conversions."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from audio_adapters import (
+    PCMFramer, UPLINK_BYTES_PER_FRAME, drop_oldest_put_nowait, resample_from_24kHz, resample_to_16k_mono,
+)
+from conftest import MIC_CHANNELS, MIC_SR
+
+SPEAKER_QUEUE_MAX = 60            # main.SPEAKER_QUEUE_MAX
+
+
+@pytest.mark.benchmark(group="audio-uplink")
+def bench_resample_to_16k_mono(benchmark, mic_chunk):
+    out = benchmark(resample_to_16k_mono, mic_chunk, MIC_SR, MIC_CHANNELS)
+    assert len(out) == 2 * -(-len(mic_chunk) // 3)   # ceil(n / 3) PCM16 samples
+
+
+@pytest.mark.benchmark(group="audio-uplink")
+def bench_pcm_framer(benchmark, mic_chunk):
+    # One resampled get_audio_sample() read in, every complete 20 ms frame out.
+    chunk = resample_to_16k_mono(mic_chunk, MIC_SR, MIC_CHANNELS)
+    framer = PCMFramer()
+
+    def push_pop():
+        framer.push(chunk)
+        return sum(1 for _ in framer.pop_frames())
+
+    benchmark(push_pop)
+    assert len(framer.buf) < UPLINK_BYTES_PER_FRAME
+
+
+@pytest.mark.benchmark(group="audio-downlink")
+@pytest.mark.parametrize("output_sr", [16000, 48000])
+def bench_resample_from_24khz(benchmark, live_chunk, output_sr):
+    out = benchmark(resample_from_24kHz, live_chunk, output_sr)
+    assert out.shape == (len(live_chunk) // 2 * output_sr // 24000, 2)
+
+
+@pytest.mark.benchmark(group="audio-downlink")
+def bench_drop_oldest_put_nowait_full_queue(benchmark, live_chunk):
+    q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SPEAKER_QUEUE_MAX)
+    for _ in range(SPEAKER_QUEUE_MAX):
+        q.put_nowait(live_chunk)
+    benchmark(drop_oldest_put_nowait, q, live_chunk)
+    assert q.qsize() == SPEAKER_QUEUE_MAX
@@ -0,0 +1,34 @@
+"""FirestoreRAG over a 500-module curriculum: index build, retrieval and context rendering."""
+
+from __future__ import annotations
+
+import pytest
+
+from rag import FirestoreRAG
+
+QUERIES = ["addition algorithm", "estimate sum", "regroup ones and tens", "what is 4821 + 377"]
+
+
+@pytest.fixture(scope="module")
+def rag(curriculum_db) -> FirestoreRAG:
+    r = FirestoreRAG(curriculum_db)
+    r.load()
+    return r
+
+
+@pytest.mark.benchmark(group="rag")
+def bench_load(benchmark, curriculum_db):
+    benchmark.pedantic(lambda: FirestoreRAG(curriculum_db).load(), rounds=5, iterations=1)
+
+
+@pytest.mark.benchmark(group="rag")
+@pytest.mark.parametrize("query", QUERIES)
+def bench_retrieve(benchmark, rag, query):
+    chunks = benchmark(rag.retrieve, query, 3)
+    assert len(chunks) <= 3
+
+
+@pytest.mark.benchmark(group="rag")
+def bench_build_system_context(benchmark, rag):
+    context = benchmark.pedantic(rag.build_system_context, rounds=3, iterations=1)
+    assert context.startswith("=== TUTORING LESSON CONTENT ===")
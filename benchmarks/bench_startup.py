@@ -0,0 +1,50 @@
+"""
+Cold start: `import main` in a fresh interpreter, against a time budget.
+
+The budget defaults to what the robot's Pi should manage; set
+BAYMIN_IMPORT_BUDGET_S when running elsewhere. On failure the per-package
+breakdown from import_profile.py is in the assertion message. The subsystems
+lazy_import.py defers must not be pulled in by `import main` at all.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from import_profile import ImportProfile, profile_imports
+
+IMPORT_BUDGET_S = float(os.getenv("BAYMIN_IMPORT_BUDGET_S", "4.0"))
+IMPORT_RUNS = 3
+LAZY_MODULES = ("cv2", "scipy.signal")
+
+
+@pytest.fixture(scope="module")
+def main_imports() -> ImportProfile:
+    try:
+        return profile_imports("main", IMPORT_RUNS)
+    except RuntimeError as e:
+        pytest.skip(f"main is not importable here: {e}")
+
+
+def _breakdown(profile: ImportProfile, top: int = 8) -> str:
+    return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in list(profile.by_package().items())[:top])
+
+
+def bench_import_main_budget(main_imports):
+    assert main_imports.total_s <= IMPORT_BUDGET_S, (
+        f"import main took {main_imports.total_s:.2f}s (budget {IMPORT_BUDGET_S:.2f}s): {_breakdown(main_imports)}"
+    )
+
+
+def bench_optional_subsystems_stay_lazy(main_imports):
+    eager = [name for name in LAZY_MODULES if name in main_imports.modules]
+    assert not eager, f"import main loads {eager}; import them through lazy_import.lazy_import()"
+
+
+@pytest.mark.benchmark(group="startup")
+def bench_import_main(benchmark, main_imports):
+    # Wall time of a whole fresh interpreter importing main, for --benchmark-compare.
+    profile = benchmark.pedantic(profile_imports, args=("main",), rounds=IMPORT_RUNS, iterations=1)
+    assert profile.total_s > 0
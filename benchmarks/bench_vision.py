@@ -0,0 +1,30 @@
+"""Per-frame vision cost on 4K frames: JPEG encode for capture_image and face detection."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from vision import ReachyVision
+
+
+@pytest.fixture(scope="module")
+def vision() -> ReachyVision:
+    return ReachyVision(SimpleNamespace(media=None))
+
+
+@pytest.mark.benchmark(group="vision")
+def bench_encode_jpeg_4k(benchmark, frame_4k):
+    jpeg = benchmark(ReachyVision._encode_jpeg, frame_4k)
+    assert jpeg is not None and jpeg[:2] == b"\xff\xd8"
+
+
+@pytest.mark.benchmark(group="vision")
+def bench_detect_face_center_4k(benchmark, vision, frame_4k):
+    benchmark(vision._detect_face_center, frame_4k)
+
+
+@pytest.mark.benchmark(group="vision")
+def bench_is_white_4k(benchmark, frame_4k):
+    assert benchmark(ReachyVision._is_white, frame_4k) is False
@@ -0,0 +1,125 @@
+"""
+Synthetic inputs at the sizes the robot actually sees: 48 kHz stereo mic
+chunks, Live API speaker chunks, 4K camera frames and a 500-module
+curriculum. Everything is seeded so runs (and stored baselines) compare.
+
+Baselines are per machine: save them on the robot with
+`pytest --benchmark-save=<name>`; they land in baselines/ and are meant to be
+committed so later runs can use --benchmark-compare.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+
+MIC_SR = 48000
+MIC_CHANNELS = 2
+MIC_CHUNK_FRAMES = 1024           # one get_audio_sample() read
+LIVE_CHUNK_S = 0.1                # Live API audio chunks are ~100 ms of 24 kHz PCM16
+FRAME_4K = (2160, 3840, 3)
+CURRICULUM_MODULES = 500
+
+
+@pytest.fixture(scope="session")
+def rng() -> np.random.Generator:
+    return np.random.default_rng(1234)
+
+
+@pytest.fixture(scope="session")
+def mic_chunk(rng) -> np.ndarray:
+    """Speech-like 48 kHz stereo float32: a few harmonics under noise."""
+    t = np.arange(MIC_CHUNK_FRAMES) / MIC_SR
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 720 * t)
+    noise = 0.02 * rng.standard_normal((MIC_CHUNK_FRAMES, MIC_CHANNELS))
+    return (voice[:, None] + noise).astype(np.float32)
+
+
+@pytest.fixture(scope="session")
+def live_chunk(rng) -> bytes:
+    n = int(24000 * LIVE_CHUNK_S)
+    t = np.arange(n) / 24000
+    pcm = 8000 * np.sin(2 * np.pi * 200 * t) + 500 * rng.standard_normal(n)
+    return pcm.astype(np.int16).tobytes()
+
+
+@pytest.fixture(scope="session")
+def frame_4k(rng) -> np.ndarray:
+    """A worksheet-ish 4K frame: off-white paper, lines of digits, sensor noise."""
+    frame = np.full(FRAME_4K, 225, dtype=np.uint8)
+    for row in range(12):
+        y = 200 + row * 150
+        text = " ".join(f"{a} + {b} =" for a, b in rng.integers(10, 999, size=(6, 2)))
+        cv2.putText(frame, text, (150, y), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (40, 40, 40), 4)
+    noise = rng.integers(-6, 7, size=FRAME_4K, dtype=np.int16)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def _module(i: int, rng: np.random.Generator) -> dict:
+    def question(kind: str, j: int) -> dict:
+        a, b = (int(x) for x in rng.integers(10, 9999, size=2))
+        return {
+            "id": f"{kind}{j}", "type": "multiple_choice",
+            "prompt": f"What is {a} + {b}? Use place value to regroup.",
+            "answer": f"Add the ones, tens and hundreds; the sum is {a + b}.",
+            "correct_answer": str(a + b), "options": [str(a + b), str(a + b + 10), str(a + b - 1)],
+            "citation_page": int(rng.integers(1, 300)),
+        }
+
+    return {
+        "module_id": f"math_grade4_ch{i // 10}_les{i % 10}_m{i}",
+        "title": f"Lesson {i}: multi-digit addition and subtraction",
+        "grade_level": 4, "chapter": i // 10, "lesson": i % 10,
+        "description": "Estimate and find sums and differences of whole numbers.",
+        "citation": {"textbook": "Into Math Grade 4", "pages": [i, i + 1]},
+        "instructional_content": {
+            "concepts": [
+                {"id": f"c{j}", "term": f"term{i}_{j} regroup",
+                 "definition": "Exchange ten ones for one ten when a column sums past nine.",
+                 "example": "47 + 38: 7 + 8 = 15, write 5 carry 1."}
+                for j in range(5)
+            ],
+            "example_walkthrough": [
+                {"id": f"we{j}", "title": f"Estimate sum {j}", "citation_page": i,
+                 "steps": ["Round each addend.", "Add the rounded numbers.", "Compare to the exact sum."],
+                 "answer": "About 900."}
+                for j in range(3)
+            ],
+        },
+        "quiz_questions": {
+            "guided": [question("g", j) for j in range(8)],
+            "independent": [question("i", j) for j in range(8)],
+            "word_problems": [{**question("w", j), "difficulty": "medium"} for j in range(4)],
+        },
+    }
+
+
+class _Doc:
+    def __init__(self, data: dict) -> None:
+        self.id = data["module_id"]
+        self.exists = True
+        self._data = data
+
+    def to_dict(self) -> dict:
+        return self._data
+
+
+class _CurriculumDb:
+    """Just enough of the Firestore client for FirestoreRAG.load()."""
+
+    def __init__(self, modules: list[dict]) -> None:
+        self._docs = [_Doc(m) for m in modules]
+
+    def collection(self, name: str) -> _CurriculumDb:
+        return self
+
+    def stream(self):
+        return iter(self._docs)
+
+
+@pytest.fixture(scope="session")
+def curriculum_db() -> _CurriculumDb:
+    rng = np.random.default_rng(99)
+    return _CurriculumDb([_module(i, rng) for i in range(CURRICULUM_MODULES)])
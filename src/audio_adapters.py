@@ -2,7 +2,11 @@ import asyncio
 from contextlib import suppress
 
 import numpy as np
-from scipy.signal import resample_poly
+
+from lazy_import import lazy_import
+from metrics import AUDIO_CHUNKS_DROPPED
+
+scipy_signal = lazy_import("scipy.signal")
 
 
 class AudioControl:
@@ -29,7 +33,7 @@ def resample_to_16k_mono(audio: np.ndarray, input_sr: int, input_ch: int) -> byt
 
     if input_sr != UPLINK_SR:
         # resample input -> 16000
-        mono_16k = resample_poly(mono, up=16000, down=input_sr).astype(np.float32)
+        mono_16k = scipy_signal.resample_poly(mono, up=16000, down=input_sr).astype(np.float32)
     else:
         mono_16k = mono
 
@@ -67,6 +71,7 @@ def drop_oldest_put_nowait(q: asyncio.Queue, item: bytes) -> None:
     if q.full():
         with suppress(asyncio.QueueEmpty):
             q.get_nowait()
+            AUDIO_CHUNKS_DROPPED.inc()
     q.put_nowait(item)
 
 
@@ -79,7 +84,7 @@ def resample_from_24kHz(audio_bytes: bytes, output_sr: int) -> np.ndarray:
     x = x_i16.astype(np.float32) / 32768.0
 
     # resample 24000 -> output_sr
-    y = resample_poly(x, up=output_sr, down=24000).astype(np.float32)
+    y = scipy_signal.resample_poly(x, up=output_sr, down=24000).astype(np.float32)
     y = np.clip(y, -1.0, 1.0)
 
     # mono -> stereo
@@ -91,10 +96,16 @@ PLAY_CHUNK_SECONDS = 0.02
 MAX_VOLUME_GAIN = 3.0  # 100% volume applies 3x gain to compensate for quiet output
 
 
-async def capture_mic_loop(mini, mic_queue: asyncio.Queue, audio_control: AudioControl | None = None) -> None:
+async def capture_mic_loop(
+    mini,
+    mic_queue: asyncio.Queue,
+    audio_control: AudioControl | None = None,
+    tracer=None,
+) -> None:
     """
     Capture audio from Reachy, convert to PCM16 16kHz mono, and push to mic_queue in 20ms frames.
     When audio_control.mic_muted is True, sends silence instead of real audio.
+    tracer (a LatencyTracer) gets every frame to find where the student stopped talking.
     """
     framer = PCMFramer()
     input_sr = mini.media.get_input_audio_samplerate()
@@ -111,14 +122,25 @@ async def capture_mic_loop(mini, mic_queue: asyncio.Queue, audio_control: AudioC
         for frame in framer.pop_frames():
             if audio_control is not None and audio_control.mic_muted:
                 frame = bytes(len(frame))  # silence — Gemini hears nothing
+            if tracer is not None:
+                tracer.mic_captured(frame)
             await mic_queue.put(frame)
         await asyncio.sleep(0)
 
 
-async def play_speaker_loop(mini, speaker_queue: asyncio.Queue, interrupted_event: asyncio.Event, audio_control: AudioControl | None = None) -> None:
+async def play_speaker_loop(
+    mini,
+    speaker_queue: asyncio.Queue,
+    interrupted_event: asyncio.Event,
+    audio_control: AudioControl | None = None,
+    animator=None,
+    tracer=None,
+) -> None:
     """
     Read PCM16 24kHz mono audio chunks from speaker_queue, convert to Reachy format, and play.
-    Applies volume scaling from audio_control when provided.
+    Applies volume scaling from audio_control when provided, and hands each chunk to
+    animator (a SpeechAnimator) so the body can move with the voice. tracer (a
+    LatencyTracer) is told when the first sample of an answer reaches mini.media.
     """
     output_sr = mini.media.get_output_audio_samplerate()
     slice_n = int(output_sr * PLAY_CHUNK_SECONDS)
@@ -126,9 +148,14 @@ async def play_speaker_loop(mini, speaker_queue: asyncio.Queue, interrupted_even
         audio_24k_pcm16 = await speaker_queue.get()
 
         if interrupted_event.is_set():
+            if animator is not None:
+                animator.reset()
             continue
 
         out = resample_from_24kHz(audio_24k_pcm16, output_sr)
+        if animator is not None:
+            # Envelope of the voice itself, before volume gain, so motion doesn't depend on volume.
+            animator.feed(out, output_sr)
         if audio_control is not None:
             gain = (audio_control.volume / 100.0) * MAX_VOLUME_GAIN
             out = np.clip(out * gain, -1.0, 1.0)
@@ -136,4 +163,6 @@ async def play_speaker_loop(mini, speaker_queue: asyncio.Queue, interrupted_even
             if interrupted_event.is_set():
                 break
             mini.media.push_audio_sample(out[start : start + slice_n])
+            if tracer is not None:
+                tracer.sample_pushed()
             await asyncio.sleep(0)
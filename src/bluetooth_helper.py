@@ -1,9 +1,11 @@
 import asyncio
-import logging
+import inspect
 import math
 import random
 import struct
 import time
+from contextlib import suppress
+from typing import Awaitable
 
 from bless import (
     BlessServer,
@@ -14,6 +16,23 @@ from bless import (
 from reachy_mini import ReachyMini
 
 from audio_adapters import AudioControl
+from bluez_monitor import BluezDisconnectMonitor
+from log_config import get_logger
+
+
+class DisconnectEvent(asyncio.Event):
+    """disconnected_event, plus when (time.monotonic()) and how the disconnect was detected."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.detected_at: float | None = None
+        self.source: str | None = None    # "dbus" or "poll"
+
+    def mark(self, source: str) -> None:
+        if not self.is_set():
+            self.detected_at = time.monotonic()
+            self.source = source
+            self.set()
 
 
 class ModuleControl:
@@ -38,14 +57,20 @@ ANTENNA_CHAR_UUID =     "37f02fcb-5045-42d9-96b8-3f893402f607"
 CONNECTION_POLL_INTERVAL = 1.0
 ANTENNA_POLL_INTERVAL    = 0.25
 
-logging.basicConfig(level=logging.WARNING)  # Suppress bless noise by default
+logger = get_logger("ble")
+state_logger = get_logger("state")
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
-async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event, AudioControl, ModuleControl]:
+async def start_ble_server_async(
+    mini: ReachyMini | Awaitable[ReachyMini],
+) -> tuple[str, DisconnectEvent, AudioControl, ModuleControl]:
     """
+    mini may still be connecting (an awaitable, e.g. the startup task): the
+    server advertises immediately and only waits for the robot after READY.
+
     1. Flutter connects
     2. Flutter subscribes to all notify characteristics
     3. Flutter writes "READY" to CHAR_UUID
@@ -75,13 +100,13 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
 
         try:
             text = bytes(value).decode("utf-8").strip()
-            print(text)
+            logger.debug("write: %s", text)
         except UnicodeDecodeError:
-            print(f"[ble] Received non-UTF8 data: {value}")
+            logger.warning("Received non-UTF8 data: %r", value)
             return
 
         if text == "READY" and not ready_event.is_set():
-            print("[ble] Received READY signal from Flutter app. Sending challenge and starting antenna broadcast.")
+            logger.info("Received READY signal from Flutter app. Sending challenge and starting antenna broadcast.")
             ready_event.set()
         elif len(received_uid) == 0:
             uid_buffer.append(text)
@@ -94,17 +119,17 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
         elif text.startswith("VOLUME:"):
             try:
                 audio_control.volume = max(0, min(100, int(text.split(":")[1])))
-                print(f"[ble] Volume → {audio_control.volume}")
+                logger.info("Volume → %d", audio_control.volume)
             except (ValueError, IndexError):
                 pass
 
         # ── Mic mute ────────────────────────────────────────────────────────
         elif text == "MUTE":
             audio_control.mic_muted = True
-            print("[ble] Mic muted")
+            logger.info("Mic muted")
         elif text == "UNMUTE":
             audio_control.mic_muted = False
-            print("[ble] Mic unmuted")
+            logger.info("Mic unmuted")
 
         # ── Module selection ─────────────────────────────────────────────────
         elif text.startswith("MODULE_SELECT:"):
@@ -114,7 +139,7 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
             module_control.module_id = "".join(module_control._buffer)
             module_control._buffer = []
             module_control._accumulating = False
-            print(f"[ble] Module selected: {module_control.module_id}")
+            logger.info("Module selected: %s", module_control.module_id)
             module_control._loop.call_soon_threadsafe(module_control.module_selected_event.set)
             module_control._loop.call_soon_threadsafe(module_control.module_exited_event.clear)
         elif module_control._accumulating:
@@ -123,7 +148,7 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
             module_control.module_id = None
             module_control._accumulating = False
             module_control.module_selected_event.clear()
-            print("[ble] Module deselected")
+            logger.info("Module deselected")
             module_control._loop.call_soon_threadsafe(module_control.module_exited_event.set)
 
     # -----------------------------------------------------------------------
@@ -165,11 +190,13 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
     )
 
     await server.start()
-    print("[state] State 1: Waiting for Bluetooth connection (active_user)...")
+    state_logger.info("State 1: Waiting for Bluetooth connection (active_user)...")
 
     
     await ready_event.wait()
-    time.sleep(0.5)
+    if inspect.isawaitable(mini):
+        mini = await mini
+    await asyncio.sleep(0.5)
     challenge = [random.random() * math.pi * -1, random.random() * math.pi]
     while abs(challenge[0] + challenge[1]) < math.pi/6:
         challenge[1] = random.random() * math.pi
@@ -186,46 +213,61 @@ async def start_ble_server_async(mini: ReachyMini) -> tuple[str, asyncio.Event,
             try:
                 server.update_value(SERVICE_UUID, ANTENNA_CHAR_UUID)
             except Exception as e:
-                print(f"[ble] Antenna notify failed: {e}")
+                logger.warning("Antenna notify failed: %s", e)
             await asyncio.sleep(ANTENNA_POLL_INTERVAL)
     broadcast_task = asyncio.create_task(_broadcast_antenna_positions())
 
     await uid_received_event.wait()
 
-    mini.goto_target(antennas=challenge, duration=1.0)
+    # goto_target blocks for the whole move; keep the loop (and BLE notifications) running.
+    await asyncio.to_thread(mini.goto_target, antennas=challenge, duration=1.0)
     mini.enable_motors(ids=["left_antenna", "right_antenna"])
-    mini.goto_target(antennas=[-0.15, 0.15], duration=2.0)
+    await asyncio.to_thread(mini.goto_target, antennas=[-0.15, 0.15], duration=2.0)
 
     char = server.get_characteristic(CHAR_UUID)
     char.value = bytearray("ACK".encode("utf-8"))
     server.update_value(SERVICE_UUID, CHAR_UUID)
 
     active_user = received_uid[0]
-    print(f"[state] Bluetooth connected with UID: {active_user}")
+    state_logger.info("Bluetooth connected with UID: %s", active_user)
 
     # -----------------------------------------------------------------------
     # Background task: watch for disconnection, then clean up
     # -----------------------------------------------------------------------
-    disconnected_event = asyncio.Event()
+    disconnected_event = DisconnectEvent()
+    device_dropped = asyncio.Event()
+    # bless's BlueZ backend keeps its dbus-next system bus on the server; share it.
+    dbus_monitor = BluezDisconnectMonitor(device_dropped.set, bus=getattr(server, "bus", None))
 
     async def _watch_connection():
-        # Give the stack a moment after the write before we start monitoring;
-        # is_connected() may briefly return False right after the initial write.
-        await asyncio.sleep(CONNECTION_POLL_INTERVAL * 2)
-
-        while True:
-            try:
-                connected = await server.is_connected()
-            except Exception:
-                connected = False
-
-            if not connected:
-                print("[state] Bluetooth disconnected. Cleaning up BLE server.")
-                disconnected_event.set()
-                await server.stop()
-                return
-
-            await asyncio.sleep(CONNECTION_POLL_INTERVAL)
+        # is_connected() is polled every CONNECTION_POLL_INTERVAL; a BlueZ
+        # disconnect signal (any device — it may not be the app's) triggers
+        # the check at once, so a real drop is seen within milliseconds.
+        await dbus_monitor.start()
+        try:
+            # Give the stack a moment after the write before we start polling;
+            # is_connected() may briefly return False right after the initial write.
+            # A BlueZ signal ends the wait early and is confirmed below straight away.
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(device_dropped.wait(), CONNECTION_POLL_INTERVAL * 2)
+
+            while True:
+                signalled = device_dropped.is_set()
+                device_dropped.clear()
+                try:
+                    connected = await server.is_connected()
+                except Exception:
+                    connected = False
+                if not connected:
+                    disconnected_event.mark("dbus" if signalled else "poll")
+                    break
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(device_dropped.wait(), CONNECTION_POLL_INTERVAL)
+        finally:
+            await dbus_monitor.stop()
+
+        state_logger.info("Bluetooth disconnected (%s). Cleaning up BLE server.", disconnected_event.source)
+        await server.stop()
 
     asyncio.create_task(_watch_connection())
 
@@ -0,0 +1,133 @@
+"""
+bluez_monitor.py — BLE disconnects from BlueZ D-Bus signals instead of polling.
+
+When the app's phone/tablet drops, BlueZ emits
+PropertiesChanged("org.bluez.Device1", {"Connected": False}) on the system bus
+within milliseconds. BluezDisconnectMonitor listens for that (and for
+InterfacesRemoved, when a device object disappears without it) on bless's own
+dbus-next connection and calls on_disconnect() for every connected device
+that goes away. BlueZ doesn't say which device was the GATT client — a
+headset on the same adapter looks the same — so the caller confirms with
+server.is_connected() right away instead of waiting for its next poll.
+
+start() returns False when it cannot watch (dbus-next missing, no system bus
+or BlueZ, e.g. on macOS, or no connected device visible); the caller then
+keeps polling.
+"""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from typing import Callable
+
+from log_config import get_logger
+
+try:
+    from dbus_next import BusType, Message, MessageType
+    from dbus_next.aio import MessageBus
+except ImportError:   # bless only pulls dbus-next in on Linux
+    MessageBus = None
+
+logger = get_logger("ble")
+
+BLUEZ_SERVICE = "org.bluez"
+DEVICE_IFACE = "org.bluez.Device1"
+_PROPERTIES_MATCH = (
+    f"type='signal',sender='{BLUEZ_SERVICE}',interface='org.freedesktop.DBus.Properties',"
+    f"member='PropertiesChanged',arg0='{DEVICE_IFACE}'"
+)
+_REMOVED_MATCH = (
+    f"type='signal',sender='{BLUEZ_SERVICE}',interface='org.freedesktop.DBus.ObjectManager',"
+    "member='InterfacesRemoved'"
+)
+
+
+def _value(v):
+    return getattr(v, "value", v)   # dbus-next Variant -> plain value
+
+
+class BluezDisconnectMonitor:
+    """Calls on_disconnect (on the loop) whenever a connected BlueZ device disconnects."""
+
+    def __init__(self, on_disconnect: Callable[[], None], bus=None) -> None:
+        self._on_disconnect = on_disconnect
+        self._bus = bus                   # bless's MessageBus when available; else our own
+        self._own_bus = False
+        self._connected: set[str] = set()  # Device1 object paths currently connected
+        self._active = False
+
+    async def start(self) -> bool:
+        if MessageBus is None:
+            logger.info("dbus-next not available; polling for disconnects")
+            return False
+        try:
+            if self._bus is None:
+                self._bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+                self._own_bus = True
+            self._bus.add_message_handler(self._handle)
+            self._active = True
+            for rule in (_PROPERTIES_MATCH, _REMOVED_MATCH):
+                await self._match("AddMatch", rule)
+            reply = await self._bus_call(BLUEZ_SERVICE, "/", "org.freedesktop.DBus.ObjectManager", "GetManagedObjects")
+        except Exception as e:
+            logger.info("BlueZ D-Bus signals unavailable (%s); polling for disconnects", e)
+            await self.stop()
+            return False
+
+        for path, interfaces in reply.body[0].items():
+            device = interfaces.get(DEVICE_IFACE)
+            if device is not None and _value(device.get("Connected", False)):
+                self._connected.add(path)
+        if not self._connected:
+            # Nothing to follow (the link may already be gone); let polling decide.
+            logger.info("No connected BlueZ device found; polling for disconnects")
+            await self.stop()
+            return False
+        logger.debug("Watching BlueZ devices for disconnect: %s", sorted(self._connected))
+        return True
+
+    async def stop(self) -> None:
+        if self._bus is None:
+            return
+        if self._active:
+            self._active = False
+            self._bus.remove_message_handler(self._handle)
+            for rule in (_PROPERTIES_MATCH, _REMOVED_MATCH):
+                with suppress(Exception):
+                    await self._match("RemoveMatch", rule)
+        if self._own_bus:
+            self._bus.disconnect()
+            self._own_bus = False
+        self._bus = None
+
+    async def _bus_call(self, destination: str, path: str, interface: str, member: str, signature: str = "", body=None):
+        reply = await self._bus.call(Message(
+            destination=destination, path=path, interface=interface, member=member,
+            signature=signature, body=body or [],
+        ))
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{member}: {reply.error_name} {reply.body}")
+        return reply
+
+    async def _match(self, member: str, rule: str) -> None:
+        await self._bus_call("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", member, "s", [rule])
+
+    def _handle(self, message) -> None:
+        """dbus-next message handler (runs on the loop); returns None so other handlers still see the message."""
+        if not self._active or message.message_type != MessageType.SIGNAL:
+            return
+        if message.member == "PropertiesChanged" and message.body and message.body[0] == DEVICE_IFACE:
+            changed = message.body[1]
+            if "Connected" not in changed:
+                return
+            if _value(changed["Connected"]):
+                self._connected.add(message.path)
+                return
+            self._connected.discard(message.path)
+        elif message.member == "InterfacesRemoved" and len(message.body) == 2 and DEVICE_IFACE in message.body[1]:
+            if message.body[0] not in self._connected:
+                return
+            self._connected.discard(message.body[0])
+        else:
+            return
+        self._on_disconnect()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from contextlib import suppress
+
+import numpy as np
+from reachy_mini import ReachyMini
+
+from motion import MotionPlanner, OrientCommand
+from motion_executor import MotionExecutor
+from speech_animation import SpeechAnimator
+from log_config import get_logger
+
+
+logger = get_logger("doa")
+
+# --- Polling ---
+DOA_POLL_HZ = 10
+DOA_SAMPLE_MAX_AGE_S = 1.5       # speech samples older than this leave the window
+
+# --- Smoothing ---
+DOA_WINDOW = 8                   # speech samples averaged on the circle
+DOA_MIN_SAMPLES = 4              # don't publish from a single burst
+DOA_MIN_RESULTANT = 0.8          # mean resultant length: 1 = all samples agree, 0 = spread out
+DOA_HYSTERESIS_DEG = 20.0        # the published bearing only moves when the mean drifts this far
+
+
+def doa_to_yaw(doa: float) -> float:
+    """Convert ReSpeaker DoA (0=left, pi/2=front, pi=right) to robot yaw (0=front)."""
+    return float(doa - (np.pi / 2.0))
+
+
+def wrap_angle(a: float) -> float:
+    """Wrap to (-pi, pi]."""
+    return math.atan2(math.sin(a), math.cos(a))
+
+
+def circular_mean(angles: np.ndarray) -> tuple[float, float]:
+    """Return (mean angle, mean resultant length) of angles in radians."""
+    s, c = float(np.mean(np.sin(angles))), float(np.mean(np.cos(angles)))
+    return math.atan2(s, c), math.hypot(s, c)
+
+
+class DoAService:
+    """
+    Tracks where the student's voice comes from using the ReSpeaker DoA.
+
+    Polls mini.media.get_DoA() at DOA_POLL_HZ, keeps the recent speech samples
+    as world-frame bearings (so turning the robot doesn't shift them) and
+    publishes their circular mean once it is consistent. The published bearing
+    only changes past DOA_HYSTERESIS_DEG; each change is offered to the motion
+    planner as a low-priority OrientCommand, which is dropped whenever an
+    explicit tool motion is queued, running or just finished.
+    """
+
+    def __init__(self, mini: ReachyMini, executor: MotionExecutor, animator: SpeechAnimator | None = None) -> None:
+        self._mini = mini
+        self._executor = executor
+        self._animator = animator
+        self._samples: deque[tuple[float, float]] = deque(maxlen=DOA_WINDOW)  # (ts, bearing)
+        self.bearing: float | None = None      # world-frame body yaw facing the speaker (rad)
+        self.bearing_ts = 0.0
+
+    def _read(self) -> tuple[float, bool] | None:
+        with suppress(Exception):
+            return self._mini.media.get_DoA()
+        return None
+
+    async def run(self, planner: MotionPlanner) -> None:
+        """Poll loop that turns toward the speaker through the planner (only started with DOA_ORIENT)."""
+        loop = asyncio.get_running_loop()
+        period = 1.0 / DOA_POLL_HZ
+        hysteresis = math.radians(DOA_HYSTERESIS_DEG)
+        while True:
+            await asyncio.sleep(period)
+            reading = await asyncio.to_thread(self._read)
+            now = loop.time()
+            while self._samples and now - self._samples[0][0] > DOA_SAMPLE_MAX_AGE_S:
+                self._samples.popleft()
+            if not reading or reading[0] is None or not reading[1]:
+                continue
+            # BAY-min's own voice and a moving mic array both give bogus directions.
+            if self._executor.moving or (self._animator is not None and self._animator.speaking):
+                continue
+
+            head = self._executor.current
+            bearing = head.body_yaw + math.radians(head.yaw_deg) + doa_to_yaw(float(reading[0]))
+            self._samples.append((now, wrap_angle(bearing)))
+            if len(self._samples) < DOA_MIN_SAMPLES:
+                continue
+
+            mean, resultant = circular_mean(np.array([b for _, b in self._samples]))
+            if resultant < DOA_MIN_RESULTANT:
+                continue
+            if self.bearing is not None and abs(wrap_angle(mean - self.bearing)) < hysteresis:
+                self.bearing_ts = now
+                continue
+
+            self.bearing, self.bearing_ts = mean, now
+            logger.debug("Speaker bearing %+.0f° (R=%.2f)", math.degrees(mean), resultant)
+            planner.submit(OrientCommand(body_yaw=mean))
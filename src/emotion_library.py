@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from reachy_mini.motion.move import Move
+from reachy_mini.motion.recorded_move import RecordedMoves
+from reachy_mini.utils.interpolation import linear_pose_interpolation
+
+from log_config import get_logger
+
+
+logger = get_logger("emotions")
+
+EMOTION_CACHE_DIR = Path(os.getenv("BAYMIN_CACHE_DIR", "~/.cache/baymin")).expanduser() / "emotions"
+EMOTION_SAMPLE_HZ = 100          # matches async_play_move's default play frequency
+EMOTION_LOAD_WORKERS = 8
+EMOTION_CACHE_VERSION = 1
+
+
+class CachedMove(Move):
+    """A recorded emotion resampled onto a fixed grid and held as float32 arrays."""
+
+    def __init__(self, t: np.ndarray, head: np.ndarray, antennas: np.ndarray, body_yaw: np.ndarray) -> None:
+        self._t = t              # (n,)
+        self._head = head        # (n, 3, 4) — top three rows of the 4x4 pose
+        self._antennas = antennas  # (n, 2)
+        self._body_yaw = body_yaw  # (n,)
+        self._duration = float(t[-1]) + 1.0 / EMOTION_SAMPLE_HZ
+
+    @property
+    def duration(self) -> float:
+        return self._duration
+
+    def evaluate(self, t: float) -> tuple[np.ndarray, np.ndarray, float]:
+        i = int(np.searchsorted(self._t, t, side="right")) - 1
+        i = min(max(i, 0), len(self._t) - 1)
+        j = min(i + 1, len(self._t) - 1)
+        span = self._t[j] - self._t[i]
+        alpha = float((t - self._t[i]) / span) if span > 0 else 0.0
+        alpha = min(max(alpha, 0.0), 1.0)
+
+        head = linear_pose_interpolation(self._pose(i), self._pose(j), alpha)
+        antennas = self._antennas[i] + alpha * (self._antennas[j] - self._antennas[i])
+        body_yaw = float(self._body_yaw[i] + alpha * (self._body_yaw[j] - self._body_yaw[i]))
+        return head, antennas.astype(np.float64), body_yaw
+
+    def _pose(self, i: int) -> np.ndarray:
+        pose = np.eye(4)
+        pose[:3, :] = self._head[i]
+        return pose
+
+    @classmethod
+    def from_move(cls, move: Move) -> CachedMove:
+        """Sample any Move (e.g. a RecordedMove) at EMOTION_SAMPLE_HZ."""
+        times = np.arange(0.0, max(move.duration - 1e-2, 0.0), 1.0 / EMOTION_SAMPLE_HZ)
+        heads, antennas, body_yaws, ts = [], [], [], []
+        for t in times:
+            try:
+                head, ant, body_yaw = move.evaluate(float(t))
+            except Exception:
+                break  # evaluated past the last recorded sample
+            heads.append(np.asarray(head)[:3, :])
+            antennas.append(ant if ant is not None else (0.0, 0.0))
+            body_yaws.append(body_yaw if body_yaw is not None else 0.0)
+            ts.append(t)
+        if not ts:
+            raise ValueError("move has no samples")
+        return cls(
+            np.asarray(ts, dtype=np.float32),
+            np.asarray(heads, dtype=np.float32),
+            np.asarray(antennas, dtype=np.float32),
+            np.asarray(body_yaws, dtype=np.float32),
+        )
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp, version=EMOTION_CACHE_VERSION,
+            t=self._t, head=self._head, antennas=self._antennas, body_yaw=self._body_yaw,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> CachedMove | None:
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != EMOTION_CACHE_VERSION:
+                    return None
+                return cls(data["t"], data["head"], data["antennas"], data["body_yaw"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+class EmotionLibrary:
+    """
+    Drop-in replacement for RecordedMoves that is fully loaded before the first play.
+
+    load() reads every requested emotion (main passes motion.ALL_EMOTION_NAMES)
+    from a local .npz cache in parallel. Names missing from the cache are decoded
+    from the HuggingFace dataset once (RecordedMoves is only constructed in that
+    case) and written back, so later boots never touch the network.
+    """
+
+    def __init__(self, dataset: str, names: list[str], cache_dir: Path = EMOTION_CACHE_DIR) -> None:
+        self._dataset = dataset
+        self._names = list(names)
+        self._cache_dir = cache_dir / re.sub(r"[^\w.-]", "_", dataset)
+        self._moves: dict[str, CachedMove] = {}
+        self.missing: list[str] = []
+
+    def load(self) -> None:
+        """
+        Load (and if needed build) every emotion. Blocking — run in a thread at startup.
+
+        Never raises: a name that can't be loaded or built is logged and listed
+        in self.missing, and a move that can't be written to the cache is
+        still kept for this boot.
+        """
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning("Emotion cache dir %s unusable (%s); building in memory", self._cache_dir, e)
+        with ThreadPoolExecutor(max_workers=EMOTION_LOAD_WORKERS) as pool:
+            cached = dict(zip(self._names, pool.map(lambda n: CachedMove.load(self._path(n)), self._names)))
+        self._moves = {name: move for name, move in cached.items() if move is not None}
+
+        to_build = [name for name in self._names if name not in self._moves]
+        if to_build:
+            logger.info("Building cache for %d emotion(s) from %s...", len(to_build), self._dataset)
+            try:
+                recorded = RecordedMoves(self._dataset)
+                available = set(recorded.list_moves())
+            except Exception as e:   # e.g. no network on the first boot
+                logger.warning("Can't open %s (%s); %d emotion(s) unavailable", self._dataset, e, len(to_build))
+                to_build = []
+
+            def _build(name: str) -> CachedMove | None:
+                if name not in available:
+                    return None
+                try:
+                    move = CachedMove.from_move(recorded.get(name))
+                except Exception as e:
+                    logger.warning("Emotion %s could not be built: %s", name, e)
+                    return None
+                try:
+                    move.save(self._path(name))
+                except OSError as e:
+                    logger.warning("Emotion %s not cached (%s); keeping it for this boot", name, e)
+                return move
+
+            with ThreadPoolExecutor(max_workers=EMOTION_LOAD_WORKERS) as pool:
+                for name, move in zip(to_build, pool.map(_build, to_build)):
+                    if move is not None:
+                        self._moves[name] = move
+
+        self.missing = [name for name in self._names if name not in self._moves]
+        if self.missing:
+            logger.warning("Not loaded from %s: %s", self._dataset, ", ".join(self.missing))
+        logger.info("%d/%d emotions ready (cache: %s)", len(self._moves), len(self._names), self._cache_dir)
+
+    def get(self, name: str) -> CachedMove:
+        move = self._moves.get(name)
+        if move is None:
+            raise ValueError(f"Emotion {name} not loaded from {self._dataset}")
+        return move
+
+    def list_moves(self) -> list[str]:
+        return list(self._moves)
+
+    def _path(self, name: str) -> Path:
+        return self._cache_dir / f"{name}.npz"
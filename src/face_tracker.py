@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+import numpy as np
+
+from lazy_import import lazy_import
+from vision import ReachyVision
+
+
+cv2 = lazy_import("cv2")
+
+
+# --- Rates ---
+FACE_DETECT_INTERVAL_S = 3.0     # full Haar pass at most this often while the tracker holds
+FACE_TRACK_INTERVAL_S = 0.1      # how often we look for a new frame to track on
+FACE_STALE_S = 2.0               # positions older than this are treated as "no face"
+
+# --- Tracking ---
+FACE_TRACK_WIDTH = 480           # tracker runs on a downscaled copy of the frame
+FACE_SMOOTHING_ALPHA = 0.5       # EMA weight of the newest measurement
+FACE_TRACKER_NAMES = ("TrackerKCF_create", "TrackerCSRT_create")
+
+# Approximate half field of view used to turn a normalized offset into head angles
+# (camera ~64-70° HFOV, ~50-55° VFOV).
+FACE_YAW_RANGE_DEG = 32.0
+FACE_PITCH_RANGE_DEG = 25.0
+
+
+@dataclass
+class FacePosition:
+    """Smoothed face center, normalized to [-1, 1] (-1 = left/top edge, +1 = right/bottom edge)."""
+    nx: float
+    ny: float
+    size: float        # face width as a fraction of frame width
+    timestamp: float   # loop time of the frame the measurement came from
+
+
+def face_offset_to_angles(nx: float, ny: float) -> tuple[float, float]:
+    """Return (yaw_adjust_deg, pitch_adjust_deg) that would center a face at (nx, ny).
+
+    yaw positive = turn head left, pitch positive = look down (same convention as set_pose).
+    """
+    return -nx * FACE_YAW_RANGE_DEG, ny * FACE_PITCH_RANGE_DEG
+
+
+def _tracker_factory():
+    """Constructor of the cheapest OpenCV tracker available in this build, or None."""
+    for name in FACE_TRACKER_NAMES:
+        factory = getattr(cv2, name, None)
+        if factory is None:
+            factory = getattr(getattr(cv2, "legacy", None), name, None)
+        if factory is not None:
+            return factory
+    return None
+
+
+def _create_tracker():
+    """Build the cheapest OpenCV tracker available in this build, or None."""
+    factory = _tracker_factory()
+    return factory() if factory is not None else None
+
+
+class FaceTracker:
+    """
+    Keeps a smoothed face position up to date in the background.
+
+    A full Haar detection runs every FACE_DETECT_INTERVAL_S (or as soon as the
+    tracker loses the face); in between, a KCF/CSRT tracker follows the box on
+    every new camera frame. OpenCV builds without those trackers still detect
+    only every FACE_DETECT_INTERVAL_S and hold the last box in between.
+    get_position() never touches the camera or OpenCV.
+    """
+
+    def __init__(self, vision: ReachyVision) -> None:
+        self._vision = vision
+        self._tracker = None
+        self._can_track: bool | None = None   # KCF/CSRT in this OpenCV build; checked on the first frame
+        self._box: tuple[int, int, int, int] | None = None
+        self._last_detect_ts = 0.0
+        self._last_seq = 0
+        self._position: FacePosition | None = None
+
+    def get_position(self, max_age_s: float = FACE_STALE_S) -> FacePosition | None:
+        """Latest smoothed face position, or None if nothing fresh has been seen."""
+        pos = self._position
+        if pos is None:
+            return None
+        if asyncio.get_running_loop().time() - pos.timestamp > max_age_s:
+            return None
+        return pos
+
+    async def track_loop(self) -> None:
+        """Follow the face on each new frame grabbed by ReachyVision.capture_loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(FACE_TRACK_INTERVAL_S)
+            frame, seq, frame_ts = await self._vision.get_latest_frame()
+            if frame is None or seq == self._last_seq:
+                continue
+            self._last_seq = seq
+            if self._can_track is None:
+                self._can_track = await loop.run_in_executor(None, _tracker_factory) is not None
+
+            detect_due = (frame_ts - self._last_detect_ts) >= FACE_DETECT_INTERVAL_S
+            if self._tracker is not None and not detect_due:
+                box = await loop.run_in_executor(None, self._track, frame)
+            elif detect_due or self._can_track:
+                # With a tracker, a lost face is looked for again right away.
+                self._last_detect_ts = frame_ts
+                # Detection goes through ReachyVision so it runs in the vision worker when enabled.
+                box = await self._vision.detect_face_box(frame_seq=seq)
+                if box is not None and self._can_track:
+                    await loop.run_in_executor(None, self._init_tracker, frame, box)
+            else:
+                box = self._box   # no tracker: hold the last detection until the next one
+
+            self._box = box
+            if box is None:
+                self._tracker = None
+                continue
+            self._update_position(box, frame.shape[1], frame.shape[0], frame_ts)
+
+    # ------------------------------------------------------------------
+    # Executor-side helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _downscale(frame: np.ndarray) -> tuple[np.ndarray, float]:
+        scale = FACE_TRACK_WIDTH / frame.shape[1]
+        if scale >= 1.0:
+            return frame, 1.0
+        h = int(frame.shape[0] * scale)
+        return cv2.resize(frame, (FACE_TRACK_WIDTH, h), interpolation=cv2.INTER_AREA), scale
+
+    def _init_tracker(self, frame: np.ndarray, box: tuple[int, int, int, int]) -> None:
+        """(Re)initialize the tracker on a freshly detected box."""
+        tracker = _create_tracker()
+        if tracker is not None:
+            small, scale = self._downscale(frame)
+            x, y, w, h = box
+            tracker.init(small, (int(x * scale), int(y * scale), max(1, int(w * scale)), max(1, int(h * scale))))
+        self._tracker = tracker
+
+    def _track(self, frame: np.ndarray) -> tuple[int, int, int, int] | None:
+        """Cheap tracker update; returns the box in original frame coordinates."""
+        tracker = self._tracker
+        if tracker is None:
+            return None
+        small, scale = self._downscale(frame)
+        ok, (x, y, w, h) = tracker.update(small)
+        if not ok or w <= 0 or h <= 0:
+            return None
+        return (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+
+    def _update_position(self, box: tuple[int, int, int, int], width: int, height: int, ts: float) -> None:
+        x, y, w, h = box
+        nx = ((x + w / 2) / width - 0.5) * 2
+        ny = ((y + h / 2) / height - 0.5) * 2
+        size = w / width
+
+        prev = self._position
+        if prev is not None and ts - prev.timestamp <= FACE_STALE_S:
+            a = FACE_SMOOTHING_ALPHA
+            nx = a * nx + (1 - a) * prev.nx
+            ny = a * ny + (1 - a) * prev.ny
+            size = a * size + (1 - a) * prev.size
+        self._position = FacePosition(nx=nx, ny=ny, size=size, timestamp=ts)
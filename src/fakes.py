@@ -0,0 +1,607 @@
+"""
+fakes.py — in-process stand-ins for running the State 1–3 pipeline headless.
+
+    InMemoryFirestore   the slice of the Firestore client FirebaseHelper uses
+    FakeReachyMini      mini.media serving a WAV (mic) and a video / blank frames
+                        (camera), recording every pushed speaker sample and
+                        set_target; motion calls are no-ops
+    ScriptedLiveClient  client.aio.live.connect() replaying the server messages of
+                        a trace_writer trace with their original timing
+    ScriptedBle         start_ble_server_async replacement: one connection with a
+                        module already selected, dropped when the script runs out
+    FakeEmotionLibrary  EmotionLibrary without the HuggingFace dataset
+
+replay_bench.py wires these into main.run(); see it for the CLI.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import json
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from google.genai import types
+
+from audio_adapters import AudioControl
+from bluetooth_helper import DisconnectEvent, ModuleControl
+from emotion_library import CachedMove, EMOTION_SAMPLE_HZ
+from trace_analysis import iter_records, session_id
+
+
+FAKE_MIC_SAMPLE_RATE = 16000       # used when no WAV is given
+FAKE_MIC_BLOCK = 512               # samples per get_audio_sample() chunk, like the appsink
+FAKE_SPEAKER_SAMPLE_RATE = 16000
+FAKE_CAMERA_FPS = 15
+FAKE_FRAME_SHAPE = (480, 640, 3)
+LIVE_AUDIO_RATE = 24000            # Live API output: PCM16 24 kHz mono
+SCRIPT_MAX_GAP_S = 5.0             # idle gaps in a recorded trace are clipped to this
+
+
+# ---------------------------------------------------------------------------
+# Firestore
+# ---------------------------------------------------------------------------
+
+class _Snapshot:
+    def __init__(self, doc_id: str, data: dict | None) -> None:
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return None if self._data is None else dict(self._data)
+
+
+class _DocumentRef:
+    def __init__(self, store: InMemoryFirestore, path: tuple[str, ...]) -> None:
+        self._store = store
+        self._path = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> _CollectionRef:
+        return _CollectionRef(self._store, self._path + (name,))
+
+    def get(self) -> _Snapshot:
+        return _Snapshot(self.id, self._store._read(self._path))
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._store._write(self._path, data, merge)
+
+    def update(self, data: dict) -> None:
+        self._store._write(self._path, data, merge=True)
+
+    def on_snapshot(self, callback) -> _Watch:
+        """Like the real client: callback([snapshot], changes, read_time) now and after every write, off-thread."""
+        return self._store._watch(self._path, callback)
+
+
+class _Watch:
+    def __init__(self, store: InMemoryFirestore, path: tuple[str, ...], callback) -> None:
+        self._store = store
+        self._path = path
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        with self._store._lock:
+            watchers = self._store._watchers.get(self._path, [])
+            if self in watchers:
+                watchers.remove(self)
+
+
+class _CollectionRef:
+    def __init__(self, store: InMemoryFirestore, path: tuple[str, ...]) -> None:
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id: str) -> _DocumentRef:
+        return _DocumentRef(self._store, self._path + (doc_id,))
+
+    def add(self, data: dict) -> tuple[None, _DocumentRef]:
+        ref = self.document(f"auto{next(self._store._ids)}")
+        ref.set(data)
+        return None, ref
+
+    def stream(self):
+        for path, data in self._store._children(self._path):
+            yield _Snapshot(path[-1], data)
+
+
+class InMemoryFirestore:
+    """
+    Dict-backed Firestore client: collection()/document()/get()/set()/add()/stream().
+
+    Documents are keyed by their full path ("user_profiles/uid/modules/m1").
+    Every call sleeps `latency_s` so the prefetch / background-write paths see
+    a realistic round trip. Document refs support on_snapshot(); tests can
+    change a watched document with set_document() to simulate the app.
+    """
+
+    def __init__(self, docs: dict[str, dict] | None = None, latency_s: float = 0.0) -> None:
+        self._docs: dict[tuple[str, ...], dict] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.latency_s = latency_s
+        self.reads = 0
+        self.writes = 0
+        self._watchers: dict[tuple[str, ...], list[_Watch]] = {}
+        self._delivery = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fake_watch")  # in order, like the real stream
+        for path, data in (docs or {}).items():
+            self._docs[tuple(path.strip("/").split("/"))] = dict(data)
+
+    @classmethod
+    def from_json(cls, path: Path, latency_s: float = 0.0) -> InMemoryFirestore:
+        return cls(json.loads(Path(path).read_text()), latency_s)
+
+    def collection(self, name: str) -> _CollectionRef:
+        return _CollectionRef(self, (name,))
+
+    def document(self, path: str) -> dict | None:
+        """Current contents of a document by path (for assertions / reports)."""
+        return self._read(tuple(path.strip("/").split("/")), count=False)
+
+    def set_document(self, path: str, data: dict, merge: bool = True) -> None:
+        """Write a document as another client would (no latency, not counted)."""
+        key = tuple(path.strip("/").split("/"))
+        with self._lock:
+            if merge and key in self._docs:
+                self._docs[key].update(data)
+            else:
+                self._docs[key] = dict(data)
+        self._notify(key)
+
+    def _read(self, path: tuple[str, ...], count: bool = True) -> dict | None:
+        if count:
+            self._round_trip()
+            self.reads += 1
+        with self._lock:
+            data = self._docs.get(path)
+            return None if data is None else dict(data)
+
+    def _write(self, path: tuple[str, ...], data: dict, merge: bool) -> None:
+        self._round_trip()
+        with self._lock:
+            self.writes += 1
+            if merge and path in self._docs:
+                self._docs[path].update(data)
+            else:
+                self._docs[path] = dict(data)
+        self._notify(path)
+
+    def _children(self, path: tuple[str, ...]) -> list[tuple[tuple[str, ...], dict]]:
+        self._round_trip()
+        with self._lock:
+            self.reads += 1
+            return [(p, dict(d)) for p, d in self._docs.items() if len(p) == len(path) + 1 and p[:-1] == path]
+
+    def _watch(self, path: tuple[str, ...], callback) -> _Watch:
+        watch = _Watch(self, path, callback)
+        with self._lock:
+            self._watchers.setdefault(path, []).append(watch)
+        self._delivery.submit(self._deliver, [watch], path)
+        return watch
+
+    def _notify(self, path: tuple[str, ...]) -> None:
+        with self._lock:
+            watchers = list(self._watchers.get(path, ()))
+        if watchers:
+            self._delivery.submit(self._deliver, watchers, path)
+
+    def _deliver(self, watchers: list[_Watch], path: tuple[str, ...]) -> None:
+        snapshot = _Snapshot(path[-1], self._read(path, count=False))
+        for watch in watchers:
+            if watch in self._watchers.get(path, ()):
+                watch._callback([snapshot], [], time.time())
+
+    def _round_trip(self) -> None:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+
+def demo_firestore(uid: str, module_id: str, latency_s: float = 0.0) -> InMemoryFirestore:
+    """A store with one user and one small module — enough for a replay without fixtures."""
+    return InMemoryFirestore({
+        f"user_profiles/{uid}": {"name": "Replay Student"},
+        f"modules/{module_id}": {
+            "title": "Addition and Subtraction",
+            "essential_question": "How can we add and subtract numbers up to 1000?",
+            "concepts": [{"term": "sum", "definition": "The result of adding numbers."}],
+            "quiz_questions": {"guided": [f"What is {10 * n} + {n}?" for n in range(1, 9)]},
+        },
+    }, latency_s)
+
+
+# ---------------------------------------------------------------------------
+# Reachy Mini
+# ---------------------------------------------------------------------------
+
+def read_wav(path: Path) -> tuple[np.ndarray, int]:
+    """PCM16 WAV -> (float32 array shaped (n, channels), sample rate)."""
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels, sr = w.getnchannels(), w.getframerate()
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    return (pcm.astype(np.float32) / 32768.0).reshape(-1, channels), sr
+
+
+def write_wav(path: Path, samples: np.ndarray, sample_rate: int) -> None:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+
+class FakeMedia:
+    """mini.media: the WAV is served in real time from start_recording(); pushed audio is kept."""
+
+    def __init__(self, mic_wav: Path | None = None, video: Path | None = None, keep_output: bool = False) -> None:
+        if mic_wav is not None:
+            self._mic, self._mic_sr = read_wav(mic_wav)
+        else:
+            self._mic, self._mic_sr = np.zeros((0, 1), dtype=np.float32), FAKE_MIC_SAMPLE_RATE
+        self._mic_started: float | None = None
+        self._mic_served = 0
+        self._video_path = video
+        self._capture = None
+        self._frame_lock = threading.Lock()
+        self._blank = np.full(FAKE_FRAME_SHAPE, 96, dtype=np.uint8)
+        self._keep_output = keep_output
+        self.camera = None             # ReachyVision skips resolution setup
+        self.playing = False
+        self.output: list[np.ndarray] = []
+        self.pushed_samples = 0
+        self.push_calls = 0
+        self.first_push_at: float | None = None
+        self.frames_served = 0
+
+    # --- Microphone ---
+
+    def get_input_audio_samplerate(self) -> int:
+        return self._mic_sr
+
+    def get_input_channels(self) -> int:
+        return self._mic.shape[1]
+
+    def start_recording(self) -> None:
+        self._mic_started = time.monotonic()
+        self._mic_served = 0
+
+    def stop_recording(self) -> None:
+        self._mic_started = None
+
+    def get_audio_sample(self) -> np.ndarray | None:
+        if self._mic_started is None:
+            return None
+        due = int((time.monotonic() - self._mic_started) * self._mic_sr)
+        if due - self._mic_served < FAKE_MIC_BLOCK:
+            return None
+        start, self._mic_served = self._mic_served, self._mic_served + FAKE_MIC_BLOCK
+        chunk = self._mic[start : start + FAKE_MIC_BLOCK]
+        if len(chunk) < FAKE_MIC_BLOCK:  # past the end of the WAV: silence
+            pad = np.zeros((FAKE_MIC_BLOCK - len(chunk), self._mic.shape[1]), dtype=np.float32)
+            chunk = np.concatenate([chunk, pad])
+        return chunk
+
+    def get_DoA(self) -> tuple[float, bool]:
+        return 0.0, False
+
+    # --- Speaker ---
+
+    def get_output_audio_samplerate(self) -> int:
+        return FAKE_SPEAKER_SAMPLE_RATE
+
+    def start_playing(self) -> None:
+        self.playing = True
+
+    def stop_playing(self) -> None:
+        self.playing = False
+
+    def push_audio_sample(self, samples: np.ndarray) -> None:
+        if self.first_push_at is None:
+            self.first_push_at = time.monotonic()
+        self.push_calls += 1
+        self.pushed_samples += len(samples)
+        if self._keep_output:
+            self.output.append(np.array(samples, copy=True))
+
+    def save_output(self, path: Path) -> None:
+        samples = np.concatenate(self.output) if self.output else np.zeros(0, dtype=np.float32)
+        write_wav(path, samples, FAKE_SPEAKER_SAMPLE_RATE)
+
+    # --- Camera ---
+
+    def get_frame(self) -> np.ndarray | None:
+        """Blocking like the real camera: one frame per 1/FAKE_CAMERA_FPS."""
+        time.sleep(1.0 / FAKE_CAMERA_FPS)
+        self.frames_served += 1
+        if self._video_path is None:
+            return self._blank
+        import cv2
+
+        with self._frame_lock:
+            if self._capture is None:
+                self._capture = cv2.VideoCapture(str(self._video_path))
+            ok, frame = self._capture.read()
+            if not ok:  # loop the clip
+                self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self._capture.read()
+        return frame if ok else self._blank
+
+
+class FakeReachyMini:
+    """ReachyMini stand-in: FakeMedia plus no-op motion that counts set_target calls."""
+
+    def __init__(self, media: FakeMedia | None = None) -> None:
+        self.media = media or FakeMedia()
+        self.targets_sent = 0
+        self.moves_played = 0
+        self._head_pose = np.eye(4)
+
+    def __enter__(self) -> FakeReachyMini:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.media.stop_recording()
+        self.media.stop_playing()
+
+    def set_target(self, head=None, antennas=None, body_yaw=None) -> None:
+        self.targets_sent += 1
+        if head is not None:
+            self._head_pose = np.asarray(head)
+
+    def get_current_head_pose(self) -> np.ndarray:
+        return self._head_pose
+
+    def get_current_joint_positions(self) -> tuple[list[float], list[float]]:
+        return [0.0] * 7, [0.0, 0.0]
+
+    def get_present_antenna_joint_positions(self) -> tuple[float, float]:
+        return 0.0, 0.0
+
+    def goto_target(self, **kwargs) -> None:
+        pass
+
+    def enable_motors(self, ids=None) -> None:
+        pass
+
+    def disable_motors(self, ids=None) -> None:
+        pass
+
+    async def async_play_move(self, move, sound: bool = True) -> None:
+        self.moves_played += 1
+        await asyncio.sleep(move.duration)
+
+
+class FakeEmotionLibrary:
+    """Every emotion is the same one-second neutral hold."""
+
+    def __init__(self, names: list[str] | None = None) -> None:
+        self._names = list(names or [])
+        n = EMOTION_SAMPLE_HZ
+        self._move = CachedMove(
+            np.arange(n, dtype=np.float32) / n,
+            np.tile(np.eye(4, dtype=np.float32)[:3], (n, 1, 1)),
+            np.zeros((n, 2), dtype=np.float32),
+            np.zeros(n, dtype=np.float32),
+        )
+        self.missing: list[str] = []
+
+    def load(self) -> None:
+        pass
+
+    def get(self, name: str) -> CachedMove:
+        return self._move
+
+    def list_moves(self) -> list[str]:
+        return list(self._names)
+
+
+# ---------------------------------------------------------------------------
+# Gemini Live
+# ---------------------------------------------------------------------------
+
+def _synth_audio(n_bytes: int) -> bytes:
+    """Stand-in for audio the trace didn't keep: a quiet 220 Hz tone of the same length."""
+    t = np.arange(n_bytes // 2) / LIVE_AUDIO_RATE
+    return (np.sin(2 * np.pi * 220.0 * t) * 4000).astype(np.int16).tobytes()
+
+
+def message_from_record(rec: dict) -> types.LiveServerMessage:
+    """Rebuild a LiveServerMessage from a trace_writer "server" record."""
+    content = None
+    chunks = rec.get("audio_b64") or []
+    blobs = [base64.b64decode(c) for c in chunks]
+    if not blobs and rec.get("audio_chunks"):
+        per_chunk = rec.get("audio_bytes", 0) // rec["audio_chunks"]
+        blobs = [_synth_audio(per_chunk) for _ in range(rec["audio_chunks"])]
+    sc_fields = {flag: True for flag in ("turn_complete", "generation_complete", "interrupted") if rec.get(flag)}
+    if blobs:
+        sc_fields["model_turn"] = types.Content(role="model", parts=[
+            types.Part(inline_data=types.Blob(data=b, mime_type=f"audio/pcm;rate={LIVE_AUDIO_RATE}")) for b in blobs
+        ])
+    if "input_text" in rec:
+        sc_fields["input_transcription"] = types.Transcription(text=rec["input_text"])
+    if "output_text" in rec:
+        sc_fields["output_transcription"] = types.Transcription(text=rec["output_text"])
+    if sc_fields:
+        content = types.LiveServerContent(**sc_fields)
+
+    fields: dict = {"server_content": content}
+    if rec.get("tool_calls"):
+        fields["tool_call"] = types.LiveServerToolCall(function_calls=[
+            types.FunctionCall(id=c.get("id"), name=c["name"], args=c.get("args") or {}) for c in rec["tool_calls"]
+        ])
+    if rec.get("tool_cancel_ids"):
+        fields["tool_call_cancellation"] = types.LiveServerToolCallCancellation(ids=rec["tool_cancel_ids"])
+    if rec.get("tokens"):
+        fields["usage_metadata"] = types.UsageMetadata(
+            prompt_token_count=rec["tokens"].get("prompt"), total_token_count=rec["tokens"].get("total"),
+        )
+    if rec.get("resumable"):
+        fields["session_resumption_update"] = types.LiveServerSessionResumptionUpdate(
+            resumable=True, new_handle=f"replay-{rec['t']}",
+        )
+    return types.LiveServerMessage(**fields)
+
+
+def load_script(paths: list[Path], session: str | None = None) -> list[tuple[float, types.LiveServerMessage]]:
+    """
+    Server messages of one traced session as (offset_s, message), offsets from
+    the first message. Defaults to the first session in the trace; idle gaps
+    are clipped to SCRIPT_MAX_GAP_S. go_away and setup_complete aren't replayed.
+    """
+    script: list[tuple[float, types.LiveServerMessage]] = []
+    offset = 0.0
+    last_t = None
+    for rec in iter_records(paths):
+        if rec.get("kind") != "server":
+            continue
+        if session is None:
+            session = session_id(rec)
+        if session_id(rec) != session:
+            continue
+        if last_t is not None:
+            offset += min(max(rec["t"] - last_t, 0.0), SCRIPT_MAX_GAP_S)
+        last_t = rec["t"]
+        script.append((offset, message_from_record(rec)))
+    return script
+
+
+class ScriptedLiveSession:
+    """One connection; the script cursor is shared through the client so reconnects continue."""
+
+    def __init__(self, client: ScriptedLiveClient) -> None:
+        self._client = client
+        self.closed = False
+
+    async def receive(self):
+        """Like AsyncSession.receive(): the messages of one turn, up to turn_complete."""
+        client = self._client
+        loop = asyncio.get_running_loop()
+        if client.started_at is None:
+            client.started_at = loop.time()
+        while client.cursor < len(client.script):
+            offset, message = client.script[client.cursor]
+            delay = client.started_at + offset / client.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            client.cursor += 1
+            client.messages_sent += 1
+            yield message
+            if message.server_content is not None and message.server_content.turn_complete:
+                return
+        if not client.exhausted.is_set():
+            client.exhausted.set()
+            if client.on_exhausted is not None:
+                client.on_exhausted()
+        await asyncio.Event().wait()   # the real socket would just go quiet
+
+    async def send_realtime_input(self, **kwargs) -> None:
+        audio = kwargs.get("audio")
+        if audio is not None:
+            self._client.mic_frames += 1
+            self._client.mic_bytes += len(audio["data"])
+        else:
+            self._client.realtime_other += 1
+
+    async def send_client_content(self, **kwargs) -> None:
+        self._client.client_content.append(kwargs)
+
+    async def send_tool_response(self, **kwargs) -> None:
+        self._client.tool_responses.extend(kwargs.get("function_responses") or [])
+
+
+class _ScriptedConnect:
+    def __init__(self, client: ScriptedLiveClient) -> None:
+        self._client = client
+        self._session: ScriptedLiveSession | None = None
+
+    async def __aenter__(self) -> ScriptedLiveSession:
+        if self._client.connect_latency_s:
+            await asyncio.sleep(self._client.connect_latency_s)
+        self._client.connects += 1
+        self._session = ScriptedLiveSession(self._client)
+        return self._session
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            self._session.closed = True
+
+
+class ScriptedLiveClient:
+    """genai.Client stand-in: client.aio.live.connect(model=..., config=...) replays `script`."""
+
+    def __init__(
+        self,
+        script: list[tuple[float, types.LiveServerMessage]],
+        speed: float = 1.0,
+        connect_latency_s: float = 0.0,
+    ) -> None:
+        self.script = script
+        self.speed = speed
+        self.connect_latency_s = connect_latency_s
+        self.cursor = 0
+        self.started_at: float | None = None
+        self.exhausted = asyncio.Event()
+        self.on_exhausted = None        # e.g. ScriptedBle.disconnect
+        self.connects = 0
+        self.messages_sent = 0
+        self.mic_frames = 0
+        self.mic_bytes = 0
+        self.realtime_other = 0
+        self.client_content: list[dict] = []
+        self.tool_responses: list[dict] = []
+        # client.aio.live.connect(...)
+        self.aio = self
+        self.live = self
+
+    def connect(self, model: str, config=None) -> _ScriptedConnect:
+        return _ScriptedConnect(self)
+
+
+# ---------------------------------------------------------------------------
+# Bluetooth
+# ---------------------------------------------------------------------------
+
+class ScriptedBle:
+    """
+    Pass `connect` as main.run(connect_ble=...). The first call "connects" user
+    `uid` with `module_id` already selected; disconnect() ends it. The next call
+    (State 1 again) sets `finished` and waits forever, so the harness knows the
+    run is over and can cancel it.
+    """
+
+    def __init__(self, uid: str, module_id: str) -> None:
+        self.uid = uid
+        self.module_id = module_id
+        self.finished = asyncio.Event()
+        self.audio_control = AudioControl()
+        self._disconnected: DisconnectEvent | None = None
+        self.connections = 0
+
+    async def connect(self, mini) -> tuple[str, DisconnectEvent, AudioControl, ModuleControl]:
+        self.connections += 1
+        if self.connections > 1:
+            self.finished.set()
+            await asyncio.Event().wait()
+        module_control = ModuleControl(asyncio.get_running_loop())
+        module_control.module_id = self.module_id
+        module_control.module_selected_event.set()
+        self._disconnected = DisconnectEvent()
+        return self.uid, self._disconnected, self.audio_control, module_control
+
+    def disconnect(self) -> None:
+        if self._disconnected is not None:
+            self._disconnected.mark("scripted")
+
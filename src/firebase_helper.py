@@ -1,30 +1,62 @@
 import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from metrics import FIRESTORE_WRITE_ERRORS, FIRESTORE_WRITE_SECONDS
+from log_config import get_logger
+
+logger = get_logger("firebase")
+
+# user_profiles/{uid} fields the app writes; watched by watch_profile().
+PROFILE_MODULE_FIELD = "current_module"   # module id, or empty / absent when none is selected
+PROFILE_VOLUME_FIELD = "volume"           # 0–100
+PROFILE_MUTE_FIELD = "mic_muted"          # bool
 
 class FirebaseHelper:
     """
     Manages Firebase connection and the current active user/module session.
     Call set_loop() once at startup, then set_user() after receiving the active user.
+    db can be any object with the Firestore client's collection/document API
+    (fakes.InMemoryFirestore for offline runs); by default the real client.
     """
 
-    def __init__(self):
-        if not firebase_admin._apps:
-            creds = credentials.Certificate("credentials.json")
-            firebase_admin.initialize_app(creds)
-        self.db = firestore.client()
+    def __init__(self, db=None):
+        if db is None:
+            if not firebase_admin._apps:
+                creds = credentials.Certificate("credentials.json")
+                firebase_admin.initialize_app(creds)
+            db = firestore.client()
+        self.db = db
         self.user_id: str = None
         self.user_doc_ref = None
         self.module_id: str = None
         self._profile_watch = None
+        self._profile_module: str = None   # last module id seen on the profile
+        self._profile_generation = 0       # bumped per watch so late callbacks of a stopped one are dropped
         self._reachy_watch = None
         self._loop: asyncio.AbstractEventLoop = None
         self.module_selected_event: asyncio.Event = None
         self.module_exited_event: asyncio.Event = None
 
+        # Writes (message log, question counter) go through one background thread so
+        # they stay ordered and never block a caller; reads for the active module are
+        # prefetched on another so they don't queue behind writes.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="firestore_write")
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="firestore_read")
+        self._prefetch: Future = None
+        # (module_id, fetch) started for a module selected mid-session; set_module() adopts it.
+        self._pending_prefetch: tuple[str, Future] = None
+        self._question_lock = threading.Lock()
+        self._module_data: dict = None
+        self._guided: list = None
+        self._question_num: int = None     # last example question served
+        self._next_question: str = None    # payload for _question_num + 1, precomputed
+
     def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         """Store the running event loop. Call once at startup."""
         self._loop = loop
@@ -34,11 +66,125 @@ class FirebaseHelper:
         self.user_id = user_id
         self.user_doc_ref = self.db.collection("user_profiles").document(user_id)
 
-    def stop(self) -> None:
-        """Unsubscribe all Firestore listeners."""
+    def set_module(self, module_id: str) -> None:
+        """Activate a module and start prefetching its data and guided questions."""
+        if module_id != self.module_id or self._prefetch is None:
+            pending, self._pending_prefetch = self._pending_prefetch, None
+            fetched = pending[1] if pending is not None and pending[0] == module_id else None
+            self._clear_module_cache()
+            self.module_id = module_id
+            with self._question_lock:
+                self._prefetch = self._reader.submit(self._load_module, self.user_doc_ref, module_id, fetched)
+
+    def prefetch_module(self, module_id: str) -> None:
+        """Start fetching a module's data without activating it (set_module() picks it up)."""
+        if self.user_doc_ref is None:
+            return
+        self._pending_prefetch = (module_id, self._reader.submit(self._fetch_module, self.user_doc_ref, module_id))
+
+    def clear_module(self) -> None:
+        self.module_id = None
+        self._clear_module_cache()
+
+    def _clear_module_cache(self) -> None:
+        with self._question_lock:
+            self._prefetch = None
+            self._module_data = None
+            self._guided = None
+            self._question_num = None
+            self._next_question = None
+
+    def close(self) -> None:
+        """Stop listeners and flush pending writes — call once at shutdown."""
+        self.stop()
+        self._reader.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+
+    def watch_profile(self, module_control, audio_control) -> None:
+        """
+        Listen to the user profile and push module selection / deselection and
+        settings into the loop, on the same ModuleControl events main.run()
+        waits on — a second path next to the BLE writes. A newly selected
+        module's data is prefetched as soon as the change arrives.
+
+        The first snapshot only records the current module (it may be stale
+        from a previous session) and applies the settings; later changes to
+        the module field select or deselect.
+        """
+        self.stop_profile_watch()
+        self._profile_module = None
+        generation = self._profile_generation
+        first = True
+
+        def _on_snapshot(docs, changes, read_time):
+            # Firestore's watch thread: hand the data to the loop, touch nothing here.
+            nonlocal first
+            if not docs or self._loop is None or self._loop.is_closed():
+                return
+            data = docs[0].to_dict() or {}
+            initial, first = first, False
+            self._loop.call_soon_threadsafe(
+                self._apply_profile, generation, data, initial, module_control, audio_control,
+            )
+
+        self._profile_watch = self.user_doc_ref.on_snapshot(_on_snapshot)
+
+    def _apply_profile(self, generation: int, data: dict, initial: bool, module_control, audio_control) -> None:
+        """Loop thread: apply one profile snapshot."""
+        if generation != self._profile_generation:
+            return  # from a watch that has since been stopped
+
+        if PROFILE_VOLUME_FIELD in data:
+            try:
+                volume = max(0, min(100, int(data[PROFILE_VOLUME_FIELD])))
+            except (TypeError, ValueError):
+                volume = audio_control.volume
+            if volume != audio_control.volume:
+                audio_control.volume = volume
+                logger.info("Volume → %d (profile)", volume)
+        if PROFILE_MUTE_FIELD in data:
+            muted = bool(data[PROFILE_MUTE_FIELD])
+            if muted != audio_control.mic_muted:
+                audio_control.mic_muted = muted
+                logger.info("Mic %s (profile)", "muted" if muted else "unmuted")
+
+        module_id = data.get(PROFILE_MODULE_FIELD) or None
+        if initial or module_id == self._profile_module:
+            self._profile_module = module_id
+            return
+        self._profile_module = module_id
+
+        if module_id is None:
+            if module_control.module_id is not None:
+                logger.info("Module deselected (profile)")
+                module_control.module_id = None
+                module_control.module_selected_event.clear()
+                module_control.module_exited_event.set()
+            return
+
+        if module_id == module_control.module_id:
+            return  # BLE got there first
+        logger.info("Module selected: %s (profile)", module_id)
+        if self.module_id is not None and self.module_id != module_id:
+            # Switching modules mid-session: end the current one; main.run()
+            # picks the new selection up instead of returning to State 2. The
+            # current module stays active until then; only its data is fetched now.
+            self.prefetch_module(module_id)
+            module_control.module_exited_event.set()
+        else:
+            self.set_module(module_id)   # warm the module data before State 3 asks for it
+        module_control.module_id = module_id
+        module_control.module_selected_event.set()
+
+    def stop_profile_watch(self) -> None:
+        self._profile_generation += 1
         if self._profile_watch:
             self._profile_watch.unsubscribe()
             self._profile_watch = None
+
+    def stop(self) -> None:
+        """Unsubscribe all Firestore listeners."""
+        self.stop_profile_watch()
         if self._reachy_watch:
             self._reachy_watch.unsubscribe()
             self._reachy_watch = None
@@ -48,7 +194,8 @@ class FirebaseHelper:
         self.stop()
         self.user_id = None
         self.user_doc_ref = None
-        self.module_id = None
+        self._pending_prefetch = None
+        self.clear_module()
 
     def log_message(self, sender: str, message: str) -> None:
         """
@@ -56,34 +203,104 @@ class FirebaseHelper:
         sender should be 'student', 'reachy', or 'system'.
         """
         if not self.user_doc_ref or not self.module_id:
-            print(f"[firebase] log_message skipped (no active module): [{sender}] {message[:60]}")
+            logger.debug("log_message skipped (no active module): [%s] %.60s", sender, message)
             return
-        self.user_doc_ref \
+        messages = self.user_doc_ref \
             .collection("modules").document(self.module_id) \
-            .collection("messages") \
-            .add({"from": sender, "message": message, "createdAt": datetime.now()})
+            .collection("messages")
+        self._submit_write(messages.add, {"from": sender, "message": message, "createdAt": datetime.now()})
 
-    def get_next_example_question(self) -> str:
+    def get_next_example_question(self) -> tuple[str, bool]:
+        """
+        Serve the next guided question from memory, as (text, served); served
+        is False when no question was handed out (no module, load failure, or
+        the guided list is used up). The module's guided list and the student's
+        counter are prefetched by set_module(); the counter update is written in
+        the background and the following payload precomputed, so only the very
+        first call can wait on Firestore (if prefetch hasn't landed).
+        """
         if not self.user_doc_ref or not self.module_id:
-            return "No active module selected. Please select a module first."
-        next_num = self.user_doc_ref.collection("modules").document(self.module_id).get().to_dict().get("example_question_num", 0) + 1
-
-        module_data = self.db.collection("modules").document(self.module_id).get().to_dict() or {}
-        example_questions = (
-            module_data.get("quiz_questions", {}).get("guided", [])
-        )
-        if next_num >= len(example_questions):
+            return "No active module selected. Please select a module first.", False
+        if not self._wait_prefetch():
+            return "Couldn't load the example questions for this module.", False
+
+        with self._question_lock:
+            if self._guided is None:
+                return "Couldn't load the example questions for this module.", False
+            next_num = self._question_num + 1
+            question = self._next_question
+            if next_num >= len(self._guided):
+                return question, False
+
+            self._question_num = next_num
+            self._next_question = self._format_question(next_num + 1)
+            module_ref = self.user_doc_ref.collection("modules").document(self.module_id)
+            self._submit_write(module_ref.set, {"example_question_num": next_num}, merge=True)
+        return question, True
+
+    def _format_question(self, num: int) -> str:
+        if num >= len(self._guided):
             return "There are no more example questions, move on to the quiz."
+        prefix = "FINAL EXAMPLE QUESTION\n" if num == len(self._guided) - 1 else ""
+        return prefix + str(self._guided[num])
+
+    def _fetch_module(self, user_doc_ref, module_id: str) -> tuple[dict, dict]:
+        """Reader thread: the module document and the student's progress on it."""
+        module_data = self.db.collection("modules").document(module_id).get().to_dict() or {}
+        progress = user_doc_ref.collection("modules").document(module_id).get().to_dict() or {}
+        return module_data, progress
 
-        self.user_doc_ref.collection("modules").document(self.module_id).set({"example_question_num": next_num}, merge=True)
+    def _load_module(self, user_doc_ref, module_id: str, fetched: Future = None) -> None:
+        """Reader thread: fetch (or take prefetch_module()'s result) and install the module's data."""
+        # `fetched` was submitted to this single-thread reader earlier, so it has already finished.
+        module_data, progress = fetched.result() if fetched is not None else self._fetch_module(user_doc_ref, module_id)
+        with self._question_lock:
+            if module_id != self.module_id:
+                return  # module changed while we were fetching
+            self._module_data = module_data
+            self._guided = list(module_data.get("quiz_questions", {}).get("guided", []))
+            self._question_num = progress.get("example_question_num", 0)
+            self._next_question = self._format_question(self._question_num + 1)
+        logger.info("Prefetched module '%s' (%d guided questions)", module_id, len(self._guided))
 
-        prefix = "FINAL EXAMPLE QUESTION\n" if next_num == len(example_questions) - 1 else ""
-        return prefix + str(example_questions[next_num])
+    def _wait_prefetch(self) -> bool:
+        """Block until set_module()'s prefetch has finished; False if it failed."""
+        with self._question_lock:
+            prefetch = self._prefetch
+        if prefetch is None:
+            self.set_module(self.module_id)
+            with self._question_lock:
+                prefetch = self._prefetch
+            if prefetch is None:
+                return False  # the module was cleared meanwhile
+        try:
+            prefetch.result()
+            return True
+        except Exception as e:
+            logger.warning("Module prefetch failed: %s", e)
+            with self._question_lock:
+                if self._prefetch is prefetch:
+                    self._prefetch = None  # retry on the next call (unless a newer prefetch replaced it)
+            return False
+
+    def _submit_write(self, fn, *args, **kwargs) -> None:
+        def _write():
+            t0 = time.perf_counter()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                FIRESTORE_WRITE_ERRORS.inc()
+                logger.warning("Background write failed: %s", e)
+            FIRESTORE_WRITE_SECONDS.observe(time.perf_counter() - t0)
+        self._writer.submit(_write)
 
     def get_lesson_data(self) -> str:
         if not self.user_doc_ref or not self.module_id:
             raise RuntimeError("set_user() must be called and a module must be selected before get_lesson_data()")
-        module_data = self.db.collection("modules").document(self.module_id).get().to_dict() or {}
+        if self._wait_prefetch() and self._module_data is not None:
+            module_data = self._module_data
+        else:
+            module_data = self.db.collection("modules").document(self.module_id).get().to_dict() or {}
         try:
             concepts = [
                 {"term": c.get("term", ""), "definition": c.get("definition", "").strip()}
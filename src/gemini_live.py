@@ -1,26 +1,33 @@
 import asyncio
-import inspect
+from typing import TYPE_CHECKING, Callable
 
-from google import genai
 from google.genai import errors as genai_errors
 
-from tools import Tools
+from tools import TOOL_REGISTRY, Tools
+from tool_executor import ToolExecutor
 from audio_adapters import clear_queue, drop_oldest_put_nowait
 from firebase_helper import FirebaseHelper
-from motion import (
-    MOVE_HEAD_TOOL_DECLARATION, SET_POSE_TOOL_DECLARATION,
-    PLAY_EMOTION_TOOL_DECLARATION, RETURN_HOME_TOOL_DECLARATION,
-)
+from motion import MotionPlanner
+from face_tracker import FaceTracker
 from vision import ReachyVision
+from trace_writer import TraceWriter
+from latency import LatencyTracer
+from log_config import get_logger
+
+
+logger = get_logger("live")
+
+if TYPE_CHECKING:
+    from session_summary import SessionSummary
 
 MIC_PREROLL_FRAMES = 10  # number of initial mic frames to skip to avoid stale audio
 MODEL = "gemini-live-2.5-flash-native-audio"
 
-# capture_image: let queued motion (set_pose/emotion) finish before the snapshot,
-# then send multiple frames so Gemini has more than one chance to read the iPad.
-CAPTURE_MOTION_SETTLE_S = 1.2
-CAPTURE_NUM_FRAMES = 3
-CAPTURE_FRAME_SPACING_S = 0.35
+# Server-side sliding window: once the history reaches TRIGGER tokens the oldest
+# turns are dropped down to TARGET, keeping per-turn latency flat in long lessons.
+# SessionSummary re-seeds the lesson and a compact record of past questions after.
+LIVE_COMPRESSION_TRIGGER_TOKENS = 32_000
+LIVE_COMPRESSION_TARGET_TOKENS = 16_000
 
 _FLOW_DOC = """\
 Script:
@@ -48,13 +55,27 @@ async def send_flow_context(session, lesson_context: str = "") -> None:
     )
 
 
-def build_live_config() -> dict:
-    """Build the Gemini Live session config."""
+async def send_lesson_context(session, lesson_context: str) -> None:
+    """Add the lesson context to a session that already has the flow doc (pre-warmed sessions)."""
+    await session.send_client_content(
+        turns=[{"role": "system", "parts": [{"text": "## Lesson Context\n" + lesson_context}]}],
+        turn_complete=False,
+    )
+
+
+def build_live_config(resume_handle: str | None = None) -> dict:
+    """Build the Gemini Live session config.
+
+    Session resumption is always enabled so the server keeps sending handles;
+    pass the latest one as resume_handle to reconnect into the same conversation.
+    """
     system_instruction = (
         "You are BAY-min, a friendly and encouraging 4th-grade math tutor robot. "
         "Always speak English; if the student uses another language, gently continue in English. "
         "Generate exactly ONE spoken response per student message — never start a second audio turn. "
-        "Keep all responses warm, age-appropriate, and at most 2 sentences unless asked to explain more."
+        "Keep all responses warm, age-appropriate, and at most 2 sentences unless asked to explain more. "
+        "Your head and antennas already move on their own while you speak, so only call motion tools "
+        "(move_head, set_pose, play_emotion, return_home) when the script asks for one or the student asks you to move."
     )
 
     return {
@@ -66,45 +87,19 @@ def build_live_config() -> dict:
             "language_code": "en-US",
             "voice_config": {"prebuilt_voice_config": {"voice_name": "Fenrir"}}
         },
-        "tools": [{
-            "function_declarations": [
-                {
-                    "name": "end_conversation",
-                    "description": "End the conversation. Gemini Live will stop generating and close the session after calling this."
-                },
-                MOVE_HEAD_TOOL_DECLARATION,
-                SET_POSE_TOOL_DECLARATION,
-                PLAY_EMOTION_TOOL_DECLARATION,
-                RETURN_HOME_TOOL_DECLARATION,
-                # {
-                #     "name": "get_face_position",
-                #     "description": (
-                #         "Detect where the student's face is in your camera view. "
-                #         "Returns a description of their position (left/right/above/below center) "
-                #         "and suggested yaw_deg/pitch_deg adjustments to center on them. "
-                #         "Use this at the start of a session, after large turns, or before capturing work."
-                #     ),
-                # },
-                {
-                    "name": "next_example_question",
-                    "description": "move on to the next example question in the current module. No arguments. Returns the question, answer, and steps to walk through to get to the answer."
-                },
-                {
-                    "name": "start_quiz",
-                    "description": "Start the module's quiz. No arguments."
-                },
-                {
-                    "name": "capture_image",
-                    "description": "Capture a photo from the front-facing camera and see what is in front of you. Call this when you need to look at something or when the student asks you to look at something."
-                }
-            ]
-        }]
+        "tools": [{"function_declarations": TOOL_REGISTRY.function_declarations()}],
+        "session_resumption": {"handle": resume_handle},
+        "context_window_compression": {
+            "trigger_tokens": LIVE_COMPRESSION_TRIGGER_TOKENS,
+            "sliding_window": {"target_tokens": LIVE_COMPRESSION_TARGET_TOKENS},
+        },
     }
 
 
-async def send_mic_loop(session, mic_queue: asyncio.Queue) -> None:
+async def send_mic_loop(session, mic_queue: asyncio.Queue, tracer=None) -> None:
     """
     Read PCM16 16kHz mono frames from mic_queue and send to Gemini Live as realtime input.
+    tracer (a LatencyTracer) is told when each frame has been handed to the session.
     """
     buffered_frames = []
     started = False
@@ -120,6 +115,8 @@ async def send_mic_loop(session, mic_queue: asyncio.Queue) -> None:
                 await session.send_realtime_input(
                     audio={"data": buffered_frame, "mime_type": "audio/pcm"}
                 )
+                if tracer is not None:
+                    tracer.mic_sent(buffered_frame)
             buffered_frames.clear()
             started = True
             continue
@@ -127,6 +124,8 @@ async def send_mic_loop(session, mic_queue: asyncio.Queue) -> None:
         await session.send_realtime_input(
             audio={"data": frame, "mime_type": "audio/pcm"}
         )
+        if tracer is not None:
+            tracer.mic_sent(frame)
 
 
 async def receive_loop(
@@ -135,76 +134,58 @@ async def receive_loop(
     interrupted_event: asyncio.Event,
     mini,
     firebase: FirebaseHelper,
-    motion_queue: asyncio.Queue,
+    motion_planner: MotionPlanner,
     disconnected_event: asyncio.Event,
     module_exited_event: asyncio.Event,
     vision: ReachyVision | None = None,
+    face_tracker: FaceTracker | None = None,
+    on_first_audio: Callable[[], None] | None = None,
+    summary: "SessionSummary | None" = None,
+    trace: TraceWriter | None = None,
+    tracer: LatencyTracer | None = None,
 ) -> str:
-    """Returns 'disconnected', 'module_exited', or 'ended'."""
-    tool_handler = Tools(firebase, motion_queue, vision=vision)
-    file = open("gemini_live_responses.txt", "w", encoding="utf-8")
+    """Returns 'disconnected', 'module_exited', or 'ended'.
+
+    on_first_audio is called once, when the first assistant audio chunk is queued.
+    summary, when given, is kept up to date with each turn and re-seeded if the
+    server compresses the context window. trace, when given, gets a compact
+    record of every server message and tool result. tracer, when given, is
+    stamped with first transcription / first audio / tool spans and closes a
+    latency turn at every turn boundary.
+    """
+    tool_handler = Tools(
+        firebase, motion_planner, vision=vision, face_tracker=face_tracker, session=session, summary=summary,
+    )
+    tool_executor = ToolExecutor(session, tool_handler, trace=trace, tracer=tracer)
+    reseed_tasks: set[asyncio.Task] = set()   # cancelled on the way out, like ToolExecutor._tasks
     ended = False
 
     async def _process_responses():
-        nonlocal ended
+        nonlocal ended, on_first_audio
         # After producing a response, require new user speech before allowing the next one.
         # This suppresses spontaneous follow-up turns the model sometimes emits after tool use.
         require_user_input = False
 
         while not ended:
             reachy_response_text = ""
+            user_text = ""
             user_spoke = False
             try:
                 async for response in session.receive():
-                    file.write(str(response) + f"\n{'-'*20}\n")
+                    if trace is not None:
+                        trace.emit_server_message(response)
                     sc = response.server_content
 
-                    tool_responses = []
-                    for call in response.tool_call.function_calls if response.tool_call else []:
-                        print(f"TOOL CALL: {call}")
-                        if call.name == "capture_image":
-                            # Let any queued set_pose / play_emotion settle before grabbing frames.
-                            await asyncio.sleep(CAPTURE_MOTION_SETTLE_S)
-
-                            frames_sent = 0
-                            for i in range(CAPTURE_NUM_FRAMES):
-                                frame_bytes = await vision.get_latest_frame_bytes() if vision else None
-                                if frame_bytes:
-                                    await session.send_realtime_input(
-                                        video=genai.types.Blob(data=frame_bytes, mime_type="image/jpeg")
-                                    )
-                                    frames_sent += 1
-                                if i < CAPTURE_NUM_FRAMES - 1:
-                                    await asyncio.sleep(CAPTURE_FRAME_SPACING_S)
-
-                            if frames_sent > 0:
-                                result = f"OK — {frames_sent} frames sent."
-                            else:
-                                result = "No image available."
-                            print(f"TOOL RESULT: {result}")
-                            tool_responses.append({
-                                "id": call.id,
-                                "name": call.name,
-                                "response": {"result": result},
-                            })
-                            continue
-                        fn = getattr(tool_handler, call.name, None)
-                        if fn:
-                            kwargs = dict(call.args) if call.args else {}
-                            if inspect.iscoroutinefunction(fn):
-                                result = await fn(**kwargs)
-                            else:
-                                result = fn(**kwargs)
-                            print(f"TOOL RESULT: {result}")
-                            tool_responses.append({
-                                "id": call.id,
-                                "name": call.name,
-                                "response": {"result": result},
-                            })
-                        if call.name == "end_conversation":
+                    if summary is not None and response.usage_metadata and summary.observe_usage(response.usage_metadata):
+                        task = asyncio.create_task(summary.reseed(session))
+                        reseed_tasks.add(task)
+                        task.add_done_callback(reseed_tasks.discard)
+
+                    if response.tool_call and response.tool_call.function_calls:
+                        calls = response.tool_call.function_calls
+                        tool_executor.dispatch(calls)
+                        if any(call.name == "end_conversation" for call in calls):
                             ended = True
-                    if tool_responses:
-                        await session.send_tool_response(function_responses=tool_responses)
 
                     if sc is None:
                         continue
@@ -219,9 +200,12 @@ async def receive_loop(
                     if sc.input_transcription:
                         user_tx = sc.input_transcription.text
                         if user_tx and user_tx.strip():
+                            if tracer is not None:
+                                tracer.transcription()
                             user_spoke = True
+                            user_text += user_tx
                             require_user_input = False
-                            print(f"USER: {user_tx}")
+                            logger.debug("USER (partial): %s", user_tx)
                             firebase.log_message("student", user_tx)
 
                     if require_user_input:
@@ -230,7 +214,7 @@ async def receive_loop(
                     if sc.output_transcription:
                         spoken_tx = sc.output_transcription.text
                         if spoken_tx and spoken_tx.strip():
-                            print(f"ASSISTANT (partial): {spoken_tx}")
+                            logger.debug("ASSISTANT (partial): %s", spoken_tx)
                             reachy_response_text += spoken_tx
 
                     audio_chunks = sc.model_turn.parts if sc.model_turn and sc.model_turn.parts else []
@@ -238,11 +222,16 @@ async def receive_loop(
                         inline_data = part.inline_data
                         data = inline_data.data if inline_data else None
                         if isinstance(data, (bytes, bytearray)):
+                            if on_first_audio is not None:
+                                on_first_audio()
+                                on_first_audio = None
+                            if tracer is not None:
+                                tracer.audio_received()
                             drop_oldest_put_nowait(speaker_queue, bytes(data))
 
             except genai_errors.APIError as e:
                 if e.code == 1000:
-                    print(f"[live] session closed by server: {e}")
+                    logger.info("session closed by server: %s", e)
                     ended = True
                 else:
                     raise
@@ -250,16 +239,27 @@ async def receive_loop(
             if interrupted_event.is_set():
                 interrupted_event.clear()
                 mini.media.start_playing()
-                print("[live] generation complete after interruption -> ready to receive new assistant audio")
+                logger.info("generation complete after interruption -> ready to receive new assistant audio")
                 reachy_response_text += " [generation interrupted]"
 
+            if tracer is not None:
+                tracer.turn_complete()
+            if user_text:
+                logger.info("USER FINAL: %s", user_text)
+
             if not ended:
+                if summary is not None:
+                    summary.on_student(user_text)
+                    summary.on_tutor(reachy_response_text)
                 if reachy_response_text:
-                    print(f"ASSISTANT FINAL: {reachy_response_text}")
+                    logger.info("ASSISTANT FINAL: %s", reachy_response_text)
                     firebase.log_message("reachy", reachy_response_text)
                     require_user_input = True
                 elif not user_spoke:
-                    print("[live] suppressed spontaneous model turn (no user input received)")
+                    logger.info("suppressed spontaneous model turn (no user input received)")
+
+        # Let end_conversation's response (and anything else in flight) reach the server.
+        await tool_executor.drain()
 
     async def _watch_exit_events():
         # Returns as soon as either exit event fires, unblocking asyncio.wait.
@@ -287,7 +287,10 @@ async def receive_loop(
                     await task
                 except (asyncio.CancelledError, Exception):
                     pass
-        file.close()
+        for task in reseed_tasks:
+            task.cancel()
+        await asyncio.gather(*reseed_tasks, return_exceptions=True)
+        await tool_executor.close()
 
     if disconnected_event.is_set():
         return "disconnected"
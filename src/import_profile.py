@@ -0,0 +1,133 @@
+"""
+import_profile.py — what a cold `import main` costs, package by package.
+
+    python import_profile.py                     # profile `import main`
+    python import_profile.py --runs 5 --top 15
+    python import_profile.py --module vision --json imports.json
+
+Every run is a fresh interpreter with -X importtime, so nothing is already in
+sys.modules; the best run is reported. Self time is charged to the top-level
+package of each module (cv2, scipy, google, ...), and the slowest modules are
+listed by cumulative time (their own import plus everything it pulled in).
+benchmarks/bench_startup.py uses profile_imports() as a regression budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+SRC_DIR = Path(__file__).resolve().parent
+_MARKER = "--import-profile-start--"
+_PROBE = (
+    "import sys, time\n"
+    f"sys.stderr.write({_MARKER!r} + '\\n'); sys.stderr.flush()\n"
+    "t0 = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - t0)\n"
+)
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_s: float
+    self_us: dict[str, int] = field(default_factory=dict)        # module -> own import time
+    cumulative_us: dict[str, int] = field(default_factory=dict)  # module -> incl. what it imported
+
+    @property
+    def modules(self) -> set[str]:
+        return set(self.self_us)
+
+    def by_package(self) -> dict[str, float]:
+        """Seconds of self time per top-level package, slowest first."""
+        out: dict[str, float] = {}
+        for name, us in self.self_us.items():
+            top = name.split(".")[0]
+            out[top] = out.get(top, 0.0) + us / 1e6
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+    def slowest(self, n: int = 20) -> list[tuple[str, float]]:
+        ranked = sorted(self.cumulative_us.items(), key=lambda kv: -kv[1])[:n]
+        return [(name, us / 1e6) for name, us in ranked]
+
+    def to_dict(self, top: int = 20) -> dict:
+        return {
+            "module": self.module,
+            "total_s": round(self.total_s, 4),
+            "by_package_s": {k: round(v, 4) for k, v in list(self.by_package().items())[:top]},
+            "slowest_s": {k: round(v, 4) for k, v in self.slowest(top)},
+        }
+
+
+def _parse(stderr: str) -> tuple[dict[str, int], dict[str, int]]:
+    self_us: dict[str, int] = {}
+    cumulative_us: dict[str, int] = {}
+    lines = stderr.splitlines()
+    if _MARKER in lines:
+        lines = lines[lines.index(_MARKER) + 1:]
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header row
+        name = parts[2].strip()
+        self_us[name] = self_us.get(name, 0) + int(parts[0])
+        cumulative_us[name] = max(cumulative_us.get(name, 0), int(parts[1]))
+    return self_us, cumulative_us
+
+
+def profile_imports(module: str = "main", runs: int = 1, python: str = sys.executable, cwd: Path = SRC_DIR) -> ImportProfile:
+    """Import `module` in `runs` fresh interpreters; the fastest run. Raises RuntimeError if the import fails."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    best: ImportProfile | None = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c", _PROBE.format(module=module)],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+            raise RuntimeError(f"import {module} failed:\n{tail}")
+        profile = ImportProfile(module, float(proc.stdout.strip().splitlines()[-1]), *_parse(proc.stderr))
+        if best is None or profile.total_s < best.total_s:
+            best = profile
+    return best
+
+
+def print_report(profile: ImportProfile, runs: int, top: int) -> None:
+    print(f"import {profile.module}: {profile.total_s * 1000:.0f} ms (best of {runs}), {len(profile.modules)} modules")
+    print("by package (self time):")
+    for name, seconds in list(profile.by_package().items())[:top]:
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+    print("slowest modules (cumulative):")
+    for name, seconds in profile.slowest(top):
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the cold-import cost of a BAY-min module (-X importtime).")
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to try; the fastest is reported")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    try:
+        profile = profile_imports(args.module, args.runs)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    print_report(profile, args.runs, args.top)
+    if args.json is not None:
+        args.json.write_text(json.dumps(profile.to_dict(args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+latency.py — per-turn conversational latency spans.
+
+The audio loops stamp each stage with time.monotonic():
+
+    mic frame captured -> frame sent -> first input transcription
+    -> first answer audio received -> first sample pushed to mini.media
+
+plus tool call start/finish. Stamps are folded into the current Turn; a turn
+closes on the server's turn_complete. The headline number is end_to_end:
+from the child's last voiced mic frame to BAY-min's first pushed sample.
+Percentiles per stage are printed at session end and written to a JSON
+metrics file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from log_config import get_logger
+
+
+logger = get_logger("latency")
+
+LATENCY_METRICS_FILE = Path(os.getenv("BAYMIN_LATENCY_METRICS", "latency_metrics.json"))
+VOICED_RMS = 500                  # PCM16 frame RMS above this counts as speech
+
+# Histogram bucket upper bounds (seconds), roughly log-spaced.
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles resolve to a bucket upper bound."""
+    buckets: tuple[float, ...] = LATENCY_BUCKETS_S   # ascending upper bounds, ending in math.inf
+    counts: list[int] = field(default_factory=list)
+    total_s: float = 0.0
+    max_s: float = 0.0
+    n: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.buckets or not math.isinf(self.buckets[-1]):
+            self.buckets = (*self.buckets, math.inf)
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.n += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_s)
+        return self.max_s
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "mean_ms": round(self.total_s / self.n * 1000, 1) if self.n else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p90_ms": round(self.percentile(0.9) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max_s * 1000, 1),
+        }
+
+
+def is_voiced(frame: bytes) -> bool:
+    pcm = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return bool(pcm.size) and float(np.sqrt(np.mean(pcm * pcm))) > VOICED_RMS
+
+
+@dataclass
+class Turn:
+    index: int
+    speech_end_captured: float | None = None   # last voiced mic frame before the answer
+    speech_end_sent: float | None = None       # ...and when that frame left for the server
+    first_transcription: float | None = None
+    first_audio_received: float | None = None
+    first_sample_pushed: float | None = None
+    completed: float | None = None
+    tools: list[tuple[str, float, float]] = field(default_factory=list)
+
+    def spans(self) -> dict[str, float]:
+        """Stage durations in seconds (only the ones this turn has both ends for)."""
+        pairs = {
+            "uplink": (self.speech_end_captured, self.speech_end_sent),
+            "server": (self.speech_end_sent, self.first_audio_received),
+            "transcription": (self.speech_end_sent, self.first_transcription),
+            "playback_start": (self.first_audio_received, self.first_sample_pushed),
+            "end_to_end": (self.speech_end_captured, self.first_sample_pushed),
+        }
+        out = {name: b - a for name, (a, b) in pairs.items() if a is not None and b is not None and b >= a}
+        for name, start, end in self.tools:
+            out[f"tool:{name}"] = end - start
+        return out
+
+
+class LatencyTracer:
+    """Collects stage stamps from the audio loops and turns them into per-turn spans."""
+
+    def __init__(self, trace=None, metrics_file: Path = LATENCY_METRICS_FILE) -> None:
+        self._trace = trace            # TraceWriter | None — gets one "turn" record per turn
+        self._metrics_file = metrics_file
+        self._turn = Turn(index=1)
+        self._turns = 0
+        self._speech_end_frame: bytes | None = None
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.session_histograms: dict[str, LatencyHistogram] = {}
+
+    def start_session(self) -> None:
+        self.session_histograms = {}
+        self._turn = Turn(index=self._turns + 1)
+        self._speech_end_frame = None
+
+    # --- Stage stamps (event loop only; all O(1)) ---
+
+    def mic_captured(self, frame: bytes) -> None:
+        """Called per 20 ms frame as it is queued; voiced frames move the turn's speech end."""
+        if self._turn.first_audio_received is None and is_voiced(frame):
+            self._turn.speech_end_captured = time.monotonic()
+            self._turn.speech_end_sent = None
+            self._speech_end_frame = frame
+
+    def mic_sent(self, frame: bytes) -> None:
+        # The same bytes object travels through mic_queue, so identity pairs capture and send.
+        if frame is self._speech_end_frame:
+            self._turn.speech_end_sent = time.monotonic()
+            self._speech_end_frame = None
+
+    def transcription(self) -> None:
+        if self._turn.first_transcription is None:
+            self._turn.first_transcription = time.monotonic()
+
+    def audio_received(self) -> None:
+        if self._turn.first_audio_received is None:
+            self._turn.first_audio_received = time.monotonic()
+
+    def sample_pushed(self) -> None:
+        if self._turn.first_sample_pushed is None and self._turn.first_audio_received is not None:
+            self._turn.first_sample_pushed = time.monotonic()
+
+    def tool_finished(self, name: str, seconds: float) -> None:
+        end = time.monotonic()
+        self._turn.tools.append((name, end - seconds, end))
+
+    def turn_complete(self) -> None:
+        turn = self._turn
+        turn.completed = time.monotonic()
+        self._turns += 1
+        self._turn = Turn(index=self._turns + 1)
+        self._speech_end_frame = None
+        spans = turn.spans()
+        for name, seconds in spans.items():
+            self.histograms.setdefault(name, LatencyHistogram()).record(seconds)
+            self.session_histograms.setdefault(name, LatencyHistogram()).record(seconds)
+        if self._trace is not None and spans:
+            self._trace.emit("turn", index=turn.index, **{k: round(v * 1000, 1) for k, v in spans.items()})
+
+    # --- Reporting ---
+
+    def summary(self, histograms: dict[str, LatencyHistogram] | None = None) -> str:
+        histograms = self.session_histograms if histograms is None else histograms
+        lines = []
+        for name, h in sorted(histograms.items()):
+            d = h.to_dict()
+            lines.append(
+                f"{name:<26} n={d['n']:<4} p50={d['p50_ms']:>7.0f}ms p90={d['p90_ms']:>7.0f}ms "
+                f"p99={d['p99_ms']:>7.0f}ms max={d['max_ms']:>7.0f}ms"
+            )
+        return "\n".join(lines)
+
+    def write_metrics(self) -> None:
+        """Write cumulative percentiles as JSON (blocking — call from a thread)."""
+        data = {
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "turns": self._turns,
+            "stages": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+        }
+        tmp = self._metrics_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, self._metrics_file)
+
+    async def report_session(self) -> None:
+        summary = self.summary()
+        if summary:
+            logger.info("Session latency:\n%s", summary)
+        try:
+            await asyncio.to_thread(self.write_metrics)
+        except OSError as e:
+            logger.warning("Could not write %s: %s", self._metrics_file, e)
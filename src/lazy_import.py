@@ -0,0 +1,78 @@
+"""
+lazy_import.py — defer heavy optional imports until first use.
+
+    cv2 = lazy_import("cv2")          # nothing is imported yet
+    cv2.resize(...)                   # first attribute access imports OpenCV
+
+Only for subsystems a boot may not touch or can load off the critical path
+(OpenCV for vision, scipy.signal for resampling). Importing main therefore
+stays cheap; main.run() calls preload() as a startup step so the real imports
+happen in a worker thread, concurrently with the robot connection, instead
+of on the event loop at the first frame. import_profile.py measures the
+result and benchmarks/bench_startup.py holds it to a budget.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+import types
+
+from log_config import get_logger
+
+
+logger = get_logger("imports")
+
+_LAZY: dict[str, LazyModule] = {}
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in module that imports the real one (once, thread-safely) on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    # Method names are prefixed so they can't shadow attributes of the real module.
+    def _lazy_load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+        with self.__dict__["_lazy_lock"]:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                t0 = time.perf_counter()
+                module = importlib.import_module(self.__name__)
+                self.__dict__["_lazy_module"] = module
+                logger.debug(
+                    "Imported %s in %.0f ms (%s)",
+                    self.__name__, (time.perf_counter() - t0) * 1000, threading.current_thread().name,
+                )
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._lazy_load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self.__name__!r} ({'loaded' if is_loaded(self) else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Shared LazyModule for `name` (the same object for every importer)."""
+    module = _LAZY.get(name)
+    if module is None:
+        module = _LAZY[name] = LazyModule(name)
+    return module
+
+
+def is_loaded(module: LazyModule) -> bool:
+    return module.__dict__["_lazy_module"] is not None
+
+
+def preload() -> list[str]:
+    """Import every lazy module registered so far (blocking — run in a thread); returns their names."""
+    for module in list(_LAZY.values()):
+        module._lazy_load()
+    return sorted(_LAZY)
@@ -0,0 +1,149 @@
+"""
+log_config.py — structured, rate-limited logging off the event loop.
+
+Every subsystem logs through get_logger("<subsystem>") (a "baymin.<subsystem>"
+logger). setup_logging() puts a single QueueHandler on the root logger; a
+QueueListener thread does the formatting and the actual stdout/journal
+writes, so a slow console never stalls the loop. A RateLimitFilter on the
+QueueHandler drops repeats of the same message template beyond a burst per
+window and reports how many were suppressed.
+
+    BAYMIN_LOG_LEVEL=INFO                       default level
+    BAYMIN_LOG_LEVELS=live=DEBUG,tools=WARNING  per-subsystem (or full logger name) levels
+    BAYMIN_LOG_FORMAT=json                      one JSON object per line instead of text
+
+Hot paths log with %-style arguments at DEBUG (transcript fragments, tool
+payloads), so with DEBUG off a call is one cached isEnabledFor() check.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+
+LOG_LEVEL = os.getenv("BAYMIN_LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("BAYMIN_LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("BAYMIN_LOG_FORMAT", "text").lower()
+LOG_RATE_BURST = 5                # identical messages allowed per window...
+LOG_RATE_WINDOW_S = 10.0          # ...before the rest of the window is suppressed
+
+# Third-party loggers that are noisy at INFO.
+_QUIET_LOGGERS = {"bless": logging.WARNING, "httpx": logging.WARNING, "websockets": logging.WARNING}
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "suppressed"}
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    return logging.getLogger(f"baymin.{subsystem}")
+
+
+class RateLimitFilter(logging.Filter):
+    """Allow LOG_RATE_BURST records per (logger, template) per window; count the rest."""
+
+    def __init__(self, burst: int = LOG_RATE_BURST, window_s: float = LOG_RATE_WINDOW_S) -> None:
+        super().__init__()
+        self._burst = burst
+        self._window = window_s
+        self._state: dict[tuple[str, object], list] = {}   # key -> [window_start, seen, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        state = self._state.get(key)
+        if state is None or now - state[0] >= self._window:
+            suppressed = state[2] if state is not None else 0
+            self._state[key] = [now, 1, 0]
+            if len(self._state) > 4096:
+                self._state = {k: v for k, v in self._state.items() if now - v[0] < self._window}
+            record.suppressed = suppressed
+            return True
+        state[1] += 1
+        if state[1] > self._burst:
+            state[2] += 1
+            return False
+        record.suppressed = 0
+        return True
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """In-process queue: hand the record over as is, formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """`12:00:01.234 I [live] message (key=value ...)` — the subsystem replaces the old [tag] prefix."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        name = record.name.removeprefix("baymin.")
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}"
+        line = f"{stamp} {record.levelname[0]} [{name}] {record.getMessage()}"
+        extras = {k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS}
+        if extras:
+            line += " (" + " ".join(f"{k}={v}" for k, v in extras.items()) + ")"
+        if getattr(record, "suppressed", 0):
+            line += f" [{record.suppressed} similar suppressed]"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "t": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        out.update({k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS})
+        if getattr(record, "suppressed", 0):
+            out["suppressed"] = record.suppressed
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+def _parse_levels(spec: str) -> dict[str, int]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        level_no = logging.getLevelName(level.strip().upper())
+        if not isinstance(level_no, int):
+            raise ValueError(f"BAYMIN_LOG_LEVELS: unknown level in {item!r}")
+        name = name.strip()
+        levels[name if "." in name or name in _QUIET_LOGGERS else f"baymin.{name}"] = level_no
+    return levels
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """Install the queue handler on the root logger and start the writer thread."""
+    sink = logging.StreamHandler(stream or sys.stdout)
+    sink.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _LocalQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name, lvl in {**_QUIET_LOGGERS, **_parse_levels(levels)}.items():
+        logging.getLogger(name).setLevel(lvl)
+
+    listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=True)
+    listener.start()
+    return listener
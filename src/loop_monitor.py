@@ -0,0 +1,169 @@
+"""
+loop_monitor.py — event-loop lag measurement with blocking-call attribution.
+
+A coroutine wakes every LOOP_MONITOR_INTERVAL_S and records how late it was
+(scheduling lag). A daemon watchdog thread watches the same heartbeat; when
+the loop has not come back for LOOP_STALL_THRESHOLD_S it grabs the loop
+thread's stack with sys._current_frames() — the blocking call is whatever is
+on top — and the stall is charged to the innermost frame in our own source.
+At session end the lag percentiles and the worst offenders are printed.
+
+Costs: one timer wake-up per interval on the loop and one short sleep loop in
+the watchdog; stacks are only captured while the loop is actually stalled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from latency import LatencyHistogram
+from log_config import get_logger
+
+
+logger = get_logger("loop")
+
+LOOP_MONITOR_INTERVAL_S = 0.05
+LOOP_STALL_THRESHOLD_S = 0.08     # ~4 mic frames: the point where audio starts to stutter
+LOOP_WATCHDOG_POLL_S = 0.02
+LOOP_STACK_DEPTH = 8              # frames kept per offender for the report
+LOOP_TOP_OFFENDERS = 5
+
+_SRC_DIR = Path(__file__).resolve().parent
+
+
+@dataclass
+class Offender:
+    where: str                    # "file.py:123 in function"
+    stack: list[str]
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+
+@dataclass
+class LoopStats:
+    lag: LatencyHistogram = field(default_factory=LatencyHistogram)
+    stalls: int = 0
+    offenders: dict[str, Offender] = field(default_factory=dict)
+
+
+def _blame(frames: list[traceback.FrameSummary]) -> str:
+    """Innermost frame from our own modules (the caller of the blocking library code)."""
+    for fs in reversed(frames):
+        if Path(fs.filename).resolve().parent == _SRC_DIR and Path(fs.filename).name != "loop_monitor.py":
+            return f"{Path(fs.filename).name}:{fs.lineno} in {fs.name}"
+    fs = frames[-1]
+    return f"{Path(fs.filename).name}:{fs.lineno} in {fs.name}"
+
+
+class LoopMonitor:
+    """Measures scheduling lag and attributes stalls to the code that blocked the loop."""
+
+    def __init__(
+        self,
+        interval_s: float = LOOP_MONITOR_INTERVAL_S,
+        threshold_s: float = LOOP_STALL_THRESHOLD_S,
+        trace=None,
+    ) -> None:
+        self._interval = interval_s
+        self._threshold = threshold_s
+        self._trace = trace               # TraceWriter | None — gets one "loop_stall" record per stall
+        self._beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._captured: tuple[str, list[str]] | None = None   # stack of the stall in progress
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+        self.total = LoopStats()
+        self.session = LoopStats()
+
+    def start_session(self) -> None:
+        self.session = LoopStats()
+
+    async def run(self) -> None:
+        """Heartbeat coroutine; starts the watchdog thread on first run."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        if self._watchdog is None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop_watchdog", daemon=True)
+            self._watchdog.start()
+        try:
+            while True:
+                expected = time.monotonic() + self._interval
+                await asyncio.sleep(self._interval)
+                now = time.monotonic()
+                self._beat = now
+                self._record(max(0.0, now - expected))
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def _record(self, lag: float) -> None:
+        for stats in (self.total, self.session):
+            stats.lag.record(lag)
+        captured, self._captured = self._captured, None
+        if lag < self._threshold:
+            return
+        where, stack = captured if captured is not None else ("(not captured)", [])
+        for stats in (self.total, self.session):
+            stats.stalls += 1
+            off = stats.offenders.get(where)
+            if off is None:
+                off = stats.offenders[where] = Offender(where, stack)
+            off.count += 1
+            off.total_s += lag
+            off.max_s = max(off.max_s, lag)
+        if self._trace is not None:
+            self._trace.emit("loop_stall", ms=round(lag * 1000, 1), where=where)
+
+    # --- Watchdog thread ---
+
+    def _watch(self) -> None:
+        while not self._stop.wait(LOOP_WATCHDOG_POLL_S):
+            if self._captured is not None or self._loop_thread_id is None:
+                continue
+            if time.monotonic() - self._beat - self._interval < self._threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            frames = traceback.extract_stack(frame)
+            del frame
+            if not frames or frames[-1].name == "select":
+                continue  # the loop is idle in its selector, not blocked (e.g. suspended process)
+            self._captured = (_blame(frames), [
+                f"{Path(fs.filename).name}:{fs.lineno} {fs.name}: {fs.line or ''}".rstrip()
+                for fs in frames[-LOOP_STACK_DEPTH:]
+            ])
+
+    # --- Reporting ---
+
+    def summary(self, stats: LoopStats | None = None) -> str:
+        stats = self.session if stats is None else stats
+        lag = stats.lag
+        lines = [
+            f"lag p50={lag.percentile(0.5) * 1000:.0f}ms p99={lag.percentile(0.99) * 1000:.0f}ms "
+            f"max={lag.max_s * 1000:.0f}ms over {lag.n} ticks; "
+            f"{stats.stalls} stall(s) > {self._threshold * 1000:.0f}ms"
+        ]
+        worst = sorted(stats.offenders.values(), key=lambda o: -o.total_s)[:LOOP_TOP_OFFENDERS]
+        for off in worst:
+            lines.append(
+                f"  {off.where}: {off.count}x, total {off.total_s * 1000:.0f}ms, max {off.max_s * 1000:.0f}ms"
+            )
+            lines += [f"      {line}" for line in off.stack[-3:]]
+        return "\n".join(lines)
+
+    def report_session(self) -> None:
+        logger.info("Session event-loop health: %s", self.summary())
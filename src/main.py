@@ -1,149 +1,342 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from contextlib import suppress
 
-from vision import ReachyVision
+from vision import ReachyVision, load_worksheet_recognizer
+from face_tracker import FaceTracker
+from doa import DoAService
 
 from google import genai
 from google.oauth2 import service_account
 from reachy_mini import ReachyMini
-from reachy_mini.motion.recorded_move import RecordedMoves
 
 from audio_adapters import capture_mic_loop, play_speaker_loop, AudioControl
 from bluetooth_helper import start_ble_server_async, ModuleControl
 from firebase_helper import FirebaseHelper
-from gemini_live import receive_loop, send_mic_loop, send_flow_context, MODEL, build_live_config
-from motion import motion_worker_loop, MOTION_QUEUE_MAX
+from gemini_live import receive_loop, send_mic_loop, MODEL, build_live_config
+from session_manager import LiveSessionManager
+from session_summary import SessionSummary
+from trace_writer import TraceWriter
+from latency import LatencyTracer
+from loop_monitor import LoopMonitor
+from metrics import (
+    BLE_DISCONNECT_TEARDOWN_SECONDS, MIC_QUEUE_DEPTH, MOTION_QUEUE_DEPTH, SESSION_ACTIVE, SESSION_SECONDS, SESSIONS, SPEAKER_QUEUE_DEPTH,
+    MetricsServer,
+)
+from emotion_library import EmotionLibrary
+from startup import Startup
+from lazy_import import preload as preload_lazy_imports
+from motion import motion_worker_loop, MotionPlanner, ALL_EMOTION_NAMES
+from motion_executor import MotionExecutor
+from speech_animation import SpeechAnimator
+from log_config import get_logger, setup_logging
 
 
+logger = get_logger("state")
+
 SPEAKER_QUEUE_MAX = 60
 EMOTION_DATASET = "pollen-robotics/reachy-mini-emotions-library"
 MIC_QUEUE_MAX = 8
 
 
-async def run() -> None:
-    firebase = FirebaseHelper()
-    firebase.set_loop(asyncio.get_running_loop())
-    
+async def run(
+    mini=None,
+    client=None,
+    firebase: FirebaseHelper | None = None,
+    connect_ble=start_ble_server_async,
+    emotions=None,
+    trace: TraceWriter | None = None,
+    tracer: LatencyTracer | None = None,
+) -> None:
+    """
+    The State 1–3 loop. Every external dependency can be injected: the replay
+    harness (fakes.py / replay_bench.py) passes a fake ReachyMini, a scripted
+    Live client, an in-memory Firestore-backed FirebaseHelper and a scripted
+    BLE connect so the whole pipeline runs headless, and keeps the trace
+    writer / latency tracer to read the results. Anything left as None is
+    built for the real robot.
+    """
+    import os
+    USE_SIM = os.getenv("USE_SIM", "false").lower() == "true"
+    # Closed-loop gaze: the motion worker keeps the head pointed at the student's face when idle.
+    FACE_GAZE_FOLLOW = os.getenv("FACE_GAZE_FOLLOW", "false").lower() == "true"
+    # Run JPEG encoding / face detection in a separate process fed through shared memory.
+    VISION_WORKER_PROCESS = os.getenv("VISION_WORKER_PROCESS", "false").lower() == "true"
+    # Turn toward the student's voice (ReSpeaker direction of arrival) without asking the model.
+    DOA_ORIENT = os.getenv("DOA_ORIENT", "false").lower() == "true"
+    # Measure event-loop lag and capture the stack of anything that blocks it.
+    LOOP_MONITOR = os.getenv("LOOP_MONITOR", "true").lower() == "true"
+    # Prometheus-style /metrics endpoint on localhost plus a rolling snapshot file.
+    METRICS_ENABLED = os.getenv("METRICS", "true").lower() == "true"
+    # Also take module selection / volume / mute from a watch on the user's Firestore profile.
+    FIRESTORE_WATCH = os.getenv("FIRESTORE_WATCH", "true").lower() == "true"
+
+    if trace is None:
+        trace = TraceWriter()
+
+    # Every independent initialisation starts now, concurrently; each state
+    # awaits only the components it uses (see startup.py).
+    startup = Startup(trace)
+    if firebase is None:
+        startup.start("firebase", FirebaseHelper)
+    else:
+        startup.provide("firebase", firebase)
+    if client is None:
+        startup.start("vertex_client", _vertex_client)
+    else:
+        startup.provide("vertex_client", client)
+    if mini is None:
+        startup.start("reachy_mini", _connect_reachy_mini, USE_SIM)
+    else:
+        startup.provide("reachy_mini", mini)
+    # Decode every emotion up front (from the local cache after the first boot)
+    # so the first play_emotion of each name starts instantly.
+    if emotions is None:
+        emotions = EmotionLibrary(EMOTION_DATASET, ALL_EMOTION_NAMES)
+    startup.start("emotions", emotions.load)
+    startup.start("worksheet_model", load_worksheet_recognizer)
+    startup.start("deferred_imports", preload_lazy_imports)   # OpenCV, scipy.signal (lazy_import.py)
+    startup.report_when_ready()
+
+    # State 1 advertises straight away; the BLE server only needs the robot
+    # once the app has sent READY.
+    ble_connect = asyncio.create_task(connect_ble(startup.task("reachy_mini")), name="ble_connect")
+    startup.mark("ble_advertising")
+    try:
+        mini = await startup.get("reachy_mini")
+    except BaseException:
+        ble_connect.cancel()
+        startup.cancel()
+        raise
+    live_sessions = None
+
+    with mini:
+        vision = ReachyVision(mini, use_worker_process=VISION_WORKER_PROCESS)
+        face_tracker = FaceTracker(vision)
+        motion_executor = MotionExecutor(mini)
+        speech_animator = SpeechAnimator(motion_executor)
+        doa = DoAService(mini, motion_executor, speech_animator) if DOA_ORIENT else None
+        trace_task = asyncio.create_task(trace.run(), name="trace_writer")
+        if tracer is None:
+            tracer = LatencyTracer(trace)
+        loop_monitor = LoopMonitor(trace=trace) if LOOP_MONITOR else None
+        monitor_task = asyncio.create_task(loop_monitor.run(), name="loop_monitor") if loop_monitor else None
+        metrics_task = asyncio.create_task(MetricsServer().run(), name="metrics") if METRICS_ENABLED else None
+
+        try:
+            while True:
+                # ── STATE 1: Wait for Bluetooth connection ──────────────────────
+                if ble_connect is not None:
+                    connecting, ble_connect = ble_connect, None
+                else:
+                    connecting = connect_ble(mini)
+                uid, disconnected_event, audio_control, module_control = await connecting
+                # uid = "BEYAvvfuXVZYo4lLPE5KFKLakId2"
+                # audio_control = AudioControl()
+                # loop = asyncio.get_running_loop()
+                # module_control = ModuleControl(loop)
+                # disconnected_event = asyncio.Event()
+                # module_control.module_id = "math_grade1_addition_subtraction"
+                firebase = await startup.get("firebase")
+                firebase.set_loop(asyncio.get_running_loop())
+                firebase.set_user(uid)
+                if FIRESTORE_WATCH:
+                    firebase.watch_profile(module_control, audio_control)
+                # Open and configure the Live session while the child is still picking a module.
+                if live_sessions is None:
+                    live_sessions = LiveSessionManager(await startup.get("vertex_client"), MODEL, build_live_config)
+                live_sessions.start_warming()
+
+                while True:
+                    # ── STATE 2: Wait for module selection ──────────────────────
+                    if not module_control.module_id:
+                        logger.info("State 2: Waiting for module selection...")
+                        _, pending = await asyncio.wait(
+                            {
+                                asyncio.create_task(module_control.module_selected_event.wait(), name="module"),
+                                asyncio.create_task(disconnected_event.wait(), name="disconnect"),
+                            },
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        for t in pending:
+                            t.cancel()
+                            with suppress(asyncio.CancelledError):
+                                await t
+
+                        if disconnected_event.is_set():
+                            firebase.reset()
+                            await live_sessions.stop_warming()
+                            break  # → State 1
+
+                    module_selected_at = asyncio.get_running_loop().time()
+                    # Sync module_id onto firebase so log_message / get_lesson_data work,
+                    # and start prefetching the module's guided questions.
+                    firebase.set_module(module_control.module_id)
+                    # Optional steps: a failure degrades (fewer emotions, imports on
+                    # first use, no local OCR) instead of ending the run.
+                    await startup.get_optional("emotions")
+                    await startup.get_optional("deferred_imports")
+                    vision.recognizer = await startup.get_optional("worksheet_model")
+
+                    # ── STATE 3: Module active — run Gemini loops ───────────────
+                    logger.info("State 3: Module '%s' active.", firebase.module_id)
+                    mini.media.start_recording()
+                    mini.media.start_playing()
+
+                    lesson_data = await asyncio.to_thread(firebase.get_lesson_data)
+                    summary = SessionSummary(lesson_data)
+                    trace.start_session(user=uid, module=firebase.module_id)
+                    tracer.start_session()
+                    if loop_monitor is not None:
+                        loop_monitor.start_session()
+
+                    async with live_sessions.session(
+                        lesson_data, selected_at=module_selected_at, summary=summary,
+                    ) as session:
+                        mic_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=MIC_QUEUE_MAX)
+                        speaker_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SPEAKER_QUEUE_MAX)
+                        interrupted_event = asyncio.Event()
+                        motion_planner = MotionPlanner()
+                        MIC_QUEUE_DEPTH.set_function(mic_queue.qsize)
+                        SPEAKER_QUEUE_DEPTH.set_function(speaker_queue.qsize)
+                        MOTION_QUEUE_DEPTH.set_function(motion_planner.qsize)
+                        SESSION_ACTIVE.set(1)
+                        session_started = asyncio.get_running_loop().time()
+
+                        tasks = [
+                            asyncio.create_task(capture_mic_loop(mini, mic_queue, audio_control, tracer), name="capture_mic"),
+                            asyncio.create_task(send_mic_loop(session, mic_queue, tracer), name="send_mic"),
+                            asyncio.create_task(
+                                play_speaker_loop(
+                                    mini, speaker_queue, interrupted_event, audio_control,
+                                    animator=speech_animator, tracer=tracer,
+                                ),
+                                name="play_speaker",
+                            ),
+                            asyncio.create_task(
+                                motion_worker_loop(
+                                    mini, motion_executor, motion_planner, interrupted_event, emotions,
+                                    face_tracker=face_tracker if FACE_GAZE_FOLLOW else None,
+                                ),
+                                name="motion_worker",
+                            ),
+                            asyncio.create_task(motion_executor.run(), name="motion_executor"),
+                            asyncio.create_task(speech_animator.run(), name="speech_animator"),
+                            asyncio.create_task(vision.capture_loop(), name="capture_vision"),
+                            asyncio.create_task(face_tracker.track_loop(), name="face_tracker"),
+                        ]
+                        if DOA_ORIENT:
+                            # Nothing else reads the bearing; don't poll the mic array for nothing.
+                            tasks.append(asyncio.create_task(doa.run(motion_planner), name="doa"))
+                        try:
+                            outcome = await receive_loop(
+                                session, speaker_queue, interrupted_event, mini, firebase,
+                                motion_planner,
+                                disconnected_event, module_control.module_exited_event,
+                                vision=vision,
+                                face_tracker=face_tracker,
+                                on_first_audio=live_sessions.report_first_audio,
+                                summary=summary,
+                                trace=trace,
+                                tracer=tracer,
+                            )
+                        finally:
+                            for task in tasks:
+                                task.cancel()
+                            for task in tasks:
+                                with suppress(asyncio.CancelledError):
+                                    await task
+                            mini.media.stop_recording()
+                            mini.media.stop_playing()
+                            for gauge in (MIC_QUEUE_DEPTH, SPEAKER_QUEUE_DEPTH, MOTION_QUEUE_DEPTH):
+                                gauge.set_function(None)
+                            SESSION_ACTIVE.set(0)
+                            SESSION_SECONDS.observe(asyncio.get_running_loop().time() - session_started)
+
+                    logger.info("Session ended: %s", outcome)
+                    if outcome == "disconnected" and getattr(disconnected_event, "detected_at", None) is not None:
+                        teardown_s = time.monotonic() - disconnected_event.detected_at
+                        BLE_DISCONNECT_TEARDOWN_SECONDS.labels(disconnected_event.source).observe(teardown_s)
+                        trace.emit("ble_disconnect", source=disconnected_event.source, teardown_ms=round(teardown_s * 1000, 1))
+                        logger.info("Disconnect (%s) to session teardown: %.0f ms", disconnected_event.source, teardown_s * 1000)
+                    SESSIONS.labels(outcome).inc()
+                    await tracer.report_session()
+                    if loop_monitor is not None:
+                        loop_monitor.report_session()
+
+                    if outcome == "disconnected":
+                        firebase.reset()
+                        break  # → State 1
+
+                    live_sessions.start_warming()
+
+                    # "module_exited" or "ended" → back to State 2, unless another
+                    # module was selected meanwhile (then straight into State 3 with it).
+                    ended_module = firebase.module_id
+                    firebase.clear_module()
+                    if module_control.module_id == ended_module:
+                        module_control.module_id = None
+                        module_control.module_selected_event.clear()
+                    module_control.module_exited_event.clear()
+
+        finally:
+            if metrics_task is not None:
+                metrics_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await metrics_task
+            if monitor_task is not None:
+                monitor_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await monitor_task
+            if ble_connect is not None:
+                ble_connect.cancel()
+            startup.cancel()
+            trace_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await trace_task
+            await trace.close()
+            if live_sessions is not None:
+                await live_sessions.close()
+            vision.close()
+            if firebase is not None:
+                firebase.close()
+
+
+def _vertex_client() -> genai.Client:
     creds = service_account.Credentials.from_service_account_file(
         "credentials.json",
         scopes=["https://www.googleapis.com/auth/cloud-platform"],
     )
-    client = genai.Client(
+    return genai.Client(
         credentials=creds,
         project=creds.project_id,
         location="us-central1",
         vertexai=True,
     )
 
-    import os
-    USE_SIM = os.getenv("USE_SIM", "false").lower() == "true"
 
-    if USE_SIM:
-        mini = ReachyMini(
+def _connect_reachy_mini(use_sim: bool) -> ReachyMini:
+    if use_sim:
+        return ReachyMini(
             connection_mode="localhost_only",
             spawn_daemon=True,
             use_sim=True,
         )
-    else:
-        mini = ReachyMini(
-            connection_mode="auto",
-            spawn_daemon=False,
-            use_sim=False,
-        )
-
-    with mini:
-        emotions = RecordedMoves(EMOTION_DATASET)
-        vision = ReachyVision(mini)
-
-        while True:
-            # ── STATE 1: Wait for Bluetooth connection ──────────────────────
-            uid, disconnected_event, audio_control, module_control = await start_ble_server_async(mini)
-            # uid = "BEYAvvfuXVZYo4lLPE5KFKLakId2"
-            # audio_control = AudioControl()
-            # loop = asyncio.get_running_loop()
-            # module_control = ModuleControl(loop)
-            # disconnected_event = asyncio.Event()
-            # module_control.module_id = "math_grade1_addition_subtraction"
-            firebase.set_user(uid)
-
-            while True:
-                # ── STATE 2: Wait for module selection ──────────────────────
-                if not module_control.module_id:
-                    print("[state] State 2: Waiting for module selection...")
-                    _, pending = await asyncio.wait(
-                        {
-                            asyncio.create_task(module_control.module_selected_event.wait(), name="module"),
-                            asyncio.create_task(disconnected_event.wait(), name="disconnect"),
-                        },
-                        return_when=asyncio.FIRST_COMPLETED,
-                    )
-                    for t in pending:
-                        t.cancel()
-                        with suppress(asyncio.CancelledError):
-                            await t
-
-                    if disconnected_event.is_set():
-                        firebase.reset()
-                        break  # → State 1
-
-                # Sync module_id onto firebase so log_message / get_lesson_data work
-                firebase.module_id = module_control.module_id
-
-                # ── STATE 3: Module active — run Gemini loops ───────────────
-                print(f"[state] State 3: Module '{firebase.module_id}' active.")
-                mini.media.start_recording()
-                mini.media.start_playing()
-
-                lesson_data = firebase.get_lesson_data()
-                live_config = build_live_config()
-
-                async with client.aio.live.connect(model=MODEL, config=live_config) as session:
-                    await send_flow_context(session, lesson_data)
-                    mic_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=MIC_QUEUE_MAX)
-                    speaker_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SPEAKER_QUEUE_MAX)
-                    interrupted_event = asyncio.Event()
-                    motion_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=MOTION_QUEUE_MAX)
-
-                    tasks = [
-                        asyncio.create_task(capture_mic_loop(mini, mic_queue, audio_control), name="capture_mic"),
-                        asyncio.create_task(send_mic_loop(session, mic_queue), name="send_mic"),
-                        asyncio.create_task(play_speaker_loop(mini, speaker_queue, interrupted_event, audio_control), name="play_speaker"),
-                        asyncio.create_task(motion_worker_loop(mini, motion_queue, interrupted_event, emotions), name="motion_worker"),
-                        asyncio.create_task(vision.capture_loop(), name="capture_vision"),
-                    ]
-                    try:
-                        outcome = await receive_loop(
-                            session, speaker_queue, interrupted_event, mini, firebase,
-                            motion_queue,
-                            disconnected_event, module_control.module_exited_event,
-                            vision=vision,
-                        )
-                    finally:
-                        for task in tasks:
-                            task.cancel()
-                        for task in tasks:
-                            with suppress(asyncio.CancelledError):
-                                await task
-                        mini.media.stop_recording()
-                        mini.media.stop_playing()
-
-                print(f"[state] Session ended: {outcome}")
-
-                if outcome == "disconnected":
-                    firebase.reset()
-                    break  # → State 1
-
-                # "module_exited" or "ended" → back to State 2
-                firebase.module_id = None
-                module_control.module_id = None
-                module_control.module_selected_event.clear()
-                module_control.module_exited_event.clear()
+    return ReachyMini(
+        connection_mode="auto",
+        spawn_daemon=False,
+        use_sim=False,
+    )
 
 
 def main() -> None:
-    asyncio.run(run())
+    listener = setup_logging()
+    try:
+        asyncio.run(run())
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+"""
+metrics.py — Prometheus-style counters, gauges and histograms for fleet monitoring.
+
+Instrumented code updates module-level metrics from METRICS; updating one is
+an attribute add (no locks, no formatting), so it is safe on the per-frame
+audio paths. Queue depths are callback gauges read only when scraped.
+
+MetricsServer exposes METRICS.render() (Prometheus text format) on
+http://127.0.0.1:BAYMIN_METRICS_PORT/metrics and appends a JSON snapshot to
+BAYMIN_METRICS_FILE every BAYMIN_METRICS_FILE_INTERVAL_S, rotating it by size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import socket
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Callable
+
+from latency import LATENCY_BUCKETS_S, LatencyHistogram
+from log_config import get_logger
+
+
+logger = get_logger("metrics")
+
+METRICS_HOST = os.getenv("BAYMIN_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("BAYMIN_METRICS_PORT", "9464"))
+METRICS_FILE = Path(os.getenv("BAYMIN_METRICS_FILE", "metrics/metrics.jsonl"))
+METRICS_FILE_INTERVAL_S = float(os.getenv("BAYMIN_METRICS_FILE_INTERVAL_S", "60"))
+METRICS_FILE_MAX_BYTES = 4 * 1024 * 1024
+METRICS_FILE_KEEP = 5
+# Module sessions last minutes: 30 s, 1, 2, 5, 10, 20, 30 and 60 min (+Inf is added).
+SESSION_BUCKETS_S = (30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+
+def _label_str(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], _Metric] = {}
+
+    def labels(self, *values: str):
+        """Child metric for one label combination (cached — keep a reference on hot paths)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> _Metric:
+        return type(self)(self.name, self.help)
+
+    def _series(self):
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def inc(self, n: float = 1.0) -> None:
+        self.value += n
+
+    def samples(self):
+        for values, child in self._series():
+            yield self.name + "_total", _label_str(self.labelnames, values), child.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, fn: Callable[[], float] | None) -> None:
+        """Read the value from `fn` at scrape time (None reverts to the last set() value)."""
+        self._fn = fn
+
+    def get(self) -> float:
+        if self._fn is not None:
+            with suppress(Exception):
+                return float(self._fn())
+        return self.value
+
+    def samples(self):
+        for values, child in self._series():
+            yield self.name, _label_str(self.labelnames, values), child.get()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS_S,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        self.hist = LatencyHistogram(buckets)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, seconds: float) -> None:
+        self.hist.record(seconds)
+
+    def samples(self):
+        for values, child in self._series():
+            h = child.hist
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                yield self.name + "_bucket", _label_str(self.labelnames, values, f'le="{le}"'), cumulative
+            yield self.name + "_sum", _label_str(self.labelnames, values), h.total_s
+            yield self.name + "_count", _label_str(self.labelnames, values), h.n
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "baymin_") -> None:
+        self._prefix = prefix
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, cls, name: str, help: str, labelnames: tuple[str, ...], **kwargs):
+        full = self._prefix + name
+        metric = self._metrics.get(full)
+        if metric is None:
+            metric = self._metrics[full] = cls(full, help, labelnames, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {full} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS_S,
+    ) -> Histogram:
+        return self._add(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Flat {series: value} dict, for the rolling file."""
+        out = {}
+        for metric in self._metrics.values():
+            for name, labels, value in metric.samples():
+                if not name.endswith("_bucket"):
+                    out[name + labels] = round(value, 6)
+        return out
+
+
+METRICS = MetricsRegistry()
+
+# Audio
+MIC_QUEUE_DEPTH = METRICS.gauge("mic_queue_depth", "Frames waiting in mic_queue")
+SPEAKER_QUEUE_DEPTH = METRICS.gauge("speaker_queue_depth", "Chunks waiting in speaker_queue")
+MOTION_QUEUE_DEPTH = METRICS.gauge("motion_queue_depth", "Commands waiting in the MotionPlanner")
+AUDIO_CHUNKS_DROPPED = METRICS.counter("audio_chunks_dropped", "Chunks dropped by drop_oldest_put_nowait on a full queue")
+# Tools / Firestore
+TOOL_LATENCY_SECONDS = METRICS.histogram("tool_latency_seconds", "Tool call latency", ("tool",))
+TOOL_OUTCOMES = METRICS.counter("tool_calls", "Tool calls by outcome", ("tool", "outcome"))
+FIRESTORE_WRITE_SECONDS = METRICS.histogram("firestore_write_seconds", "Background Firestore write latency")
+FIRESTORE_WRITE_ERRORS = METRICS.counter("firestore_write_errors", "Background Firestore writes that failed")
+# Vision
+FRAMES_CAPTURED = METRICS.counter("frames_captured", "Camera frames grabbed by the capture loop")
+FRAMES_ENCODED = METRICS.counter("frames_encoded", "Frames JPEG-encoded for capture_image")
+# Bluetooth
+BLE_DISCONNECT_TEARDOWN_SECONDS = METRICS.histogram(
+    "ble_disconnect_teardown_seconds", "BLE disconnect detected to module session torn down", ("source",),
+)
+# Startup
+STARTUP_SECONDS = METRICS.gauge("startup_seconds", "Seconds from boot until each startup step finished", ("step",))
+# Sessions
+SESSIONS = METRICS.counter("sessions", "Module sessions by outcome", ("outcome",))
+SESSION_SECONDS = METRICS.histogram("session_duration_seconds", "Module session duration", buckets=SESSION_BUCKETS_S)
+SESSION_ACTIVE = METRICS.gauge("session_active", "1 while a module session is running")
+
+
+class MetricsServer:
+    """Tiny asyncio HTTP endpoint for /metrics plus the rolling snapshot file."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = METRICS,
+        host: str = METRICS_HOST,
+        port: int = METRICS_PORT,
+        path: Path = METRICS_FILE,
+        interval_s: float = METRICS_FILE_INTERVAL_S,
+    ) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._path = Path(path)
+        self._interval = interval_s
+        self._server: asyncio.AbstractServer | None = None
+
+    async def run(self) -> None:
+        try:
+            self._server = await asyncio.start_server(self._handle, self._host, self._port, family=socket.AF_INET)
+            logger.info("Serving http://%s:%d/metrics", self._host, self._port)
+        except OSError as e:
+            logger.warning("HTTP endpoint disabled (%s); still writing %s", e, self._path)
+        try:
+            while True:
+                await asyncio.sleep(self._interval)
+                await self.write_snapshot()
+        finally:
+            if self._server is not None:
+                self._server.close()
+                self._server = None
+
+    async def write_snapshot(self) -> None:
+        line = json.dumps({"t": round(time.time(), 3), **self._registry.snapshot()}, separators=(",", ":"))
+        try:
+            await asyncio.to_thread(self._append, line)
+        except OSError as e:
+            logger.warning("Could not write %s: %s", self._path, e)
+
+    def _append(self, line: str) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        if self._path.exists() and self._path.stat().st_size >= METRICS_FILE_MAX_BYTES:
+            for i in range(METRICS_FILE_KEEP - 1, 0, -1):
+                older = self._path.with_name(f"{self._path.name}.{i}")
+                if older.exists():
+                    older.replace(self._path.with_name(f"{self._path.name}.{i + 1}"))
+            self._path.replace(self._path.with_name(f"{self._path.name}.1"))
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+                status, body = "200 OK", self._registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
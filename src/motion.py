@@ -2,18 +2,32 @@ from __future__ import annotations
 
 import asyncio
 import math
+from collections import deque
 from contextlib import suppress
+from dataclasses import dataclass, replace
 
 from reachy_mini import ReachyMini
-from reachy_mini.utils import create_head_pose
-from reachy_mini.motion.recorded_move import RecordedMoves
+
+from emotion_library import EmotionLibrary
+from face_tracker import FaceTracker, face_offset_to_angles
+from motion_executor import MotionExecutor, PoseTarget
 
 
 # --- Queue & timing ---
 MOTION_QUEUE_MAX = 20
 MOTION_DEFAULT_DURATION = 0.6
 HEAD_MOVE_DURATION_S = 0.35          # fallback; see _head_duration()
-HEAD_CMD_MIN_INTERVAL_S = 0.18
+
+# --- Closed-loop gaze (only when a FaceTracker is passed to the worker) ---
+GAZE_CORRECTION_INTERVAL_S = 0.5     # how often an idle worker re-checks the face
+GAZE_IDLE_AFTER_CMD_S = 3.0          # leave explicit tool motions alone for this long
+GAZE_DEADBAND_DEG = 4.0              # ignore offsets smaller than this
+GAZE_GAIN = 0.6                      # fraction of the measured error corrected per step
+GAZE_MOVE_DURATION_S = 0.4
+
+# --- Low-priority orientation (DoA service) ---
+ORIENT_YIELD_S = 4.0                 # no autonomous turns this soon after an explicit motion
+ORIENT_MIN_DELTA_RAD = 0.15          # skip turns smaller than this
 
 # --- Joint limits ---
 BASE_YAW_STEP_RAD = 0.40
@@ -241,46 +255,151 @@ def _normalize_move_direction_and_scale(
 
 
 # ---------------------------------------------------------------------------
-# Queue helpers (called from Tools)
+# Typed motion commands
+# ---------------------------------------------------------------------------
+
+@dataclass
+class HeadCommand:
+    """Relative head/base nudge (move_head)."""
+    direction: str
+    intensity: str | None = None
+    steps: int | float | None = None
+    cue: str | None = None
+
+
+@dataclass
+class PoseCommand:
+    """Absolute head pose (set_pose). Urgent: preempts a playing emotion."""
+    yaw_deg: float = 0.0
+    pitch_deg: float = 0.0
+    roll_deg: float = 0.0
+    x_mm: float = 0.0
+    y_mm: float = 0.0
+    z_mm: float = 0.0
+    body_yaw_deg: float | None = None
+    duration_s: float = MOTION_DEFAULT_DURATION
+    hold_s: float = 0.0
+    return_mode: str = "auto"
+
+
+@dataclass
+class EmotionCommand:
+    """Recorded emotion animation (play_emotion)."""
+    name: str
+
+
+@dataclass
+class ReturnHomeCommand:
+    """Head and body back to neutral (return_home). Urgent: preempts a playing emotion."""
+
+
+@dataclass
+class OrientCommand:
+    """Turn the body toward a bearing (DoA service). Low priority: yields to every tool motion."""
+    body_yaw: float
+
+
+MotionCommand = HeadCommand | PoseCommand | EmotionCommand | ReturnHomeCommand | OrientCommand
+TargetCommand = HeadCommand | PoseCommand | ReturnHomeCommand
+
+
+class MotionPlanner:
+    """
+    Replaces the FIFO motion queue. Tools submit typed commands; the worker pulls
+    batches. Consecutive head/pose/return_home commands come out as one batch that
+    the worker folds into a single final target, so a burst of tool calls costs a
+    single move. Absolute targets (pose, return_home) supersede every target still
+    waiting and preempt an emotion that is playing.
+
+    Low-priority OrientCommands are only accepted while nothing explicit is
+    queued, running or within ORIENT_YIELD_S of finishing, and any explicit
+    command submitted later discards them.
+    """
+
+    def __init__(self, maxsize: int = MOTION_QUEUE_MAX) -> None:
+        self._pending: deque[MotionCommand] = deque()
+        self._maxsize = maxsize
+        self._wakeup = asyncio.Event()
+        self.preempt_event = asyncio.Event()
+        self.emotion_playing = False
+        self.explicit_active = False         # set by the worker while it executes tool motions
+        self.last_explicit_ts = float("-inf")
+
+    def submit(self, cmd: MotionCommand) -> bool:
+        """Queue a command; returns False if a low-priority command was dropped."""
+        now = asyncio.get_running_loop().time()
+        if isinstance(cmd, OrientCommand):
+            if (
+                self.emotion_playing
+                or self.explicit_active
+                or now - self.last_explicit_ts < ORIENT_YIELD_S
+                or any(not isinstance(c, OrientCommand) for c in self._pending)
+            ):
+                return False
+            self._pending.clear()  # only the newest bearing matters
+            self._pending.append(cmd)
+            self._wakeup.set()
+            return True
+
+        self.last_explicit_ts = now
+        if any(isinstance(c, OrientCommand) for c in self._pending):
+            self._pending = deque(c for c in self._pending if not isinstance(c, OrientCommand))
+        if isinstance(cmd, (PoseCommand, ReturnHomeCommand)):
+            # Everything queued before an explicit pose is stale: earlier targets would be
+            # overwritten anyway and pending emotions would only delay the pose.
+            self._pending.clear()
+            if self.emotion_playing:
+                self.preempt_event.set()
+        elif len(self._pending) >= self._maxsize:
+            self._pending.popleft()
+        self._pending.append(cmd)
+        self._wakeup.set()
+        return True
+
+    async def next_batch(self) -> list[MotionCommand]:
+        """Wait for work; returns [emotion] or a run of consecutive target commands."""
+        await self.wait_pending()
+
+        first = self._pending.popleft()
+        if isinstance(first, (EmotionCommand, OrientCommand)):
+            return [first]
+        batch: list[MotionCommand] = [first]
+        while self._pending and not isinstance(self._pending[0], EmotionCommand):
+            batch.append(self._pending.popleft())
+        return batch
+
+    async def wait_pending(self) -> None:
+        """Return as soon as at least one command is waiting (without taking it)."""
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+    def qsize(self) -> int:
+        return len(self._pending)
+
+    def empty(self) -> bool:
+        return not self._pending
+
+
+# ---------------------------------------------------------------------------
+# Submit helpers (called from Tools)
 # ---------------------------------------------------------------------------
 
 def enqueue_head_command(
-    motion_queue: asyncio.Queue,
+    planner: MotionPlanner,
     direction: str,
     intensity: str | None = None,
     steps: int | float | None = None,
     cue: str | None = None,
 ) -> None:
-    """Drop stale head commands and push the latest one."""
-    buffered: list[dict] = []
-    while True:
-        try:
-            item = motion_queue.get_nowait()
-        except asyncio.QueueEmpty:
-            break
-        else:
-            if isinstance(item, dict):
-                buffered.append(item)
-
-    for item in buffered:
-        if item.get("kind") != "head":
-            motion_queue.put_nowait(item)
-
-    if motion_queue.full():
-        with suppress(asyncio.QueueEmpty):
-            motion_queue.get_nowait()
-
-    motion_queue.put_nowait({
-        "kind": "head",
-        "direction": direction,
-        "intensity": intensity,
-        "steps": steps,
-        "cue": cue,
-    })
+    planner.submit(HeadCommand(direction=direction, intensity=intensity, steps=steps, cue=cue))
 
 
 def enqueue_pose_command(
-    motion_queue: asyncio.Queue,
+    planner: MotionPlanner,
     yaw_deg: float = 0.0,
     pitch_deg: float = 0.0,
     roll_deg: float = 0.0,
@@ -292,37 +411,105 @@ def enqueue_pose_command(
     hold_s: float = 0.0,
     return_mode: str = "auto",
 ) -> None:
-    if motion_queue.full():
-        with suppress(asyncio.QueueEmpty):
-            motion_queue.get_nowait()
-
-    motion_queue.put_nowait({
-        "kind": "pose",
-        "yaw_deg": yaw_deg,
-        "pitch_deg": pitch_deg,
-        "roll_deg": roll_deg,
-        "x_mm": x_mm,
-        "y_mm": y_mm,
-        "z_mm": z_mm,
-        "body_yaw_deg": body_yaw_deg,
-        "duration_s": duration_s,
-        "hold_s": hold_s,
-        "return_mode": return_mode,
-    })
-
-
-def enqueue_emotion_command(motion_queue: asyncio.Queue, name: str) -> None:
-    if motion_queue.full():
-        with suppress(asyncio.QueueEmpty):
-            motion_queue.get_nowait()
-    motion_queue.put_nowait({"kind": "emotion", "name": name})
-
-
-def enqueue_return_home_command(motion_queue: asyncio.Queue) -> None:
-    if motion_queue.full():
-        with suppress(asyncio.QueueEmpty):
-            motion_queue.get_nowait()
-    motion_queue.put_nowait({"kind": "return_home"})
+    planner.submit(PoseCommand(
+        yaw_deg=yaw_deg,
+        pitch_deg=pitch_deg,
+        roll_deg=roll_deg,
+        x_mm=x_mm,
+        y_mm=y_mm,
+        z_mm=z_mm,
+        body_yaw_deg=body_yaw_deg,
+        duration_s=duration_s,
+        hold_s=hold_s,
+        return_mode=return_mode,
+    ))
+
+
+def enqueue_emotion_command(planner: MotionPlanner, name: str) -> None:
+    planner.submit(EmotionCommand(name=name))
+
+
+def enqueue_return_home_command(planner: MotionPlanner) -> None:
+    planner.submit(ReturnHomeCommand())
+
+
+# ---------------------------------------------------------------------------
+# Target folding
+# ---------------------------------------------------------------------------
+
+def _apply_head(state: PoseTarget, cmd: HeadCommand) -> PoseTarget:
+    direction, step_scale = _normalize_move_direction_and_scale(
+        str(cmd.direction), cmd.intensity, cmd.steps, cmd.cue
+    )
+    yaw_step   = YAW_STEP_DEG      * step_scale
+    pitch_step = PITCH_STEP_DEG    * step_scale
+    roll_step  = ROLL_STEP_DEG     * step_scale
+    base_step  = BASE_YAW_STEP_RAD * step_scale
+
+    # Relative moves never carried a translation.
+    s = replace(state, x_mm=0.0, y_mm=0.0, z_mm=0.0)
+    if direction == "right":
+        s.yaw_deg = _clamp(s.yaw_deg - yaw_step, HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG)
+    elif direction == "left":
+        s.yaw_deg = _clamp(s.yaw_deg + yaw_step, HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG)
+    elif direction == "up":
+        s.pitch_deg = _clamp(s.pitch_deg - pitch_step, HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG)
+    elif direction == "down":
+        s.pitch_deg = _clamp(s.pitch_deg + pitch_step, HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG)
+    elif direction == "tilt_left":
+        s.roll_deg = _clamp(s.roll_deg + roll_step, HEAD_ROLL_MIN_DEG, HEAD_ROLL_MAX_DEG)
+    elif direction == "tilt_right":
+        s.roll_deg = _clamp(s.roll_deg - roll_step, HEAD_ROLL_MIN_DEG, HEAD_ROLL_MAX_DEG)
+    elif direction == "base_left":
+        # Move head and body together — head leads cause large relative angles that hit the chassis
+        s.body_yaw = _clamp(s.body_yaw + base_step, BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
+        s.yaw_deg = 0.0  # head re-centers to body forward
+    elif direction == "base_right":
+        s.body_yaw = _clamp(s.body_yaw - base_step, BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
+        s.yaw_deg = 0.0
+    elif direction == "center":
+        s.yaw_deg, s.pitch_deg, s.roll_deg = 0.0, 0.0, 0.0
+    return s
+
+
+def _apply_pose(state: PoseTarget, cmd: PoseCommand) -> PoseTarget:
+    body_yaw = state.body_yaw
+    if cmd.body_yaw_deg is not None:
+        body_yaw = _clamp(math.radians(_to_float(cmd.body_yaw_deg, 0.0)), BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
+    return PoseTarget(
+        yaw_deg=_clamp(_to_float(cmd.yaw_deg, 0.0), HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG),
+        pitch_deg=_clamp(_to_float(cmd.pitch_deg, 0.0), HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG),
+        roll_deg=_clamp(_to_float(cmd.roll_deg, 0.0), HEAD_ROLL_MIN_DEG, HEAD_ROLL_MAX_DEG),
+        x_mm=_to_float(cmd.x_mm, 0.0),
+        y_mm=_to_float(cmd.y_mm, 0.0),
+        z_mm=_to_float(cmd.z_mm, 0.0),
+        body_yaw=body_yaw,
+    )
+
+
+def _pose_returns(cmd: PoseCommand) -> bool:
+    """Whether a pose goes back to body-forward after its hold."""
+    return cmd.return_mode == "neutral" or (cmd.return_mode == "auto" and _to_float(cmd.hold_s, 0.0) <= 0)
+
+
+def fold_targets(state: PoseTarget, batch: list[TargetCommand]) -> PoseTarget:
+    """
+    Final state after a run of target commands, without executing intermediate
+    moves. A pose that would have returned to neutral before the next command is
+    folded as already returned; the last command is applied without its return.
+    """
+    s = state
+    for i, cmd in enumerate(batch):
+        last = i == len(batch) - 1
+        if isinstance(cmd, HeadCommand):
+            s = _apply_head(s, cmd)
+        elif isinstance(cmd, PoseCommand):
+            s = _apply_pose(s, cmd)
+            if not last and _pose_returns(cmd):
+                s = PoseTarget(body_yaw=s.body_yaw)
+        elif isinstance(cmd, ReturnHomeCommand):
+            s = PoseTarget()
+    return s
 
 
 # ---------------------------------------------------------------------------
@@ -331,188 +518,148 @@ def enqueue_return_home_command(motion_queue: asyncio.Queue) -> None:
 
 async def motion_worker_loop(
     mini: ReachyMini,
-    motion_queue: asyncio.Queue,
+    executor: MotionExecutor,
+    planner: MotionPlanner,
     interrupted_event: asyncio.Event,
-    emotions: RecordedMoves,
+    emotions: EmotionLibrary,
+    face_tracker: FaceTracker | None = None,
 ) -> None:
-    current_yaw_deg = 0.0
-    current_pitch_deg = 0.0
-    current_roll_deg = 0.0
-    current_body_yaw = 0.0
-    last_head_cmd_ts = 0.0
-
-    while True:
-        cmd = await motion_queue.get()
-        if interrupted_event.is_set() or not isinstance(cmd, dict):
-            continue
-
-        kind = cmd.get("kind")
-
-        if kind == "head":
-            direction_raw = str(cmd.get("direction", "center"))
-            direction, step_scale = _normalize_move_direction_and_scale(
-                direction_raw, cmd.get("intensity"), cmd.get("steps"), cmd.get("cue")
-            )
+    """
+    Execute batches from the MotionPlanner: one streamed trajectory per folded
+    target run, emotions as cancellable tasks. Moves are handed to the
+    MotionExecutor and never block a thread; if new commands arrive mid-move the
+    worker retargets right away instead of waiting for the move to finish.
+    When face_tracker is given, the worker also nudges the head toward the
+    student's face whenever it has been idle for a while. OrientCommands (DoA
+    turns) run the same way but never count as explicit motion.
+    """
+    loop = asyncio.get_running_loop()
+    last_motion_end_ts = 0.0     # when the last explicit command finished
+    last_gaze_move_ts = 0.0
+
+    async def _until_done_or_new_work(fut: asyncio.Future) -> bool:
+        """Wait for a move (or hold) to finish; False if new commands cut it short."""
+        work = asyncio.create_task(planner.wait_pending())
+        try:
+            await asyncio.wait({fut, work}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            work.cancel()
+        return planner.empty()
+
+    async def _run_explicit(batch: list[MotionCommand]) -> None:
+        """Play an emotion or execute a folded run of tool targets."""
+        first = batch[0]
+        if isinstance(first, EmotionCommand):
+            planner.preempt_event.clear()
+            planner.emotion_playing = True
+            play = preempt = None
+            try:
+                async with executor.paused():
+                    with suppress(Exception):
+                        play = asyncio.create_task(mini.async_play_move(emotions.get(first.name), sound=False))
+                        preempt = asyncio.create_task(planner.preempt_event.wait())
+                        await asyncio.wait({play, preempt}, return_when=asyncio.FIRST_COMPLETED)
+                    for task in (play, preempt):
+                        if task is not None and not task.done():
+                            task.cancel()
+                            with suppress(asyncio.CancelledError, Exception):
+                                await task
+            finally:
+                planner.emotion_playing = False
+            return
+
+        state = executor.current
+        last = batch[-1]
+        target = fold_targets(state, batch)
+
+        if isinstance(last, PoseCommand):
+            duration_s = _to_float(last.duration_s, MOTION_DEFAULT_DURATION)
+            if target.body_yaw != state.body_yaw:
+                # Head leads body: the head reaches its world-frame target in the first half,
+                # the body starts shortly after and catches up (one trajectory, no extra gotos).
+                fut = executor.move_to(
+                    target, duration_s * 0.5,
+                    body_delay=duration_s * 0.5 + 0.18, body_duration=duration_s * 0.6,
+                )
+            else:
+                fut = executor.move_to(target, duration_s)
+            finished = await _until_done_or_new_work(fut)
+
+            hold_s = _to_float(last.hold_s, 0.0)
+            if finished and hold_s > 0:
+                hold = asyncio.create_task(asyncio.sleep(hold_s))
+                finished = await _until_done_or_new_work(hold)
+                hold.cancel()
+            if finished and _pose_returns(last):
+                # Return head to body-forward: world yaw = body_yaw (head offset = 0)
+                await _until_done_or_new_work(executor.move_to(PoseTarget(body_yaw=target.body_yaw), 0.6))
 
-            yaw_step   = YAW_STEP_DEG      * step_scale
-            pitch_step = PITCH_STEP_DEG    * step_scale
-            roll_step  = ROLL_STEP_DEG     * step_scale
-            base_step  = BASE_YAW_STEP_RAD * step_scale
+        elif isinstance(last, ReturnHomeCommand):
+            await _until_done_or_new_work(executor.move_to(PoseTarget(), 0.8))
 
-            now = asyncio.get_running_loop().time()
-            if direction != "center" and (now - last_head_cmd_ts) < HEAD_CMD_MIN_INTERVAL_S:
-                continue
-
-            prev_yaw, prev_pitch, prev_roll = current_yaw_deg, current_pitch_deg, current_roll_deg
-
-            if direction == "right":
-                current_yaw_deg = _clamp(current_yaw_deg - yaw_step, HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG)
-            elif direction == "left":
-                current_yaw_deg = _clamp(current_yaw_deg + yaw_step, HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG)
-            elif direction == "up":
-                current_pitch_deg = _clamp(current_pitch_deg - pitch_step, HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG)
-            elif direction == "down":
-                current_pitch_deg = _clamp(current_pitch_deg + pitch_step, HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG)
-            elif direction == "tilt_left":
-                current_roll_deg = _clamp(current_roll_deg + roll_step, HEAD_ROLL_MIN_DEG, HEAD_ROLL_MAX_DEG)
-            elif direction == "tilt_right":
-                current_roll_deg = _clamp(current_roll_deg - roll_step, HEAD_ROLL_MIN_DEG, HEAD_ROLL_MAX_DEG)
-            elif direction == "base_left":
-                # Move head and body together — head leads cause large relative angles that hit the chassis
-                current_body_yaw = _clamp(current_body_yaw + base_step, BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
-                current_yaw_deg = 0.0  # head re-centers to body forward
-                dur = max(0.4, abs(base_step) * 0.8)
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(yaw=math.degrees(current_body_yaw), pitch=current_pitch_deg, roll=current_roll_deg, degrees=True),
-                    body_yaw=current_body_yaw,
-                    duration=dur,
+        else:
+            if target.body_yaw != state.body_yaw:
+                dur = max(0.4, abs(target.body_yaw - state.body_yaw) * 0.8)
+            else:
+                dur = _head_duration(
+                    target.yaw_deg - state.yaw_deg,
+                    target.pitch_deg - state.pitch_deg,
+                    target.roll_deg - state.roll_deg,
                 )
-                last_head_cmd_ts = asyncio.get_running_loop().time()
-                continue
-            elif direction == "base_right":
-                current_body_yaw = _clamp(current_body_yaw - base_step, BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
-                current_yaw_deg = 0.0
-                dur = max(0.4, abs(base_step) * 0.8)
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(yaw=math.degrees(current_body_yaw), pitch=current_pitch_deg, roll=current_roll_deg, degrees=True),
-                    body_yaw=current_body_yaw,
-                    duration=dur,
+            await _until_done_or_new_work(executor.move_to(target, dur))
+
+    while True:
+        if face_tracker is None:
+            batch = await planner.next_batch()
+        else:
+            try:
+                batch = await asyncio.wait_for(planner.next_batch(), timeout=GAZE_CORRECTION_INTERVAL_S)
+            except asyncio.TimeoutError:
+                face = face_tracker.get_position()
+                # Only act on frames grabbed after the last move finished, otherwise we overshoot.
+                if (
+                    face is None
+                    or interrupted_event.is_set()
+                    or face.timestamp <= max(last_motion_end_ts, last_gaze_move_ts)
+                    or loop.time() - last_motion_end_ts < GAZE_IDLE_AFTER_CMD_S
+                ):
+                    continue
+                yaw_err, pitch_err = face_offset_to_angles(face.nx, face.ny)
+                if abs(yaw_err) < GAZE_DEADBAND_DEG and abs(pitch_err) < GAZE_DEADBAND_DEG:
+                    continue
+                state = executor.current
+                target = replace(
+                    state,
+                    yaw_deg=_clamp(state.yaw_deg + GAZE_GAIN * yaw_err, HEAD_YAW_MIN_DEG, HEAD_YAW_MAX_DEG),
+                    pitch_deg=_clamp(state.pitch_deg + GAZE_GAIN * pitch_err, HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG),
                 )
-                last_head_cmd_ts = asyncio.get_running_loop().time()
+                await _until_done_or_new_work(executor.move_to(target, GAZE_MOVE_DURATION_S))
+                last_gaze_move_ts = loop.time()
                 continue
-            elif direction == "center":
-                current_yaw_deg, current_pitch_deg, current_roll_deg = 0.0, 0.0, 0.0
-
-            dur = _head_duration(
-                current_yaw_deg - prev_yaw,
-                current_pitch_deg - prev_pitch,
-                current_roll_deg - prev_roll,
-            )
-
-            await asyncio.to_thread(
-                mini.goto_target,
-                head=create_head_pose(
-                    yaw=math.degrees(current_body_yaw) + current_yaw_deg,
-                    pitch=current_pitch_deg,
-                    roll=current_roll_deg,
-                    degrees=True,
-                ),
-                body_yaw=current_body_yaw,
-                duration=dur,
-            )
-            last_head_cmd_ts = now
-
-
-        elif kind == "pose":
-            yaw   = _clamp(_to_float(cmd.get("yaw_deg",   0.0), 0.0), HEAD_YAW_MIN_DEG,   HEAD_YAW_MAX_DEG)
-            pitch = _clamp(_to_float(cmd.get("pitch_deg", 0.0), 0.0), HEAD_PITCH_MIN_DEG, HEAD_PITCH_MAX_DEG)
-            roll  = _clamp(_to_float(cmd.get("roll_deg",  0.0), 0.0), HEAD_ROLL_MIN_DEG,  HEAD_ROLL_MAX_DEG)
-            x_mm  = _to_float(cmd.get("x_mm", 0.0), 0.0)
-            y_mm  = _to_float(cmd.get("y_mm", 0.0), 0.0)
-            z_mm  = _to_float(cmd.get("z_mm", 0.0), 0.0)
-
-            body_yaw_deg = cmd.get("body_yaw_deg")
-            new_body_yaw = current_body_yaw
-            if body_yaw_deg is not None:
-                new_body_yaw = _clamp(math.radians(float(body_yaw_deg)), BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
-
-            current_yaw_deg, current_pitch_deg, current_roll_deg = yaw, pitch, roll
-
-            duration_s  = float(cmd.get("duration_s", MOTION_DEFAULT_DURATION))
-            hold_s      = float(cmd.get("hold_s", 0.0))
-            return_mode = str(cmd.get("return_mode", "auto"))
-
-            # Head leads body: move head first (to final world-frame position), then body catches up.
-            # create_head_pose(yaw=X) uses WORLD frame, so target yaw = body_destination + head_relative_offset.
-            target_world_yaw = math.degrees(new_body_yaw) + current_yaw_deg
-            if new_body_yaw != current_body_yaw:
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(
-                        x=x_mm, y=y_mm, z=z_mm,
-                        roll=current_roll_deg, pitch=current_pitch_deg, yaw=target_world_yaw,
-                        degrees=True, mm=True,
-                    ),
-                    body_yaw=current_body_yaw,  # body stays while head moves first
-                    duration=duration_s * 0.5,
-                )
-                await asyncio.sleep(0.18)
-                current_body_yaw = new_body_yaw
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(
-                        x=x_mm, y=y_mm, z=z_mm,
-                        roll=current_roll_deg, pitch=current_pitch_deg, yaw=target_world_yaw,
-                        degrees=True, mm=True,
-                    ),
-                    body_yaw=current_body_yaw,
-                    duration=duration_s * 0.6,
-                )
-            else:
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(
-                        x=x_mm, y=y_mm, z=z_mm,
-                        roll=current_roll_deg, pitch=current_pitch_deg, yaw=target_world_yaw,
-                        degrees=True, mm=True,
-                    ),
-                    body_yaw=current_body_yaw,
-                    duration=duration_s,
-                )
 
-            if hold_s > 0:
-                await asyncio.sleep(hold_s)
+        if interrupted_event.is_set():
+            continue
 
-            if return_mode == "neutral" or (return_mode == "auto" and hold_s <= 0):
-                current_yaw_deg, current_pitch_deg, current_roll_deg = 0.0, 0.0, 0.0
-                # Return head to body-forward: world yaw = body_yaw (head offset = 0)
-                await asyncio.to_thread(
-                    mini.goto_target,
-                    head=create_head_pose(yaw=math.degrees(current_body_yaw), degrees=True),
-                    body_yaw=current_body_yaw,
-                    duration=0.6,
-                )
-    
-
-        elif kind == "emotion":
-            name = cmd.get("name")
-            if isinstance(name, str):
-                with suppress(Exception):
-                    await mini.async_play_move(emotions.get(name), sound=False)
-
-        elif kind == "return_home":
-            current_yaw_deg = 0.0
-            current_pitch_deg = 0.0
-            current_roll_deg = 0.0
-            current_body_yaw = 0.0
-            await asyncio.to_thread(
-                mini.goto_target,
-                head=create_head_pose(),
-                body_yaw=0.0,
-                duration=0.8,
-            )
+        first = batch[0]
+        if isinstance(first, OrientCommand):
+            state = executor.current
+            body_yaw = _clamp(first.body_yaw, BASE_YAW_MIN_RAD, BASE_YAW_MAX_RAD)
+            delta = abs(body_yaw - state.body_yaw)
+            if delta >= ORIENT_MIN_DELTA_RAD:
+                # Head and body turn together and the head re-centers, like base_left/base_right.
+                target = replace(state, yaw_deg=0.0, body_yaw=body_yaw)
+                await _until_done_or_new_work(executor.move_to(target, max(0.5, delta * 0.8)))
+                # Autonomous like a gaze step: the face check must wait for a fresh frame.
+                last_gaze_move_ts = loop.time()
+            continue
+
+        planner.explicit_active = True
+        try:
+            await _run_explicit(batch)
+        finally:
+            planner.explicit_active = False
+            planner.last_explicit_ts = loop.time()
+        last_motion_end_ts = loop.time()
 
 
 # ---------------------------------------------------------------------------
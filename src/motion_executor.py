@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+from reachy_mini import ReachyMini
+from reachy_mini.utils import create_head_pose
+
+
+CONTROL_RATE_HZ = 50
+ANTENNA_REST_RAD = (-0.15, 0.15)   # resting antenna pose set after BLE pairing
+
+# Vector layout used for interpolation. Head yaw is interpolated in the WORLD frame
+# (what create_head_pose expects) so the head can lead the body on coupled moves.
+_X, _Y, _Z, _ROLL, _PITCH, _WORLD_YAW, _BODY_YAW = range(7)
+_N_CHANNELS = 7
+
+
+@dataclass
+class PoseTarget:
+    """Commanded head/body pose. Head yaw is relative to the body, body yaw in radians."""
+    yaw_deg: float = 0.0
+    pitch_deg: float = 0.0
+    roll_deg: float = 0.0
+    x_mm: float = 0.0
+    y_mm: float = 0.0
+    z_mm: float = 0.0
+    body_yaw: float = 0.0
+
+
+def _to_vec(p: PoseTarget) -> np.ndarray:
+    v = np.empty(_N_CHANNELS)
+    v[_X], v[_Y], v[_Z] = p.x_mm, p.y_mm, p.z_mm
+    v[_ROLL], v[_PITCH] = p.roll_deg, p.pitch_deg
+    v[_WORLD_YAW] = math.degrees(p.body_yaw) + p.yaw_deg
+    v[_BODY_YAW] = p.body_yaw
+    return v
+
+
+def _from_vec(v: np.ndarray) -> PoseTarget:
+    return PoseTarget(
+        yaw_deg=float(v[_WORLD_YAW] - math.degrees(v[_BODY_YAW])),
+        pitch_deg=float(v[_PITCH]),
+        roll_deg=float(v[_ROLL]),
+        x_mm=float(v[_X]),
+        y_mm=float(v[_Y]),
+        z_mm=float(v[_Z]),
+        body_yaw=float(v[_BODY_YAW]),
+    )
+
+
+def min_jerk(s: np.ndarray) -> np.ndarray:
+    """Minimum-jerk profile: zero velocity and acceleration at both ends."""
+    return s * s * s * (10.0 - 15.0 * s + 6.0 * s * s)
+
+
+class _Segment:
+    """One min-jerk move from `start` to `end`, with per-channel delay and duration."""
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, t0: float, delay: np.ndarray, duration: np.ndarray) -> None:
+        self.start = start
+        self.end = end
+        self.t0 = t0
+        self.delay = delay
+        self.duration = np.maximum(duration, 1e-3)
+        self.t_end = t0 + float(np.max(delay + duration))
+        self.done: asyncio.Future | None = None
+
+    def evaluate(self, t: float) -> np.ndarray:
+        s = np.clip((t - self.t0 - self.delay) / self.duration, 0.0, 1.0)
+        return self.start + (self.end - self.start) * min_jerk(s)
+
+
+class MotionExecutor:
+    """
+    Streams head/body targets to the robot from a single control task.
+
+    Instead of a blocking goto_target per move (each holding a thread-pool worker
+    for the whole motion), moves are min-jerk segments that the control loop
+    samples at CONTROL_RATE_HZ and sends with set_target. A new move_to() while a
+    segment is running retargets from the current interpolated pose.
+    """
+
+    def __init__(self, mini: ReachyMini, rate_hz: float = CONTROL_RATE_HZ) -> None:
+        self._mini = mini
+        self._period = 1.0 / rate_hz
+        self._current = _to_vec(PoseTarget())
+        self._segment: _Segment | None = None
+        self._paused = 0
+
+        # Additive layer (speech animation, micro-motions): never part of `current`,
+        # so planned targets and folding are unaffected by it.
+        self._offset = np.zeros(_N_CHANNELS)
+        self._antenna_offset = np.zeros(2)
+        self._offset_dirty = False
+
+    @property
+    def current(self) -> PoseTarget:
+        """Last pose sent to the robot (or where it was found after a resync)."""
+        return _from_vec(self._current)
+
+    @property
+    def moving(self) -> bool:
+        """True while a segment is streaming or something else drives the robot."""
+        return self._segment is not None or self._paused > 0
+
+    def move_to(
+        self,
+        target: PoseTarget,
+        duration: float,
+        body_delay: float = 0.0,
+        body_duration: float | None = None,
+    ) -> asyncio.Future:
+        """
+        Start a move toward `target`. Returns a future resolving to True when the
+        target is reached, or False if another move_to() superseded it first.
+        body_delay/body_duration let the body lag behind the head (head leads body).
+        """
+        loop = asyncio.get_running_loop()
+        delay = np.zeros(_N_CHANNELS)
+        dur = np.full(_N_CHANNELS, duration)
+        delay[_BODY_YAW] = body_delay
+        dur[_BODY_YAW] = duration if body_duration is None else body_duration
+
+        seg = _Segment(self._current.copy(), _to_vec(target), loop.time(), delay, dur)
+        seg.done = loop.create_future()
+        self._supersede()
+        self._segment = seg
+        return seg.done
+
+    def set_offset(
+        self,
+        pitch_deg: float = 0.0,
+        roll_deg: float = 0.0,
+        yaw_deg: float = 0.0,
+        antennas: tuple[float, float] = (0.0, 0.0),
+    ) -> None:
+        """Set the additive offset streamed on top of the planned pose on the next tick."""
+        self._offset[_PITCH] = pitch_deg
+        self._offset[_ROLL] = roll_deg
+        self._offset[_WORLD_YAW] = yaw_deg
+        self._antenna_offset[:] = antennas
+        self._offset_dirty = True
+
+    def stop(self) -> None:
+        """Hold the current pose and drop the active segment."""
+        self._supersede()
+
+    def _supersede(self) -> None:
+        if self._segment is not None and self._segment.done and not self._segment.done.done():
+            self._segment.done.set_result(False)
+        self._segment = None
+
+    @asynccontextmanager
+    async def paused(self):
+        """Stop streaming while something else drives the robot (recorded emotions)."""
+        self._supersede()
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+            if not self._paused:
+                await self.resync()
+
+    async def resync(self) -> None:
+        """Read the robot's present pose so the next segment starts where it really is."""
+        def _read() -> np.ndarray | None:
+            pose = np.asarray(self._mini.get_current_head_pose())
+            head_joints, _ = self._mini.get_current_joint_positions()
+            roll, pitch, yaw = Rotation.from_matrix(pose[:3, :3]).as_euler("xyz", degrees=True)
+            v = np.empty(_N_CHANNELS)
+            v[_X], v[_Y], v[_Z] = pose[:3, 3] * 1000.0
+            v[_ROLL], v[_PITCH], v[_WORLD_YAW] = roll, pitch, yaw
+            v[_BODY_YAW] = float(head_joints[0])
+            return v
+
+        with suppress(Exception):
+            v = await asyncio.to_thread(_read)
+            if v is not None and np.all(np.isfinite(v)):
+                self._current = v
+
+    def _send(self, v: np.ndarray, antennas: np.ndarray | None = None) -> None:
+        self._mini.set_target(
+            head=create_head_pose(
+                x=v[_X], y=v[_Y], z=v[_Z],
+                roll=v[_ROLL], pitch=v[_PITCH], yaw=v[_WORLD_YAW],
+                degrees=True, mm=True,
+            ),
+            antennas=None if antennas is None else list(antennas),
+            body_yaw=float(v[_BODY_YAW]),
+        )
+
+    async def run(self) -> None:
+        """Control loop: sample the active segment and stream it at a fixed rate."""
+        loop = asyncio.get_running_loop()
+        await self.resync()
+        next_tick = loop.time()
+        try:
+            while True:
+                next_tick += self._period
+                now = loop.time()
+                seg = self._segment
+                if not self._paused and (seg is not None or self._offset_dirty):
+                    if seg is not None:
+                        self._current = seg.evaluate(now)
+                    antennas = None
+                    if self._offset_dirty:
+                        antennas = np.asarray(ANTENNA_REST_RAD) + self._antenna_offset
+                        self._offset_dirty = False
+                    with suppress(Exception):
+                        self._send(self._current + self._offset, antennas)
+                if seg is not None and not self._paused:
+                    if now >= seg.t_end:
+                        self._segment = None
+                        if seg.done is not None and not seg.done.done():
+                            seg.done.set_result(True)
+                # Don't try to catch up after a stall — just resume the cadence.
+                delay = next_tick - loop.time()
+                if delay < 0:
+                    next_tick = loop.time()
+                    delay = 0
+                await asyncio.sleep(delay)
+        finally:
+            self._supersede()
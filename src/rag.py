@@ -23,6 +23,11 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
+from log_config import get_logger
+
+
+logger = get_logger("rag")
+
 MODULES_COLLECTION = "modules"
 
 
@@ -70,16 +75,13 @@ class FirestoreRAG:
             if self._module_pattern and not self._module_pattern.search(doc.id):
                 continue
             if not doc.exists:
-                print(f"[RAG] Warning: document '{doc.id}' not found — skipping.")
+                logger.warning("document '%s' not found — skipping.", doc.id)
                 continue
             data = doc.to_dict()
             self._modules.append(data)
             self._index_module(data)
 
-        print(
-            f"[RAG] Loaded {len(self._modules)} module(s), "
-            f"{len(self._chunks)} chunks total."
-        )
+        logger.info("Loaded %d module(s), %d chunks total.", len(self._modules), len(self._chunks))
 
     def build_system_context(self) -> str:
         """
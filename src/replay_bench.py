@@ -0,0 +1,185 @@
+"""
+replay_bench.py — run the whole State 1–3 pipeline offline against fakes.py.
+
+    python replay_bench.py traces/trace-....jsonl.gz --mic student.wav
+    python replay_bench.py traces/ --session 20261019-150334-3 --mic student.wav --video sheet.mp4 \\
+        --speed 2 --firestore fixtures.json --profile --out bench.json
+
+A scripted Live session replays the trace's server messages with their
+original timing, FakeReachyMini plays the WAV into the mic and records what
+BAY-min says, and Firestore is in memory. When the script runs out the fake
+BLE link drops and the run ends. Reported per pipeline stage (source module):
+event-loop CPU (cProfile tottime, --profile), allocations (tracemalloc), plus
+process CPU, per-turn latency spans (LatencyTracer) and tool latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import json
+import pstats
+import tempfile
+import time
+import tracemalloc
+from contextlib import suppress
+from pathlib import Path
+
+import main as baymin
+from fakes import (
+    FakeEmotionLibrary, FakeMedia, FakeReachyMini, InMemoryFirestore, ScriptedBle,
+    ScriptedLiveClient, demo_firestore, load_script,
+)
+from firebase_helper import FirebaseHelper
+from latency import LatencyTracer
+from log_config import setup_logging
+from motion_executor import CONTROL_RATE_HZ
+from tool_registry import TOOL_LATENCY
+from trace_writer import TraceWriter
+
+
+REPLAY_UID = "replay-user"
+REPLAY_MODULE = "replay_module"
+REPLAY_TIMEOUT_S = 15 * 60
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def _stage(filename: str) -> str | None:
+    """Source module a profiler / tracemalloc entry belongs to, if it is one of ours."""
+    path = Path(filename)
+    return path.stem if path.parent == SRC_DIR and path.suffix == ".py" else None
+
+
+def cpu_by_stage(profile: cProfile.Profile) -> dict[str, float]:
+    stats = pstats.Stats(profile)
+    out: dict[str, float] = {}
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        stage = _stage(filename)
+        if stage is not None:
+            out[stage] = out.get(stage, 0.0) + tottime
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+
+def allocations_by_stage(snapshot: tracemalloc.Snapshot) -> dict[str, dict]:
+    out: dict[str, dict] = {}
+    for stat in snapshot.statistics("filename"):
+        stage = _stage(stat.traceback[0].filename)
+        if stage is not None:
+            out[stage] = {"kib": round(stat.size / 1024, 1), "blocks": stat.count}
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]["kib"]))
+
+
+async def replay(args: argparse.Namespace) -> dict:
+    script = load_script(args.trace, args.session)
+    if not script:
+        raise SystemExit("no server messages found in the trace")
+
+    if args.firestore:
+        db = InMemoryFirestore.from_json(args.firestore, args.firestore_latency)
+    else:
+        db = demo_firestore(REPLAY_UID, args.module, args.firestore_latency)
+    media = FakeMedia(args.mic, args.video, keep_output=args.save_output is not None)
+    mini = FakeReachyMini(media)
+    client = ScriptedLiveClient(script, speed=args.speed, connect_latency_s=args.connect_latency)
+    ble = ScriptedBle(REPLAY_UID, args.module)
+    client.on_exhausted = ble.disconnect
+
+    trace_dir = Path(tempfile.mkdtemp(prefix="baymin-replay-"))
+    trace = TraceWriter(trace_dir)
+    tracer = LatencyTracer(trace, metrics_file=trace_dir / "latency_metrics.json")
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    run = asyncio.create_task(baymin.run(
+        mini=mini, client=client, firebase=FirebaseHelper(db=db),
+        connect_ble=ble.connect, emotions=FakeEmotionLibrary(), trace=trace, tracer=tracer,
+    ), name="baymin")
+    finished = asyncio.create_task(ble.finished.wait())
+    await asyncio.wait({run, finished}, timeout=args.timeout, return_when=asyncio.FIRST_COMPLETED)
+    wall = time.monotonic() - started
+    cpu = time.process_time() - cpu_started
+
+    finished.cancel()
+    run.cancel()
+    with suppress(asyncio.CancelledError):
+        await run   # re-raises if the pipeline crashed
+
+    if args.save_output is not None:
+        media.save_output(args.save_output)
+    return {
+        "wall_s": round(wall, 2),
+        "process_cpu_s": round(cpu, 2),
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        "completed": ble.finished.is_set(),
+        "script_messages": f"{client.messages_sent}/{len(script)}",
+        "live_connects": client.connects,
+        "mic_frames_sent": client.mic_frames,
+        "tool_responses": len(client.tool_responses),
+        "speaker_audio_s": round(media.pushed_samples / media.get_output_audio_samplerate(), 2),
+        "speaker_push_calls": media.push_calls,
+        "set_target_hz": round(mini.targets_sent / wall, 1) if wall else 0.0,
+        "set_target_expected_hz": CONTROL_RATE_HZ,
+        "camera_frames": media.frames_served,
+        "firestore": {"reads": db.reads, "writes": db.writes},
+        "latency": {name: h.to_dict() for name, h in sorted(tracer.histograms.items())},
+        "tools": {name: h.to_dict() for name, h in sorted(TOOL_LATENCY.histograms.items())},
+        "trace_dir": str(trace_dir),
+    }
+
+
+def print_report(result: dict) -> None:
+    for key, value in result.items():
+        if isinstance(value, dict) and value and all(isinstance(v, dict) for v in value.values()):
+            print(f"{key}:")
+            for name, row in value.items():
+                print(f"  {name:<24} " + " ".join(f"{k}={v}" for k, v in row.items()))
+        elif isinstance(value, dict) and value and not isinstance(next(iter(value.values())), dict):
+            print(f"{key}: " + " ".join(f"{k}={v}" for k, v in value.items()))
+        else:
+            print(f"{key}: {value}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a traced Live session through the full pipeline, headless.")
+    parser.add_argument("trace", nargs="+", type=Path, help="trace files or directories (trace_writer output)")
+    parser.add_argument("--session", help="session id in the trace, <boot>-<n> (default: the first)")
+    parser.add_argument("--mic", type=Path, help="16-bit PCM WAV played into the microphone")
+    parser.add_argument("--video", type=Path, help="video file served as camera frames (default: blank frames)")
+    parser.add_argument("--firestore", type=Path, help='JSON fixtures {"collection/doc/...": {...}}')
+    parser.add_argument("--firestore-latency", type=float, default=0.05, help="seconds per Firestore call")
+    parser.add_argument("--connect-latency", type=float, default=0.3, help="seconds per Live connect")
+    parser.add_argument("--module", default=REPLAY_MODULE, help="module id selected on connect")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up of the server script")
+    parser.add_argument("--timeout", type=float, default=REPLAY_TIMEOUT_S)
+    parser.add_argument("--profile", action="store_true", help="cProfile the event loop, CPU per stage")
+    parser.add_argument("--save-output", type=Path, help="write what BAY-min said to this WAV")
+    parser.add_argument("--out", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    listener = setup_logging()
+    tracemalloc.start()
+    profile = cProfile.Profile() if args.profile else None
+    if profile is not None:
+        profile.enable()
+    try:
+        result = asyncio.run(replay(args))
+    finally:
+        if profile is not None:
+            profile.disable()
+        listener.stop()
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result["alloc_peak_kib"] = round(peak / 1024, 1)
+    result["alloc_by_stage"] = allocations_by_stage(snapshot)
+    if profile is not None:
+        result["loop_cpu_by_stage_s"] = {k: round(v, 3) for k, v in cpu_by_stage(profile).items()}
+    print_report(result)
+    if args.out is not None:
+        args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
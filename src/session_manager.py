@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import Callable
+
+from google.genai import errors as genai_errors
+
+from audio_adapters import FRAME_MS
+from gemini_live import send_flow_context, send_lesson_context
+from session_summary import SessionSummary
+from log_config import get_logger
+
+
+logger = get_logger("live")
+
+# Live sessions are closed by the server after ~10 min; replace a warm one well before.
+LIVE_WARM_MAX_AGE_S = 8 * 60
+LIVE_WARM_RETRY_S = 5.0          # back-off after a failed pre-warm
+LIVE_WARM_WAIT_S = 10.0          # how long a module start waits for a pre-warm in progress
+
+# Reconnects (network drop, go_away) must finish within this or the session ends.
+LIVE_RECONNECT_DEADLINE_S = 8.0
+LIVE_RECONNECT_BACKOFF_S = (0.0, 0.25, 0.5, 1.0, 2.0)
+# Mic frames held while reconnecting (FRAME_MS = 20 ms each): enough for a whole
+# reconnect deadline (400 frames, 8 s); older ones are dropped and counted lost.
+LIVE_RESUME_MIC_BUFFER_FRAMES = int(LIVE_RECONNECT_DEADLINE_S * 1000 / FRAME_MS)
+
+
+@dataclass
+class _LiveSession:
+    cm: object          # the client.aio.live.connect(...) context manager
+    session: object
+    opened_at: float
+
+
+class LiveSessionManager:
+    """
+    Keeps one Gemini Live session open and configured ahead of time.
+
+    start_warming() (called once BLE is connected) opens a session in the
+    background, sends the flow doc, and replaces it before it gets old enough
+    for the server to drop it. session() hands the warm session to the module
+    that was just selected — only the lesson context still has to go out — and
+    falls back to a cold connect if no warm session is ready or it turns out
+    to be dead. The module gets it wrapped in a ResilientSession. Time from
+    module selection to session ready and to the first assistant audio is
+    printed for every session.
+    """
+
+    def __init__(self, client, model: str, config_factory: Callable[[str | None], dict]) -> None:
+        self._client = client
+        self._model = model
+        self._config_factory = config_factory
+        self._warm: _LiveSession | None = None
+        self._warm_ready = asyncio.Event()
+        self._warm_task: asyncio.Task | None = None
+        self._selected_at: float | None = None
+        self.first_word_s: list[float] = []
+
+    # ------------------------------------------------------------------
+    # Pre-warming
+    # ------------------------------------------------------------------
+
+    def start_warming(self) -> None:
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.create_task(self._keep_warm(), name="live_prewarm")
+
+    async def stop_warming(self) -> None:
+        """Stop the pre-warm task and close any session it holds."""
+        task, self._warm_task = self._warm_task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        warm, self._warm = self._warm, None
+        self._warm_ready.clear()
+        if warm is not None:
+            await self._close(warm)
+
+    async def _keep_warm(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                warm = await self._open()
+                try:
+                    await send_flow_context(warm.session)
+                except BaseException:
+                    await self._close(warm)   # cancelled or failed mid-send: don't leak it
+                    raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Pre-warm failed: %s", e)
+                await asyncio.sleep(LIVE_WARM_RETRY_S)
+                continue
+            self._warm = warm
+            self._warm_ready.set()
+            logger.info("Session pre-warmed in %.2fs", loop.time() - warm.opened_at)
+
+            await asyncio.sleep(LIVE_WARM_MAX_AGE_S)
+            # Still unused: swap it for a fresh one before the server closes it.
+            self._warm_ready.clear()
+            stale, self._warm = self._warm, None
+            if stale is not None:
+                await self._close(stale)
+
+    # ------------------------------------------------------------------
+    # Module sessions
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def session(
+        self,
+        lesson_context: str,
+        selected_at: float | None = None,
+        summary: SessionSummary | None = None,
+    ):
+        """Yield a Live session primed with the flow doc and `lesson_context`."""
+        loop = asyncio.get_running_loop()
+        self._selected_at = loop.time() if selected_at is None else selected_at
+
+        if self._warm_task is not None and not self._warm_ready.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._warm_ready.wait(), LIVE_WARM_WAIT_S)
+        live, self._warm = self._warm, None
+        self._warm_ready.clear()
+        await self.stop_warming()
+
+        prewarmed = live is not None
+        if live is not None:
+            try:
+                await send_lesson_context(live.session, lesson_context)
+            except Exception as e:
+                logger.warning("Warm session unusable (%s); connecting fresh", e)
+                await self._close(live)
+                live = None
+        if live is None:
+            live = await self._open()
+            try:
+                await send_flow_context(live.session, lesson_context)
+            except BaseException:
+                await self._close(live)
+                raise
+
+        logger.info(
+            "Session ready %.2fs after module selection (%s)",
+            loop.time() - self._selected_at, "pre-warmed" if prewarmed else "cold connect",
+        )
+        resilient = ResilientSession(self, live, summary or SessionSummary(lesson_context))
+        try:
+            yield resilient
+        finally:
+            await resilient.close()
+
+    def report_first_audio(self) -> None:
+        """Pass as receive_loop's on_first_audio to record time-to-first-word."""
+        if self._selected_at is None:
+            return
+        ttfw = asyncio.get_running_loop().time() - self._selected_at
+        self._selected_at = None
+        self.first_word_s.append(ttfw)
+        logger.info(
+            "Time to first word: %.2fs after module selection (median %.2fs over %d sessions)",
+            ttfw, statistics.median(self.first_word_s), len(self.first_word_s),
+        )
+
+    async def close(self) -> None:
+        await self.stop_warming()
+
+    # ------------------------------------------------------------------
+    # Connection helpers
+    # ------------------------------------------------------------------
+
+    async def _open(self, resume_handle: str | None = None) -> _LiveSession:
+        loop = asyncio.get_running_loop()
+        opened_at = loop.time()
+        cm = self._client.aio.live.connect(model=self._model, config=self._config_factory(resume_handle))
+        session = await cm.__aenter__()
+        return _LiveSession(cm=cm, session=session, opened_at=opened_at)
+
+    @staticmethod
+    async def _close(live: _LiveSession) -> None:
+        with suppress(Exception):
+            await live.cm.__aexit__(None, None, None)
+
+
+class ResilientSession:
+    """
+    Drop-in for the Live session object that survives connection loss.
+
+    It tracks the latest resumable handle from session_resumption_update and,
+    when the socket drops or the server announces go_away, reconnects with
+    that handle so the conversation continues server-side. There is no flow
+    doc or lesson replay unless no handle was ever issued (then the
+    SessionSummary re-seeds lesson + progress). Mic audio sent while
+    reconnecting is buffered (bounded) and flushed first on the new
+    connection; other sends wait for it. A reconnect that can't complete
+    within LIVE_RECONNECT_DEADLINE_S re-raises the original error.
+    """
+
+    def __init__(self, manager: LiveSessionManager, live: _LiveSession, summary: SessionSummary) -> None:
+        self._manager = manager
+        self._live = live
+        self._summary = summary
+        self._handle: str | None = None
+        self._go_away = False
+        self._generation = 0
+        self._connected = asyncio.Event()
+        self._connected.set()
+        self._reconnect_lock = asyncio.Lock()
+        self._mic_buffer: deque[dict] = deque()
+
+        self.reconnects = 0
+        self.reconnect_latency_s: list[float] = []
+        self.mic_frames_buffered = 0
+        self.mic_frames_lost = 0
+
+    # --- Session API used by receive_loop / send_mic_loop / tools ---
+
+    async def receive(self):
+        """One turn of server messages, like session.receive(), across reconnects."""
+        generation = self._generation
+        try:
+            async for message in self._live.session.receive():
+                self._track(message)
+                yield message
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            closed_normally = isinstance(e, genai_errors.APIError) and e.code == 1000
+            if closed_normally and not self._go_away:
+                raise  # the server ended the conversation on purpose
+            await self._reconnect(generation, e)
+            return
+        if self._go_away:
+            # Turn boundary after a go_away: move to a new connection before the server cuts us off.
+            await self._reconnect(generation, None)
+
+    async def send_realtime_input(self, **kwargs) -> None:
+        if "audio" in kwargs:
+            if not self._connected.is_set():
+                self._buffer_mic(kwargs)
+                return
+            generation = self._generation
+            try:
+                await self._live.session.send_realtime_input(**kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._buffer_mic(kwargs)
+                task = asyncio.create_task(self._reconnect(generation, e))
+                # A failure here also surfaces through receive(); don't log it twice.
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return
+        await self._send("send_realtime_input", **kwargs)
+
+    async def send_client_content(self, **kwargs) -> None:
+        await self._send("send_client_content", **kwargs)
+
+    async def send_tool_response(self, **kwargs) -> None:
+        await self._send("send_tool_response", **kwargs)
+
+    async def close(self) -> None:
+        self._print_stats()
+        await self._manager._close(self._live)
+
+    # --- Internals ---
+
+    def _track(self, message) -> None:
+        update = getattr(message, "session_resumption_update", None)
+        if update is not None and update.resumable and update.new_handle:
+            self._handle = update.new_handle
+        if getattr(message, "go_away", None) is not None and not self._go_away:
+            self._go_away = True
+            logger.info("Server go_away (time left %s); reconnecting after this turn", message.go_away.time_left)
+
+    def _buffer_mic(self, kwargs: dict) -> None:
+        if len(self._mic_buffer) >= LIVE_RESUME_MIC_BUFFER_FRAMES:
+            self._mic_buffer.popleft()
+            self.mic_frames_lost += 1
+        self._mic_buffer.append(kwargs)
+        self.mic_frames_buffered += 1
+
+    async def _send(self, method: str, **kwargs) -> None:
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._connected.wait(), LIVE_RECONNECT_DEADLINE_S)
+        await getattr(self._live.session, method)(**kwargs)
+
+    async def _reconnect(self, generation: int, error: Exception | None) -> None:
+        async with self._reconnect_lock:
+            if generation != self._generation:
+                return  # someone else already replaced that connection
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            self._connected.clear()
+            reason = "go_away" if error is None else f"{type(error).__name__}: {error}"
+            logger.warning("Connection lost (%s); resuming %s", reason, "with handle" if self._handle else "by replay")
+            await self._manager._close(self._live)
+
+            try:
+                resumed = await self._open_within(started + LIVE_RECONNECT_DEADLINE_S)
+                if resumed is None:
+                    logger.error("Could not resume within %.0fs", LIVE_RECONNECT_DEADLINE_S)
+                    if error is not None:
+                        raise error
+                    raise ConnectionError("Live session hit go_away and could not reconnect")
+                # _open_within drained the mic buffer with no await since, so
+                # nothing can be stranded in it once senders are let through.
+                self._live, flushed = resumed
+                self._generation += 1
+                self._go_away = False
+            finally:
+                # Also on failure, so waiting senders fail fast instead of stalling.
+                self._connected.set()
+
+            latency = loop.time() - started
+            self.reconnects += 1
+            self.reconnect_latency_s.append(latency)
+            logger.info(
+                "Resumed in %.2fs (%d mic frames flushed, %d lost so far)",
+                latency, flushed, self.mic_frames_lost,
+            )
+
+    async def _flush_mic(self, live: _LiveSession) -> int:
+        """Send buffered mic frames in order, including ones buffered while flushing."""
+        flushed = 0
+        while self._mic_buffer:
+            frame = self._mic_buffer.popleft()
+            try:
+                await live.session.send_realtime_input(**frame)
+            except BaseException:
+                self._mic_buffer.appendleft(frame)
+                raise
+            flushed += 1
+        return flushed
+
+    async def _open_within(self, deadline: float) -> tuple[_LiveSession, int] | None:
+        """Reconnect (resuming if we have a handle) and flush the mic buffer, with back-off until `deadline`.
+
+        Returns the new connection and the number of frames flushed. A send
+        failing during the flush counts as a failed attempt.
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            backoff = LIVE_RECONNECT_BACKOFF_S[min(attempt, len(LIVE_RECONNECT_BACKOFF_S) - 1)]
+            if deadline - loop.time() <= backoff:
+                return None
+            await asyncio.sleep(backoff)
+            attempt += 1
+            live = None
+            try:
+                live = await asyncio.wait_for(self._manager._open(self._handle), deadline - loop.time())
+                if self._handle is None:
+                    # Fresh conversation: seed the lesson and what has happened so far.
+                    await send_flow_context(live.session, self._summary.seed_context())
+                return live, await self._flush_mic(live)
+            except asyncio.CancelledError:
+                if live is not None:
+                    await self._manager._close(live)
+                raise
+            except Exception as e:
+                logger.warning("Reconnect attempt %d failed: %r", attempt, e)
+                if live is not None:
+                    await self._manager._close(live)
+
+    def _print_stats(self) -> None:
+        if not self.reconnects:
+            return
+        logger.info(
+            "Session had %d reconnect(s): max %.2fs, median %.2fs; %d mic frames buffered, %d lost",
+            self.reconnects, max(self.reconnect_latency_s), statistics.median(self.reconnect_latency_s),
+            self.mic_frames_buffered, self.mic_frames_lost,
+        )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from gemini_live import LIVE_COMPRESSION_TRIGGER_TOKENS, send_flow_context
+from log_config import get_logger
+
+
+logger = get_logger("live")
+
+SUMMARY_MAX_RECORDS = 12          # older records are folded into a one-line count
+SUMMARY_QUESTION_CHARS = 160
+SUMMARY_UTTERANCE_CHARS = 100
+
+# A drop in prompt tokens this large after getting near the trigger means the
+# server slid the window and the flow doc / lesson context may be gone.
+COMPRESSION_NEAR_TRIGGER = 0.8
+COMPRESSION_DROP_RATIO = 0.7
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+@dataclass
+class QuestionRecord:
+    number: int
+    question: str
+    student: str = ""      # last thing the student said while on this question
+    tutor: str = ""        # last thing BAY-min said while on this question
+
+    def render(self) -> str:
+        line = f"Example {self.number}: {_clip(self.question, SUMMARY_QUESTION_CHARS)}"
+        if self.student:
+            line += f' | student: "{_clip(self.student, SUMMARY_UTTERANCE_CHARS)}"'
+        if self.tutor:
+            line += f' | BAY-min: "{_clip(self.tutor, SUMMARY_UTTERANCE_CHARS)}"'
+        return line
+
+
+class SessionSummary:
+    """
+    Compact text record of what has happened in a module session.
+
+    Each example question served becomes a QuestionRecord carrying the last
+    student and tutor utterances while it was open; completed ones are kept
+    as one short line each. The rendered summary plus the lesson context is
+    what gets re-seeded when the server's sliding window has compressed the
+    history away (detected from usage_metadata) or a reconnect couldn't
+    resume and has to start a fresh conversation.
+    """
+
+    def __init__(self, lesson_context: str) -> None:
+        self.lesson_context = lesson_context
+        self._lock = threading.Lock()   # next_example_question runs in the tool thread pool
+        self._records: list[QuestionRecord] = []
+        self._folded = 0
+        self._quiz_started = False
+        self._peak_tokens = 0
+        self.reseeds = 0
+
+    # --- Events ---
+
+    def on_question_served(self, question: str) -> None:
+        with self._lock:
+            self._records.append(QuestionRecord(number=self._folded + len(self._records) + 1, question=question))
+            if len(self._records) > SUMMARY_MAX_RECORDS:
+                self._records.pop(0)
+                self._folded += 1
+
+    def on_quiz_started(self) -> None:
+        self._quiz_started = True
+
+    def on_student(self, text: str) -> None:
+        with self._lock:
+            if self._records and text.strip():
+                self._records[-1].student = text
+
+    def on_tutor(self, text: str) -> None:
+        with self._lock:
+            if self._records and text.strip():
+                self._records[-1].tutor = text
+
+    def observe_usage(self, usage) -> bool:
+        """Feed response.usage_metadata; True when the context looks compressed."""
+        tokens = usage.prompt_token_count or usage.total_token_count or 0
+        if not tokens:
+            return False
+        compressed = (
+            self._peak_tokens >= COMPRESSION_NEAR_TRIGGER * LIVE_COMPRESSION_TRIGGER_TOKENS
+            and tokens < COMPRESSION_DROP_RATIO * self._peak_tokens
+        )
+        self._peak_tokens = tokens if compressed else max(self._peak_tokens, tokens)
+        return compressed
+
+    # --- Output ---
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            if self._folded:
+                lines.append(f"({self._folded} earlier example questions completed)")
+            lines += [r.render() for r in self._records]
+        if self._quiz_started:
+            lines.append("The quiz has started.")
+        if not lines:
+            return ""
+        return "## Session So Far\n" + "\n".join(f"- {line}" for line in lines)
+
+    def seed_context(self) -> str:
+        """Lesson context plus the session summary, for send_flow_context."""
+        summary = self.render()
+        return self.lesson_context + ("\n\n" + summary if summary else "")
+
+    async def reseed(self, session) -> None:
+        """Put the flow doc, lesson context and summary back into the conversation."""
+        self.reseeds += 1
+        logger.info("Context compressed; re-seeding lesson + %d question records", len(self._records))
+        try:
+            await send_flow_context(session, self.seed_context())
+        except Exception as e:
+            logger.warning("Re-seed failed: %s", e)
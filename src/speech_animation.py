@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+
+import numpy as np
+
+from motion_executor import MotionExecutor
+
+
+SPEECH_SLICE_S = 0.02            # envelope resolution (same as the speaker push slices)
+ANIMATION_RATE_HZ = 25
+SPEECH_OUTPUT_LATENCY_S = 0.06   # pushed samples become audible roughly this much later
+ENVELOPE_MAX_S = 30.0            # cap on buffered envelope (long answers)
+
+# Envelope follower / AGC
+ENVELOPE_ATTACK = 0.6            # per-tick smoothing when the level rises
+ENVELOPE_RELEASE = 0.15          # ...and when it falls
+PEAK_DECAY_PER_S = 0.5           # running peak forgets half its value per second
+SILENCE_RMS = 0.01               # below this (full scale = 1.0) counts as silence
+
+# Motion amplitudes at full level
+ANTENNA_LIFT_RAD = 0.35
+ANTENNA_FLICK_RAD = 0.20
+HEAD_NOD_DEG = 2.5
+HEAD_SWAY_ROLL_DEG = 1.5
+HEAD_SWAY_HZ = 0.35
+
+
+def speech_envelope(
+    samples: np.ndarray, sample_rate: int, prev_rms: float | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-slice RMS and onset strength for a mono or (n, ch) float buffer.
+    Slices are SPEECH_SLICE_S long; a trailing partial slice is dropped.
+    prev_rms is the last slice of the previous buffer, so an onset right at
+    a buffer boundary isn't lost.
+    """
+    mono = samples[:, 0] if samples.ndim == 2 else samples
+    n = int(sample_rate * SPEECH_SLICE_S)
+    n_slices = len(mono) // n
+    if n_slices == 0:
+        return np.zeros(0, np.float32), np.zeros(0, np.float32)
+    frames = mono[: n_slices * n].reshape(n_slices, n)
+    rms = np.sqrt(np.mean(frames * frames, axis=1, dtype=np.float32))
+    onset = np.maximum(np.diff(rms, prepend=rms[0] if prev_rms is None else prev_rms), 0.0)
+    return rms, onset
+
+
+class SpeechAnimator:
+    """
+    Subtle head and antenna motion driven by BAY-min's own voice.
+
+    play_speaker_loop hands every chunk it pushes to feed(); the envelope is queued
+    against the time each slice should become audible, and run() turns it into
+    small additive offsets on the MotionExecutor at ANIMATION_RATE_HZ — no model
+    tool calls involved.
+    """
+
+    def __init__(self, executor: MotionExecutor) -> None:
+        self._executor = executor
+        self._envelope: deque[tuple[float, float, float]] = deque(
+            maxlen=int(ENVELOPE_MAX_S / SPEECH_SLICE_S)
+        )
+        self._cursor = 0.0    # audible time of the end of the last fed slice
+        self._remainder = np.zeros(0, np.float32)   # partial slice carried into the next chunk
+        self._remainder_sr = 0
+        self._last_rms: float | None = None          # last slice of the previous chunk (onsets)
+        self._level = 0.0
+        self._onset = 0.0
+        self._peak = SILENCE_RMS
+        self._flick_side = 1.0
+
+    @property
+    def speaking(self) -> bool:
+        """True while fed audio is still queued or the envelope hasn't decayed."""
+        return bool(self._envelope) or self._level >= 0.02
+
+    def feed(self, samples: np.ndarray, sample_rate: int) -> None:
+        """Queue the envelope of a chunk that is about to be pushed to the speaker."""
+        mono = samples[:, 0] if samples.ndim == 2 else samples
+        if len(self._remainder) and sample_rate == self._remainder_sr:
+            # Slices continue across chunks, so the envelope stays aligned with the audio.
+            mono = np.concatenate((self._remainder, mono))
+        whole = len(mono) - len(mono) % int(sample_rate * SPEECH_SLICE_S)
+        self._remainder, self._remainder_sr = mono[whole:].copy(), sample_rate
+        rms, onset = speech_envelope(mono[:whole], sample_rate, self._last_rms)
+        if not len(rms):
+            return
+        self._last_rms = float(rms[-1])
+        now = asyncio.get_running_loop().time()
+        start = max(now + SPEECH_OUTPUT_LATENCY_S, self._cursor)
+        times = start + np.arange(len(rms)) * SPEECH_SLICE_S
+        self._envelope.extend(zip(times.tolist(), rms.tolist(), onset.tolist()))
+        self._cursor = start + len(rms) * SPEECH_SLICE_S
+
+    def reset(self) -> None:
+        """Drop anything not yet audible (generation interrupted)."""
+        self._envelope.clear()
+        self._cursor = 0.0
+        self._remainder = np.zeros(0, np.float32)
+        self._last_rms = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        period = 1.0 / ANIMATION_RATE_HZ
+        decay = PEAK_DECAY_PER_S ** period
+        resting = True
+        try:
+            while True:
+                await asyncio.sleep(period)
+                now = loop.time()
+
+                rms, onset = 0.0, 0.0
+                while self._envelope and self._envelope[0][0] <= now:
+                    _, r, o = self._envelope.popleft()
+                    rms, onset = max(rms, r), max(onset, o)
+
+                self._peak = max(rms, self._peak * decay, SILENCE_RMS)
+                target = rms / self._peak if rms > SILENCE_RMS else 0.0
+                k = ENVELOPE_ATTACK if target > self._level else ENVELOPE_RELEASE
+                self._level += k * (target - self._level)
+                self._onset = max(onset / self._peak, self._onset * 0.5)
+                if onset > 0.5 * self._peak:
+                    self._flick_side = -self._flick_side
+
+                if self._level < 0.02 and self._onset < 0.02:
+                    if not resting:
+                        self._executor.set_offset()
+                        resting = True
+                    continue
+                resting = False
+
+                lift = ANTENNA_LIFT_RAD * self._level
+                flick = ANTENNA_FLICK_RAD * self._onset * self._flick_side
+                self._executor.set_offset(
+                    pitch_deg=HEAD_NOD_DEG * self._onset,
+                    roll_deg=HEAD_SWAY_ROLL_DEG * self._level * math.sin(2 * math.pi * HEAD_SWAY_HZ * now),
+                    antennas=(-lift + flick, lift + flick),
+                )
+        finally:
+            self._executor.set_offset()
@@ -0,0 +1,154 @@
+"""
+startup.py — concurrent boot with a time-to-ready timeline.
+
+main.run() starts every independent initialisation (Firebase, the Vertex
+client, the ReachyMini connection, the emotion library, the worksheet model)
+as a step at once; blocking constructors run in worker threads. Code that
+needs a component awaits get(name) right before first use, so BLE
+advertising starts immediately and each later state waits only for what it
+actually touches. Steps the robot can run without are awaited with
+get_optional(), so their failure degrades instead of ending the run.
+
+When the last step finishes, report() is logged — each step's start, end and
+duration on a shared time axis from boot — and every step's finish time is
+exported as baymin_startup_seconds{step=...}.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from log_config import get_logger
+from metrics import STARTUP_SECONDS
+
+
+logger = get_logger("startup")
+
+STARTUP_BAR_WIDTH = 40            # characters for the longest step in the text timeline
+
+
+@dataclass
+class StartupStep:
+    name: str
+    started_s: float              # seconds since boot
+    finished_s: float | None = None
+    error: str | None = None
+
+    @property
+    def duration_s(self) -> float:
+        return (self.finished_s or self.started_s) - self.started_s
+
+
+class Startup:
+    """Runs startup steps concurrently and records when each one finished."""
+
+    def __init__(self, trace=None) -> None:
+        self._t0 = time.monotonic()
+        self._trace = trace               # TraceWriter | None — gets one "startup" record when ready
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.steps: dict[str, StartupStep] = {}
+        self.marks: dict[str, float] = {}
+        self.ready_s: float | None = None
+        self._reporter: asyncio.Task | None = None
+        self._degraded: set[str] = set()   # optional steps whose failure was already logged
+
+    def _now(self) -> float:
+        return time.monotonic() - self._t0
+
+    def start(self, name: str, fn: Callable[..., Any], *args) -> asyncio.Task:
+        """Run fn(*args) as a step: coroutine functions on the loop, anything else in a thread."""
+        step = self.steps[name] = StartupStep(name, self._now())
+
+        async def _run():
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    return await fn(*args)
+                return await asyncio.to_thread(fn, *args)
+            except BaseException as e:
+                step.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                step.finished_s = self._now()
+
+        task = self._tasks[name] = asyncio.create_task(_run(), name=f"startup:{name}")
+        return task
+
+    def provide(self, name: str, value: Any) -> asyncio.Future:
+        """An already-built (injected) component: a zero-length step."""
+        now = self._now()
+        self.steps[name] = StartupStep(name, now, now)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._tasks[name] = future
+        return future
+
+    def task(self, name: str) -> asyncio.Future:
+        """The step's task, to hand to code that resolves it later (e.g. the BLE server)."""
+        return self._tasks[name]
+
+    async def get(self, name: str) -> Any:
+        """Wait for a step and return its result (re-raises its error)."""
+        return await self._tasks[name]
+
+    async def get_optional(self, name: str, default: Any = None) -> Any:
+        """Like get(), for a step the robot can run without: its failure is logged once and `default` returned."""
+        try:
+            return await self._tasks[name]
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if name not in self._degraded:
+                self._degraded.add(name)
+                logger.warning("Startup step %s failed (%s); continuing without it", name, self.steps[name].error)
+            return default
+
+    def mark(self, name: str) -> None:
+        """Record a milestone (first time only), e.g. "ble_advertising"."""
+        self.marks.setdefault(name, self._now())
+
+    def report_when_ready(self) -> asyncio.Task:
+        """Log the timeline and export the metrics once every step has finished."""
+        self._reporter = asyncio.create_task(self._report_when_ready(), name="startup_report")
+        return self._reporter
+
+    async def _report_when_ready(self) -> None:
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.ready_s = self._now()
+        for step in self.steps.values():
+            STARTUP_SECONDS.labels(step.name).set(step.finished_s)
+        STARTUP_SECONDS.labels("ready").set(self.ready_s)
+        logger.info("Startup timeline:\n%s", self.report())
+        if self._trace is not None:
+            self._trace.emit(
+                "startup",
+                ready_s=round(self.ready_s, 3),
+                steps={s.name: [round(s.started_s, 3), round(s.finished_s, 3)] for s in self.steps.values()},
+                marks={k: round(v, 3) for k, v in self.marks.items()},
+                errors={s.name: s.error for s in self.steps.values() if s.error},
+            )
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        if self._reporter is not None:
+            self._reporter.cancel()
+
+    def report(self) -> str:
+        end = max([self.ready_s or 0.0] + [s.finished_s or s.started_s for s in self.steps.values()])
+        scale = STARTUP_BAR_WIDTH / end if end > 0 else 0.0
+        lines = []
+        for step in sorted(self.steps.values(), key=lambda s: (s.started_s, s.name)):
+            pad = int(step.started_s * scale)
+            bar = "#" * max(1, int(step.duration_s * scale))
+            status = f"  FAILED {step.error}" if step.error else ""
+            lines.append(
+                f"  {step.name:<16} {step.started_s:6.2f}s → {step.finished_s or 0.0:6.2f}s "
+                f"({step.duration_s:5.2f}s) {' ' * pad}{bar}{status}"
+            )
+        for name, at in sorted(self.marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"  {name:<16} {at:6.2f}s")
+        lines.append(f"  {'ready':<16} {end:6.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tool_registry import TOOL_LATENCY, ToolLatencyStats, ToolSpec
+from tools import TOOL_REGISTRY, Tools
+from trace_writer import TraceWriter
+from latency import LatencyTracer
+from log_config import get_logger
+
+
+logger = get_logger("tools")
+
+TOOL_WORKERS = 4
+TOOL_DRAIN_TIMEOUT_S = 3.0
+
+
+class ToolExecutor:
+    """
+    Runs the model's function calls without holding up session.receive().
+
+    dispatch() returns immediately. How each call runs comes from its ToolSpec
+    in TOOL_REGISTRY: inline tools (motion) run on the loop in call order,
+    everything else becomes its own task — coroutine and other non-blocking
+    tools on the loop, blocking (Firestore) tools in a small thread pool —
+    bounded by the spec's timeout, with its fallback result sent on timeout
+    or error. Each result is sent with send_tool_response the moment it is
+    ready, so a slow capture_image no longer delays the answer to a quick
+    tool in the same message, and audio keeps streaming meanwhile.
+    """
+
+    def __init__(
+        self,
+        session,
+        tools: Tools,
+        workers: int = TOOL_WORKERS,
+        stats: ToolLatencyStats = TOOL_LATENCY,
+        trace: TraceWriter | None = None,
+        tracer: LatencyTracer | None = None,
+    ) -> None:
+        self._session = session
+        self._tools = tools
+        self._stats = stats
+        self._trace = trace
+        self._tracer = tracer
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tool")
+        self._tasks: set[asyncio.Task] = set()
+
+    def dispatch(self, calls) -> None:
+        """Start every call in a tool_call message."""
+        inline = []
+        for call in calls:
+            logger.debug("TOOL CALL: %s", call)
+            spec = TOOL_REGISTRY.get(call.name)
+            if spec is None:
+                inline.append(self._response(call, f"Unknown tool {call.name}"))
+            elif spec.inline:
+                inline.append(self._response(call, self._run_inline(spec, call)))
+            else:
+                self._spawn(self._run(spec, call))
+        if inline:
+            self._spawn(self._send(inline))
+
+    async def drain(self, timeout: float = TOOL_DRAIN_TIMEOUT_S) -> None:
+        """Wait (bounded) for in-flight calls, e.g. so end_conversation's reply goes out."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    async def close(self) -> None:
+        """Cancel in-flight calls and release the pool (threads already running finish on their own)."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        summary = self._stats.summary()
+        if summary:
+            logger.info("Latency so far:\n%s", summary)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _run_inline(self, spec: ToolSpec, call) -> str:
+        t0 = time.perf_counter()
+        outcome = "ok"
+        try:
+            result = getattr(self._tools, spec.name)(**(dict(call.args) if call.args else {}))
+        except Exception as e:
+            logger.warning("%s failed: %s", spec.name, e)
+            result, outcome = f"{spec.name} failed", "error"
+        self._record(spec, call, time.perf_counter() - t0, outcome, result)
+        return result
+
+    async def _run(self, spec: ToolSpec, call) -> None:
+        fn = getattr(self._tools, spec.name)
+        kwargs = dict(call.args) if call.args else {}
+        t0 = time.perf_counter()
+        outcome = "ok"
+        try:
+            if spec.is_async:
+                result = await asyncio.wait_for(fn(**kwargs), spec.timeout_s)
+            elif not spec.blocking:
+                result = fn(**kwargs)   # cheap but not order-sensitive: on the loop, in its own task
+            else:
+                loop = asyncio.get_running_loop()
+                fut = loop.run_in_executor(self._pool, functools.partial(fn, **kwargs))
+                result = await asyncio.wait_for(fut, spec.timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning("%s timed out after %.1fs — sending fallback", spec.name, spec.timeout_s)
+            result, outcome = spec.fallback, "timeout"
+        except Exception as e:
+            logger.warning("%s failed: %s", spec.name, e)
+            result, outcome = spec.fallback, "error"
+        self._record(spec, call, time.perf_counter() - t0, outcome, result)
+        await self._send([self._response(call, result)])
+
+    def _record(self, spec: ToolSpec, call, seconds: float, outcome: str, result) -> None:
+        self._stats.record(spec, seconds, outcome)
+        if self._tracer is not None:
+            self._tracer.tool_finished(spec.name, seconds)
+        if self._trace is not None:
+            self._trace.emit(
+                "tool_result", id=call.id, name=spec.name, ms=round(seconds * 1000, 1),
+                outcome=outcome, result=str(result)[:200],
+            )
+
+    @staticmethod
+    def _response(call, result) -> dict:
+        logger.debug("TOOL RESULT: %s", result)
+        return {"id": call.id, "name": call.name, "response": {"result": result}}
+
+    async def _send(self, responses: list[dict]) -> None:
+        try:
+            await self._session.send_tool_response(function_responses=responses)
+        except Exception as e:
+            logger.warning("send_tool_response failed: %s", e)
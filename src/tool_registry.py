@@ -0,0 +1,168 @@
+"""
+tool_registry.py — one declarative source of truth for the model's tools.
+
+Each Tools method that the model may call is decorated with @tool(...), which
+attaches a ToolSpec: the Live function declaration plus how the ToolExecutor
+must run it (inline / blocking / async), its timeout, fallback result and
+latency budget. ToolRegistry.from_class() collects and validates the specs
+once at import, and build_live_config() and the executor are both generated
+from the registry, so a schema can no longer drift from the method it calls.
+"""
+
+from __future__ import annotations
+
+import inspect
+from dataclasses import dataclass
+
+from latency import LatencyHistogram
+from log_config import get_logger
+from metrics import TOOL_LATENCY_SECONDS, TOOL_OUTCOMES
+
+
+logger = get_logger("tools")
+
+TOOL_DEFAULT_TIMEOUT_S = 8.0
+TOOL_DEFAULT_BUDGET_S = 1.0
+TOOL_DEFAULT_FALLBACK = "The tool didn't finish in time."
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """How one tool is declared to the model and executed locally."""
+    name: str
+    declaration: dict
+    inline: bool = False          # cheap and order-sensitive: run on the loop, in call order
+    blocking: bool = False        # synchronous I/O (Firestore): run in the tool thread pool
+    is_async: bool = False        # coroutine method: awaited on the loop
+    timeout_s: float = TOOL_DEFAULT_TIMEOUT_S
+    budget_s: float = TOOL_DEFAULT_BUDGET_S   # calls slower than this are logged
+    fallback: str = TOOL_DEFAULT_FALLBACK
+
+
+def tool(
+    declaration: dict | None = None,
+    *,
+    inline: bool = False,
+    blocking: bool = False,
+    timeout_s: float = TOOL_DEFAULT_TIMEOUT_S,
+    budget_s: float = TOOL_DEFAULT_BUDGET_S,
+    fallback: str = TOOL_DEFAULT_FALLBACK,
+):
+    """Register a Tools method. The declaration's name defaults to the method name."""
+    def wrap(fn):
+        decl = dict(declaration or {})
+        decl.setdefault("name", fn.__name__)
+        fn._tool_spec = ToolSpec(
+            name=fn.__name__,
+            declaration=decl,
+            inline=inline,
+            blocking=blocking,
+            is_async=inspect.iscoroutinefunction(fn),
+            timeout_s=timeout_s,
+            budget_s=budget_s,
+            fallback=fallback,
+        )
+        return fn
+    return wrap
+
+
+class ToolRegistry:
+    """Validated set of ToolSpecs collected from a Tools class."""
+
+    def __init__(self, specs: list[ToolSpec]) -> None:
+        self._specs = {spec.name: spec for spec in specs}
+
+    @classmethod
+    def from_class(cls, tools_cls: type) -> ToolRegistry:
+        specs = []
+        problems = []
+        for fn in vars(tools_cls).values():  # definition order, so the declarations keep it too
+            spec = getattr(fn, "_tool_spec", None)
+            if spec is None:
+                continue
+            specs.append(spec)
+            problems += _check_spec(spec, fn)
+        if problems:
+            raise ValueError(f"Invalid tool registry for {tools_cls.__name__}:\n  " + "\n  ".join(problems))
+        return cls(specs)
+
+    def get(self, name: str) -> ToolSpec | None:
+        return self._specs.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    def function_declarations(self) -> list[dict]:
+        return [spec.declaration for spec in self._specs.values()]
+
+
+def _check_spec(spec: ToolSpec, fn) -> list[str]:
+    problems = []
+    decl = spec.declaration
+    if decl.get("name") != spec.name:
+        problems.append(f"{spec.name}: declaration is named {decl.get('name')!r}")
+    if not decl.get("description"):
+        problems.append(f"{spec.name}: declaration has no description")
+    if spec.inline and (spec.blocking or spec.is_async):
+        problems.append(f"{spec.name}: inline tools must be plain synchronous methods")
+    if spec.blocking and spec.is_async:
+        problems.append(f"{spec.name}: a coroutine can't be blocking")
+    if spec.timeout_s <= 0 or spec.budget_s <= 0 or spec.budget_s > spec.timeout_s:
+        problems.append(f"{spec.name}: need 0 < budget_s <= timeout_s")
+
+    params = {
+        p.name: p for p in list(inspect.signature(fn).parameters.values())[1:]
+        if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+    }
+    schema = decl.get("parameters") or {}
+    props = schema.get("properties", {})
+    for prop in props:
+        if prop not in params:
+            problems.append(f"{spec.name}: schema property {prop!r} is not a parameter")
+    for req in schema.get("required", []):
+        if req not in props:
+            problems.append(f"{spec.name}: required {req!r} is not a schema property")
+    for p in params.values():
+        if p.default is inspect.Parameter.empty and p.name not in schema.get("required", []):
+            problems.append(f"{spec.name}: parameter {p.name!r} has no default but isn't required")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# Latency stats
+# ---------------------------------------------------------------------------
+
+class ToolLatencyStats:
+    """Per-tool latency histograms plus timeout/error/over-budget counters."""
+
+    def __init__(self) -> None:
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.timeouts: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.over_budget: dict[str, int] = {}
+
+    def record(self, spec: ToolSpec, seconds: float, outcome: str = "ok") -> None:
+        self.histograms.setdefault(spec.name, LatencyHistogram()).record(seconds)
+        TOOL_LATENCY_SECONDS.labels(spec.name).observe(seconds)
+        TOOL_OUTCOMES.labels(spec.name, outcome).inc()
+        if outcome == "timeout":
+            self.timeouts[spec.name] = self.timeouts.get(spec.name, 0) + 1
+        elif outcome == "error":
+            self.errors[spec.name] = self.errors.get(spec.name, 0) + 1
+        if seconds > spec.budget_s:
+            self.over_budget[spec.name] = self.over_budget.get(spec.name, 0) + 1
+            logger.warning("%s took %.0f ms (budget %.0f ms)", spec.name, seconds * 1000, spec.budget_s * 1000)
+
+    def summary(self) -> str:
+        lines = []
+        for name, h in sorted(self.histograms.items(), key=lambda kv: -kv[1].max_s):
+            lines.append(
+                f"{name:<22} n={h.n:<4} p50={h.percentile(0.5) * 1000:>6.0f}ms "
+                f"p95={h.percentile(0.95) * 1000:>6.0f}ms max={h.max_s * 1000:>6.0f}ms "
+                f"over_budget={self.over_budget.get(name, 0)} timeouts={self.timeouts.get(name, 0)} "
+                f"errors={self.errors.get(name, 0)}"
+            )
+        return "\n".join(lines)
+
+
+TOOL_LATENCY = ToolLatencyStats()
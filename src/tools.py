@@ -1,24 +1,45 @@
 import asyncio
 import random
 
+from google import genai
+
+from face_tracker import face_offset_to_angles
 from firebase_helper import FirebaseHelper
 from motion import (
     enqueue_head_command, enqueue_pose_command, enqueue_emotion_command,
     enqueue_return_home_command,
-    EMOTION_CATEGORIES, ALL_EMOTION_NAMES,
+    EMOTION_CATEGORIES, ALL_EMOTION_NAMES, MotionPlanner,
+    MOVE_HEAD_TOOL_DECLARATION, SET_POSE_TOOL_DECLARATION,
+    PLAY_EMOTION_TOOL_DECLARATION, RETURN_HOME_TOOL_DECLARATION,
 )
+from tool_registry import ToolRegistry, tool
+
+# capture_image: let queued motion (set_pose/emotion) finish before the snapshot,
+# then send multiple frames so Gemini has more than one chance to read the iPad.
+CAPTURE_MOTION_SETTLE_S = 1.2
+CAPTURE_NUM_FRAMES = 3
+CAPTURE_FRAME_SPACING_S = 0.35
+
+# Local worksheet reading: above SKIP the text replaces the photos entirely,
+# above HINT it is sent alongside them.
+OCR_SKIP_IMAGE_CONFIDENCE = 0.90
+OCR_HINT_CONFIDENCE = 0.60
 
 
 class Tools:
-    def __init__(self, firebase: FirebaseHelper, motion_queue: asyncio.Queue, vision=None):
+    def __init__(self, firebase: FirebaseHelper, motion_planner: MotionPlanner, vision=None, face_tracker=None, session=None, summary=None):
         self.firebase = firebase
-        self.motion_queue = motion_queue
+        self.motion_planner = motion_planner
         self.vision = vision  # ReachyVision | None
+        self.face_tracker = face_tracker  # FaceTracker | None
+        self.session = session  # Gemini Live session, for capture_image frames
+        self.summary = summary  # SessionSummary | None
 
     # ------------------------------------------------------------------
     # Motion
     # ------------------------------------------------------------------
 
+    @tool(MOVE_HEAD_TOOL_DECLARATION, inline=True, budget_s=0.01)
     def move_head(
         self,
         direction: str,
@@ -26,9 +47,10 @@ class Tools:
         steps: int | None = None,
         cue: str | None = None,
     ) -> str:
-        enqueue_head_command(self.motion_queue, direction, intensity, steps, cue)
+        enqueue_head_command(self.motion_planner, direction, intensity, steps, cue)
         return ""
 
+    @tool(SET_POSE_TOOL_DECLARATION, inline=True, budget_s=0.01)
     def set_pose(
         self,
         yaw_deg: float = 0.0,
@@ -43,7 +65,7 @@ class Tools:
         return_mode: str = "auto",
     ) -> str:
         enqueue_pose_command(
-            self.motion_queue,
+            self.motion_planner,
             yaw_deg=yaw_deg,
             pitch_deg=pitch_deg,
             roll_deg=roll_deg,
@@ -57,6 +79,7 @@ class Tools:
         )
         return ""
 
+    @tool(PLAY_EMOTION_TOOL_DECLARATION, inline=True, budget_s=0.01)
     def play_emotion(
         self,
         category: str | None = None,
@@ -69,32 +92,50 @@ class Tools:
             name = random.choice(EMOTION_CATEGORIES[category])
         else:
             return "Unknown emotion"
-        enqueue_emotion_command(self.motion_queue, name)
+        enqueue_emotion_command(self.motion_planner, name)
         return ""
 
+    @tool(RETURN_HOME_TOOL_DECLARATION, inline=True, budget_s=0.01)
     def return_home(self) -> str:
-        enqueue_return_home_command(self.motion_queue)
+        enqueue_return_home_command(self.motion_planner)
         return ""
 
+    @tool(
+        {
+            "description": (
+                "Detect where the student's face is in your camera view. "
+                "Returns a description of their position (left/right/above/below center) "
+                "and suggested yaw_deg/pitch_deg adjustments to center on them. "
+                "Use this at the start of a session, after large turns, or before capturing work."
+            ),
+        },
+        timeout_s=3.0, budget_s=0.5, fallback="Face position unavailable right now.",
+    )
     async def get_face_position(self) -> str:
         """Returns where the student's face is in the camera view plus suggested head adjustment."""
-        if self.vision is None:
-            return "Vision not available"
-        face = await self.vision.get_face_center()
-        if face is None:
-            return "No face detected — student may be out of frame or camera still warming up"
-        u, v = face
-        async with self.vision._lock:
-            frame = self.vision._latest_frame_raw
-        if frame is None:
-            return "No frame available"
-        h, w = frame.shape[:2]
-        # Normalize to [-1, 1]: -1=left/top edge, 0=center, +1=right/bottom edge
-        nx = (u / w - 0.5) * 2
-        ny = (v / h - 0.5) * 2
-        # Approximate angle to center the face (camera ~70° HFOV, ~55° VFOV)
-        yaw_adjust = round(-nx * 32)   # positive=turn head left, negative=turn right
-        pitch_adjust = round(ny * 25)  # positive=look down, negative=look up
+        if self.face_tracker is not None:
+            # Instant read of the tracker's smoothed position — no detection on this call.
+            face = self.face_tracker.get_position()
+            if face is None:
+                return "No face detected — student may be out of frame or camera still warming up"
+            nx, ny = face.nx, face.ny
+        else:
+            if self.vision is None:
+                return "Vision not available"
+            face = await self.vision.get_face_center()
+            if face is None:
+                return "No face detected — student may be out of frame or camera still warming up"
+            u, v = face
+            frame, _, _ = await self.vision.get_latest_frame()
+            if frame is None:
+                return "No frame available"
+            h, w = frame.shape[:2]
+            # Normalize to [-1, 1]: -1=left/top edge, 0=center, +1=right/bottom edge
+            nx = (u / w - 0.5) * 2
+            ny = (v / h - 0.5) * 2
+        yaw_adjust, pitch_adjust = face_offset_to_angles(nx, ny)
+        yaw_adjust = round(yaw_adjust)      # positive=turn head left, negative=turn right
+        pitch_adjust = round(pitch_adjust)  # positive=look down, negative=look up
         horiz = ("to your left" if nx < -0.15 else "to your right" if nx > 0.15 else None)
         vert = ("above center" if ny < -0.15 else "below center" if ny > 0.15 else None)
         pos_parts = [p for p in [horiz, vert] if p]
@@ -107,18 +148,83 @@ class Tools:
             f"from your current head position."
         )
 
+    @tool(
+        {
+            "description": "Capture a photo from the front-facing camera and see what is in front of you. Call this when you need to look at something or when the student asks you to look at something."
+        },
+        timeout_s=10.0, budget_s=3.0, fallback="No image available.",
+    )
+    async def capture_image(self) -> str:
+        # Let any queued set_pose / play_emotion settle before grabbing frames.
+        await asyncio.sleep(CAPTURE_MOTION_SETTLE_S)
+
+        vision = self.vision
+        reading = await vision.read_worksheet() if vision else None
+        if reading is not None and reading.confidence < OCR_HINT_CONFIDENCE:
+            reading = None
+        if reading is not None and reading.confidence >= OCR_SKIP_IMAGE_CONFIDENCE:
+            return (
+                f"Read the student's work locally (confidence {reading.confidence:.2f}):\n"
+                f"{reading.text}"
+            )
+
+        frames_sent = 0
+        for i in range(CAPTURE_NUM_FRAMES):
+            frame_bytes = await vision.get_latest_frame_bytes() if vision else None
+            if frame_bytes and self.session is not None:
+                await self.session.send_realtime_input(
+                    video=genai.types.Blob(data=frame_bytes, mime_type="image/jpeg")
+                )
+                frames_sent += 1
+            if i < CAPTURE_NUM_FRAMES - 1:
+                await asyncio.sleep(CAPTURE_FRAME_SPACING_S)
+
+        if frames_sent > 0:
+            result = f"OK — {frames_sent} frames sent."
+        else:
+            result = "No image available."
+        if reading is not None:
+            result += (
+                f" Local reading of the student's work (confidence {reading.confidence:.2f}, "
+                f"check it against the image):\n{reading.text}"
+            )
+        return result
+
     # ------------------------------------------------------------------
     # Lesson flow
     # ------------------------------------------------------------------
 
+    @tool(
+        {
+            "description": "move on to the next example question in the current module. No arguments. Returns the question, answer, and steps to walk through to get to the answer."
+        },
+        blocking=True, timeout_s=6.0, budget_s=0.2,   # served from the prefetched list
+        fallback="Couldn't load the next question right now. Try again in a moment.",
+    )
     def next_example_question(self) -> str:
         self.firebase.log_message("system", "next example question")
-        return self.firebase.get_next_example_question()
+        question, served = self.firebase.get_next_example_question()
+        if self.summary is not None and served:
+            self.summary.on_question_served(question)
+        return question
 
+    @tool({"description": "Start the module's quiz. No arguments."}, blocking=True, timeout_s=4.0)
     def start_quiz(self) -> str:
         self.firebase.log_message("system", "start quiz")
+        if self.summary is not None:
+            self.summary.on_quiz_started()
         return "Quiz started"
 
+    @tool(
+        {
+            "description": "End the conversation. Gemini Live will stop generating and close the session after calling this."
+        },
+        blocking=True, timeout_s=4.0,
+    )
     def end_conversation(self) -> str:
         self.firebase.log_message("system", "end conversation")
         return "Conversation ended"
+
+
+# Validated once at import: a schema/signature mismatch fails at startup, not mid-lesson.
+TOOL_REGISTRY = ToolRegistry.from_class(Tools)
@@ -0,0 +1,167 @@
+"""
+trace_analysis.py — replay and summarize traces written by trace_writer.py.
+
+    python trace_analysis.py traces/                 # per-turn latency table + percentiles
+    python trace_analysis.py traces/ --timeline      # replay every record in order
+    python trace_analysis.py trace-....jsonl.gz --session 20261019-150334-3
+
+Session ids are "<boot>-<n>" (boot time, then the session count in that
+boot); --timeline shows them. Traces from before that used bare numbers,
+which --session still accepts.
+
+Response latency is measured from the last input transcription of a turn
+(the student's final words as the server heard them) to the first audio
+chunk of BAY-min's answer. Tool latency comes from the executor's
+tool_result records.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import statistics
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+
+@dataclass
+class Turn:
+    session: str
+    start: float
+    user_text: str = ""
+    user_end: float | None = None
+    first_audio: float | None = None
+    end: float | None = None
+    audio_bytes: int = 0
+    tools: list[str] = field(default_factory=list)
+    interrupted: bool = False
+
+    @property
+    def response_latency(self) -> float | None:
+        if self.user_end is None or self.first_audio is None or self.first_audio < self.user_end:
+            return None
+        return self.first_audio - self.user_end
+
+
+def iter_records(paths: list[Path]):
+    files: list[Path] = []
+    for p in paths:
+        if p.is_dir():
+            files += sorted(p.glob("trace-*.jsonl*"))
+        else:
+            files.append(p)
+    for path in sorted(files, key=lambda f: f.name):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of a crashed run
+
+
+def session_id(rec: dict) -> str:
+    """The record's session id as a string (older traces used plain numbers)."""
+    return str(rec.get("session", 0))
+
+
+def build_turns(records) -> tuple[list[Turn], dict[str, list[float]]]:
+    turns: list[Turn] = []
+    tool_ms: dict[str, list[float]] = {}
+    current: Turn | None = None
+    for rec in records:
+        kind = rec.get("kind")
+        if kind == "tool_result":
+            tool_ms.setdefault(rec.get("name", "?"), []).append(rec.get("ms", 0.0))
+            continue
+        if kind == "session_start":
+            current = None
+            continue
+        if kind != "server":
+            continue
+        t = rec["t"]
+        if current is None or current.session != session_id(rec):
+            current = Turn(session=session_id(rec), start=t)
+        if "input_text" in rec:
+            current.user_text += rec["input_text"]
+            current.user_end = t
+        if rec.get("audio_chunks"):
+            current.audio_bytes += rec.get("audio_bytes", 0)
+            if current.first_audio is None or (current.user_end is not None and current.first_audio < current.user_end):
+                current.first_audio = t
+        for call in rec.get("tool_calls", []):
+            current.tools.append(call.get("name", "?"))
+        if rec.get("interrupted"):
+            current.interrupted = True
+        if rec.get("turn_complete"):
+            current.end = t
+            turns.append(current)
+            current = None
+    return turns, tool_ms
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def print_report(turns: list[Turn], tool_ms: dict[str, list[float]]) -> None:
+    print(f"{'session':>17} {'turn':>4} {'resp ms':>8} {'speak s':>7} {'tools':<28} student")
+    for i, turn in enumerate(turns, 1):
+        lat = turn.response_latency
+        speak = (turn.end - turn.first_audio) if turn.first_audio and turn.end else None
+        print(
+            f"{turn.session:>17} {i:>4} "
+            f"{lat * 1000 if lat is not None else float('nan'):>8.0f} "
+            f"{speak if speak is not None else float('nan'):>7.1f} "
+            f"{','.join(turn.tools)[:28]:<28} "
+            f"{turn.user_text.strip()[:60]}{' [interrupted]' if turn.interrupted else ''}"
+        )
+
+    latencies = [t.response_latency * 1000 for t in turns if t.response_latency is not None]
+    print()
+    if latencies:
+        print(
+            f"response latency over {len(latencies)} turns: "
+            f"p50={_pct(latencies, 50):.0f}ms p90={_pct(latencies, 90):.0f}ms "
+            f"p99={_pct(latencies, 99):.0f}ms max={max(latencies):.0f}ms"
+        )
+    for name, values in sorted(tool_ms.items()):
+        print(f"tool {name:<22} n={len(values):<4} p50={_pct(values, 50):.0f}ms p90={_pct(values, 90):.0f}ms max={max(values):.0f}ms")
+
+
+def print_timeline(records) -> None:
+    start = None
+    for rec in records:
+        start = rec["t"] if start is None else start
+        stamp = datetime.fromtimestamp(rec["t"]).strftime("%H:%M:%S.%f")[:-3]
+        fields = {k: v for k, v in rec.items() if k not in ("t", "kind", "session", "audio_b64")}
+        print(f"{stamp} +{rec['t'] - start:8.3f}s s{session_id(rec)} {rec['kind']:<13} {json.dumps(fields)[:160]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-turn latency from BAY-min session traces.")
+    parser.add_argument("paths", nargs="+", type=Path, help="trace files or directories")
+    parser.add_argument("--session", help="only this session id (<boot>-<n>, as in --timeline)")
+    parser.add_argument("--timeline", action="store_true", help="print every record in order instead")
+    args = parser.parse_args()
+
+    records = iter_records(args.paths)
+    if args.session is not None:
+        records = (r for r in records if session_id(r) == args.session)
+    if args.timeline:
+        print_timeline(records)
+        return
+    turns, tool_ms = build_turns(records)
+    print_report(turns, tool_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+trace_writer.py — compact JSONL traces of Live sessions.
+
+Replaces the old gemini_live_responses.txt dump. Every server message (and a
+few client-side events) becomes one small JSON record — timestamp, type,
+sizes, tool names, transcripts — queued without blocking the event loop and
+written by a background task. Files rotate by size and rotated segments are
+gzip-compressed; the oldest are deleted. Raw audio is only included when
+BAYMIN_TRACE_AUDIO=true. Analyze the output with trace_analysis.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from log_config import get_logger
+
+
+logger = get_logger("trace")
+
+TRACE_DIR = Path(os.getenv("BAYMIN_TRACE_DIR", "traces"))
+TRACE_INCLUDE_AUDIO = os.getenv("BAYMIN_TRACE_AUDIO", "false").lower() == "true"
+TRACE_QUEUE_MAX = 2000            # records; beyond this new ones are dropped (and counted)
+TRACE_ROTATE_BYTES = 16 * 1024 * 1024
+TRACE_KEEP_FILES = 30
+TRACE_FLUSH_INTERVAL_S = 1.0
+TRACE_TEXT_CHARS = 500            # transcripts / tool results are clipped to this
+
+
+def _clip(text, limit: int = TRACE_TEXT_CHARS):
+    if text is None:
+        return None
+    text = str(text)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def summarize_server_message(response, include_audio: bool = TRACE_INCLUDE_AUDIO) -> dict:
+    """Reduce a LiveServerMessage to the fields worth tracing."""
+    rec: dict = {}
+    sc = response.server_content
+    if sc is not None:
+        audio_bytes = 0
+        chunks = 0
+        audio = []
+        for part in (sc.model_turn.parts if sc.model_turn and sc.model_turn.parts else []):
+            data = part.inline_data.data if part.inline_data else None
+            if isinstance(data, (bytes, bytearray)):
+                audio_bytes += len(data)
+                chunks += 1
+                if include_audio:
+                    audio.append(base64.b64encode(data).decode("ascii"))
+        if chunks:
+            rec["audio_bytes"] = audio_bytes
+            rec["audio_chunks"] = chunks
+        if audio:
+            rec["audio_b64"] = audio
+        if sc.input_transcription and sc.input_transcription.text:
+            rec["input_text"] = _clip(sc.input_transcription.text)
+        if sc.output_transcription and sc.output_transcription.text:
+            rec["output_text"] = _clip(sc.output_transcription.text)
+        for flag in ("turn_complete", "generation_complete", "interrupted"):
+            if getattr(sc, flag, None):
+                rec[flag] = True
+    if response.tool_call and response.tool_call.function_calls:
+        rec["tool_calls"] = [
+            {"id": c.id, "name": c.name, "args": dict(c.args) if c.args else {}}
+            for c in response.tool_call.function_calls
+        ]
+    if response.tool_call_cancellation and response.tool_call_cancellation.ids:
+        rec["tool_cancel_ids"] = list(response.tool_call_cancellation.ids)
+    usage = response.usage_metadata
+    if usage is not None:
+        rec["tokens"] = {"prompt": usage.prompt_token_count, "total": usage.total_token_count}
+    if response.go_away is not None:
+        rec["go_away"] = str(response.go_away.time_left)
+    if response.session_resumption_update is not None:
+        rec["resumable"] = bool(response.session_resumption_update.resumable)
+    if response.setup_complete is not None:
+        rec["setup_complete"] = True
+    return rec
+
+
+class TraceWriter:
+    """Bounded, non-blocking JSONL trace sink with size rotation and gzip of old segments."""
+
+    def __init__(self, directory: Path = TRACE_DIR, rotate_bytes: int = TRACE_ROTATE_BYTES, keep: int = TRACE_KEEP_FILES) -> None:
+        self._dir = Path(directory)
+        self._rotate_bytes = rotate_bytes
+        self._keep = keep
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=TRACE_QUEUE_MAX)
+        self._io_lock = threading.Lock()   # run() may be cancelled mid-write while close() flushes
+        self._file = None
+        self._path: Path | None = None
+        # Session ids are "<boot>-<n>" so sessions from different boots never
+        # share an id when traces are analyzed or replayed together.
+        self._boot = f"{datetime.now():%Y%m%d-%H%M%S}"
+        self._session_count = 0
+        self._session = f"{self._boot}-0"   # records before the first session
+        self.dropped = 0
+
+    # --- Producers (event loop, never block) ---
+
+    def emit(self, kind: str, **fields) -> None:
+        rec = {"t": round(time.time(), 4), "kind": kind, "session": self._session, **fields}
+        try:
+            self._queue.put_nowait(json.dumps(rec, separators=(",", ":"), default=str))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def emit_server_message(self, response) -> None:
+        self.emit("server", **summarize_server_message(response))
+
+    def start_session(self, **fields) -> None:
+        self._session_count += 1
+        self._session = f"{self._boot}-{self._session_count}"
+        self.emit("session_start", boot=self._boot, number=self._session_count, **fields)
+
+    # --- Background writer ---
+
+    async def run(self) -> None:
+        """Drain the queue in batches; the file I/O runs in a worker thread."""
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await asyncio.to_thread(self._write, batch)
+            await asyncio.sleep(TRACE_FLUSH_INTERVAL_S)
+
+    async def close(self) -> None:
+        """Flush whatever is still queued and close the file (after cancelling run())."""
+        remaining = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        await asyncio.to_thread(self._write, remaining)
+        await asyncio.to_thread(self._close_file)
+        if self._path is not None:
+            dropped = f", {self.dropped} records dropped" if self.dropped else ""
+            logger.info("Closed %s%s", self._path, dropped)
+
+    # --- Worker-thread side ---
+
+    def _write(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        with self._io_lock:
+            if self._file is None:
+                self._open_new()
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            if self._file.tell() >= self._rotate_bytes:
+                self._rotate()
+
+    def _open_new(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._path = self._dir / f"trace-{datetime.now():%Y%m%d-%H%M%S-%f}.jsonl"
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        path = self._path
+        self._file.close()
+        self._file = None
+        with open(path, "rb") as src, gzip.open(str(path) + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        path.unlink()
+        segments = sorted(self._dir.glob("trace-*.jsonl*"))
+        for old in segments[: max(0, len(segments) - self._keep)]:
+            old.unlink(missing_ok=True)
+
+    def _close_file(self) -> None:
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
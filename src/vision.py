@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
-import cv2
 import numpy as np
 from reachy_mini import ReachyMini
 from reachy_mini.media.camera_constants import CameraResolution
 
-logger = logging.getLogger(__name__)
+from lazy_import import lazy_import
+from log_config import get_logger
+from metrics import FRAMES_CAPTURED, FRAMES_ENCODED
+from vision_worker import VisionWorker
+
+logger = get_logger("vision")
+cv2 = lazy_import("cv2")
 
 VISION_CAPTURE_INTERVAL_S = 0.5  # internal grab rate (~2 fps)
 VISION_JPEG_QUALITY = 98         # high quality for reading text on paper
@@ -17,6 +24,15 @@ VISION_JPEG_QUALITY = 98         # high quality for reading text on paper
 FACE_DETECT_SCALE = (320, 240)   # downscale for fast detection
 FACE_MIN_SIZE = (40, 40)
 
+# --- Worksheet recognition (optional on-device pre-pass for capture_image) ---
+WORKSHEET_OCR_MODEL_ENV = "WORKSHEET_OCR_MODEL"  # path to an ONNX glyph classifier
+WORKSHEET_OCR_SYMBOLS = "0123456789+-x/="        # class order of the model's output
+WORKSHEET_OCR_INPUT_SIZE = 28                    # model input is 1x28x28 grayscale
+WORKSHEET_CROP_WIDTH = 1024                      # worksheet is rectified to this width
+WORKSHEET_MIN_AREA_FRAC = 0.10                   # paper/iPad must cover this much of the frame
+GLYPH_MIN_HEIGHT_FRAC = 0.02                     # ink blobs smaller than this are noise
+GLYPH_MAX_HEIGHT_FRAC = 0.30
+
 # Preferred resolutions, ordered by preference — highest res first.
 # The camera reports: 1920x1080@60, 3840x2592@30, 3840x2160@30, 3264x2448@30
 PREFERRED_RESOLUTIONS = [
@@ -30,18 +46,227 @@ PREFERRED_RESOLUTIONS = [
 ]
 
 
+def load_face_cascade() -> cv2.CascadeClassifier:
+    """OpenCV Haar cascade for frontal faces (lightweight, no extra deps)."""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def detect_face_box(cascade: cv2.CascadeClassifier, frame: np.ndarray) -> tuple[int, int, int, int] | None:
+    """Detect the largest face and return its (x, y, w, h) box in original frame coordinates."""
+    h_orig, w_orig = frame.shape[:2]
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, FACE_DETECT_SCALE)
+
+    faces = cascade.detectMultiScale(
+        small, scaleFactor=1.1, minNeighbors=4, minSize=FACE_MIN_SIZE,
+    )
+    if len(faces) == 0:
+        return None
+
+    areas = [w * h for (_, _, w, h) in faces]
+    idx = int(np.argmax(areas))
+    x, y, w, h = faces[idx]
+
+    scale_x = w_orig / FACE_DETECT_SCALE[0]
+    scale_y = h_orig / FACE_DETECT_SCALE[1]
+    return (int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y))
+
+
+@dataclass
+class WorksheetReading:
+    """Text recognized on the student's worksheet, one line per written line."""
+    text: str
+    confidence: float  # 0..1, the weakest glyph's probability
+
+
+class WorksheetRecognizer(ABC):
+    """Interface for the local recognition pre-pass. Runs in an executor thread."""
+
+    @abstractmethod
+    def recognize(self, frame: np.ndarray) -> WorksheetReading | None:
+        """The reading on the worksheet in `frame`, or None if nothing legible was found."""
+
+
+class StubRecognizer(WorksheetRecognizer):
+    """Returns a fixed reading — for tests and for running without a model."""
+
+    def __init__(self, text: str = "", confidence: float = 0.0) -> None:
+        self.reading = WorksheetReading(text, confidence) if text else None
+
+    def recognize(self, frame: np.ndarray) -> WorksheetReading | None:
+        return self.reading
+
+
+class DigitRecognizer(WorksheetRecognizer):
+    """
+    Handwritten arithmetic reader: crops the worksheet, segments ink blobs into
+    lines of glyphs and classifies every glyph in one batch with a small ONNX
+    model (MNIST-style, classes in WORKSHEET_OCR_SYMBOLS order) on the CPU.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        self._net = cv2.dnn.readNetFromONNX(model_path)
+
+    def recognize(self, frame: np.ndarray) -> WorksheetReading | None:
+        sheet = crop_worksheet(frame)
+        lines = _segment_glyphs(sheet)
+        glyphs = [g for line in lines for g in line]
+        if not glyphs:
+            return None
+
+        blob = cv2.dnn.blobFromImages(glyphs, scalefactor=1.0 / 255.0)
+        self._net.setInput(blob)
+        scores = self._net.forward().reshape(len(glyphs), -1)
+        if scores.shape[1] != len(WORKSHEET_OCR_SYMBOLS):
+            return None
+        # Accept both logits and probabilities from the model.
+        if not np.allclose(scores.sum(axis=1), 1.0, atol=1e-3):
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores /= scores.sum(axis=1, keepdims=True)
+        best = scores.argmax(axis=1)
+        probs = scores[np.arange(len(glyphs)), best]
+
+        out_lines, i = [], 0
+        for line in lines:
+            out_lines.append("".join(WORKSHEET_OCR_SYMBOLS[k] for k in best[i:i + len(line)]))
+            i += len(line)
+        return WorksheetReading("\n".join(out_lines), float(probs.min()))
+
+
+def load_worksheet_recognizer() -> WorksheetRecognizer | None:
+    """Build the recognizer named by $WORKSHEET_OCR_MODEL, or None when unset / unloadable."""
+    model_path = os.getenv(WORKSHEET_OCR_MODEL_ENV)
+    if not model_path:
+        return None
+    try:
+        return DigitRecognizer(model_path)
+    except cv2.error as e:
+        logger.warning("Could not load worksheet model %s: %s", model_path, e)
+        return None
+
+
+def crop_worksheet(frame: np.ndarray) -> np.ndarray:
+    """
+    Find the largest bright quadrilateral (paper or iPad screen), rectify it and
+    return it as grayscale. Falls back to the central region of the frame.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    scale = 640 / w
+    small = cv2.resize(gray, (640, int(h * scale)))
+    _, mask = cv2.threshold(cv2.GaussianBlur(small, (5, 5), 0), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    quad = None
+    if contours:
+        biggest = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(biggest) >= WORKSHEET_MIN_AREA_FRAC * small.shape[0] * small.shape[1]:
+            approx = cv2.approxPolyDP(biggest, 0.02 * cv2.arcLength(biggest, True), True)
+            if len(approx) == 4:
+                quad = approx.reshape(4, 2).astype(np.float32) / scale
+
+    if quad is None:
+        return gray[h // 6: h - h // 6, w // 6: w - w // 6]
+
+    # Order corners: top-left, top-right, bottom-right, bottom-left.
+    s, d = quad.sum(axis=1), np.diff(quad, axis=1).ravel()
+    src = np.array([quad[s.argmin()], quad[d.argmin()], quad[s.argmax()], quad[d.argmax()]], dtype=np.float32)
+    out_w = WORKSHEET_CROP_WIDTH
+    aspect = np.linalg.norm(src[3] - src[0]) / max(1.0, np.linalg.norm(src[1] - src[0]))
+    out_h = max(1, int(out_w * aspect))
+    dst = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    return cv2.warpPerspective(gray, cv2.getPerspectiveTransform(src, dst), (out_w, out_h))
+
+
+def _segment_glyphs(sheet: np.ndarray) -> list[list[np.ndarray]]:
+    """Split a grayscale worksheet into lines of 28x28 white-on-black glyph images."""
+    ink = cv2.adaptiveThreshold(sheet, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 15)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    n, _, stats, _ = cv2.connectedComponentsWithStats(ink)
+
+    h_sheet, w_sheet = sheet.shape
+    boxes = []
+    for x, y, w, h in (tuple(int(v) for v in stats[i, :4]) for i in range(1, n)):
+        if x == 0 or y == 0 or x + w >= w_sheet or y + h >= h_sheet:
+            continue  # crop border, not ink
+        tall_enough = GLYPH_MIN_HEIGHT_FRAC * h_sheet <= h <= GLYPH_MAX_HEIGHT_FRAC * h_sheet
+        is_bar = w > 2 * h and w >= GLYPH_MIN_HEIGHT_FRAC * h_sheet  # "-" and the strokes of "="
+        if tall_enough or is_bar:
+            boxes.append((x, y, w, h))
+    if not boxes:
+        return []
+
+    # Group into lines by vertical center, then read each line left to right.
+    boxes.sort(key=lambda b: b[1] + b[3] / 2)
+    lines: list[list[tuple]] = [[boxes[0]]]
+    for b in boxes[1:]:
+        line = lines[-1]
+        top = min(p[1] for p in line)
+        bottom = max(p[1] + p[3] for p in line)
+        if top - 0.3 * (bottom - top) <= b[1] + b[3] / 2 <= bottom + 0.3 * (bottom - top):
+            lines[-1].append(b)
+        else:
+            lines.append([b])
+
+    size = WORKSHEET_OCR_INPUT_SIZE
+    out: list[list[np.ndarray]] = []
+    for line in lines:
+        glyphs = []
+        for x, y, w, h in _merge_stacked(sorted(line, key=lambda b: b[0])):
+            crop = ink[y:y + h, x:x + w]
+            side = int(max(w, h) * 1.3)
+            canvas = np.zeros((side, side), np.uint8)
+            oy, ox = (side - h) // 2, (side - w) // 2
+            canvas[oy:oy + h, ox:ox + w] = crop
+            glyphs.append(cv2.resize(canvas, (size, size), interpolation=cv2.INTER_AREA))
+        out.append(glyphs)
+    return out
+
+
+def _merge_stacked(boxes: list[tuple]) -> list[tuple]:
+    """Merge blobs stacked in the same column (e.g. the two strokes of "=")."""
+    merged: list[tuple] = []
+    for x, y, w, h in boxes:
+        if merged:
+            px, py, pw, ph = merged[-1]
+            overlap = min(px + pw, x + w) - max(px, x)
+            if overlap > 0.5 * min(pw, w):
+                nx, ny = min(px, x), min(py, y)
+                merged[-1] = (nx, ny, max(px + pw, x + w) - nx, max(py + ph, y + h) - ny)
+                continue
+        merged.append((x, y, w, h))
+    return merged
+
+
 class ReachyVision:
-    def __init__(self, mini: ReachyMini) -> None:
+    def __init__(
+        self,
+        mini: ReachyMini,
+        use_worker_process: bool = False,
+        recognizer: WorksheetRecognizer | None = None,
+    ) -> None:
+        """
+        use_worker_process: run JPEG encoding, face detection and white checks in a
+        separate process fed through shared memory (see vision_worker.py) instead of
+        the default thread pool.
+        recognizer: optional local worksheet reader used by read_worksheet().
+        """
         self._media = mini.media
+        self.recognizer = recognizer
         self._latest_frame_raw: np.ndarray | None = None
+        self._latest_frame_seq = 0       # bumps every time a new frame is stored
+        self._latest_frame_ts = 0.0      # loop time the latest frame was grabbed
         self._lock = asyncio.Lock()
 
-        # Face detection via OpenCV Haar cascade (lightweight, no extra deps)
-        self._face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
+        # Face detection via OpenCV Haar cascade (lightweight, no extra deps);
+        # loaded on the first detection so a session without faces never pays for it.
+        self._face_cascade = None
         self._resolution_configured = False
 
+        self._use_worker_process = use_worker_process
+        self._worker: VisionWorker | None = None
+        self._latest_slot: tuple[int, int] | None = None  # (slot, ring seq) of the latest frame
+
     def _try_set_higher_resolution(self) -> None:
         """Attempt to set the camera to a higher resolution than the default 720p."""
         cam = self._media.camera
@@ -53,10 +278,10 @@ class ReachyVision:
         if cap is not None:
             actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"[vision] Camera default resolution: {actual_w}x{actual_h}")
+            logger.info("Camera default resolution: %dx%d", actual_w, actual_h)
 
         available = cam.camera_specs.available_resolutions
-        print(f"[vision] Available resolutions: {[(r.value[0], r.value[1], r.value[2]) for r in available]}")
+        logger.debug("Available resolutions: %s", [(r.value[0], r.value[1], r.value[2]) for r in available])
 
         for res in PREFERRED_RESOLUTIONS:
             if res in available:
@@ -65,20 +290,20 @@ class ReachyVision:
                     if cap is not None:
                         actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
                         actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        print(f"[vision] Requested {res.value[0]}x{res.value[1]}, got {actual_w}x{actual_h}")
+                        logger.info("Requested %dx%d, got %dx%d", res.value[0], res.value[1], actual_w, actual_h)
                         if actual_w == res.value[0] and actual_h == res.value[1]:
                             break
                         else:
-                            print(f"[vision] Resolution change did not take effect, trying next...")
+                            logger.info("Resolution change did not take effect, trying next...")
                             continue
                     break
                 except Exception as e:
-                    print(f"[vision] Failed to set resolution {res}: {e}")
+                    logger.warning("Failed to set resolution %s: %s", res, e)
 
         if cap is not None:
             actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"[vision] Final camera resolution: {actual_w}x{actual_h}")
+            logger.info("Final camera resolution: %dx%d", actual_w, actual_h)
             cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)
 
     async def capture_loop(self) -> None:
@@ -93,56 +318,150 @@ class ReachyVision:
             frame: np.ndarray | None = await loop.run_in_executor(
                 None, self._media.get_frame
             )
-            if frame is not None and not self._is_white(frame):
+            if frame is None:
+                await asyncio.sleep(VISION_CAPTURE_INTERVAL_S)
+                continue
+            FRAMES_CAPTURED.inc()
+
+            slot = None
+            if self._use_worker_process:
+                slot = await self._publish_to_worker(frame)
+            is_white = None
+            if slot is not None:
+                # None means timeout, a stale slot or a dead worker, not "not white".
+                is_white = await self._worker.request("is_white", *slot)
+            if is_white is None:
+                is_white = self._is_white(frame)
+
+            if not is_white:
                 if not logged_size:
-                    print(f"[vision] Actual frame from get_frame(): {frame.shape[1]}x{frame.shape[0]}")
+                    logger.info("Actual frame from get_frame(): %dx%d", frame.shape[1], frame.shape[0])
                     logged_size = True
                 async with self._lock:
                     self._latest_frame_raw = frame
+                    self._latest_frame_seq += 1
+                    self._latest_frame_ts = loop.time()
+                    self._latest_slot = slot
             await asyncio.sleep(VISION_CAPTURE_INTERVAL_S)
 
+    async def _publish_to_worker(self, frame: np.ndarray) -> tuple[int, int] | None:
+        """Copy a frame into the shared-memory ring, (re)starting the worker if needed."""
+        loop = asyncio.get_running_loop()
+        worker = self._worker
+        if worker is None or worker.shape != frame.shape or not worker.is_alive():
+            # The old ring goes away with its worker; its slots mean nothing to a new one.
+            async with self._lock:
+                self._latest_slot = None
+            if worker is not None:
+                await loop.run_in_executor(None, worker.stop)
+            self._worker = None
+            if frame.dtype != np.uint8:
+                return None
+            worker = VisionWorker(frame.shape)
+            try:
+                await loop.run_in_executor(None, worker.start)
+            except Exception as e:
+                logger.warning("Worker process failed to start, using thread pool: %s", e)
+                await loop.run_in_executor(None, worker.stop)
+                self._use_worker_process = False
+                return None
+            self._worker = worker
+        # np.copyto releases the GIL, so the copy doesn't hold up the loop.
+        return await loop.run_in_executor(None, worker.ring.write, frame)
+
+    async def _latest_worker_slot(self) -> tuple[int, int] | None:
+        async with self._lock:
+            slot = self._latest_slot
+        if slot is None or self._worker is None:
+            return None
+        return slot
+
+    def close(self) -> None:
+        """Stop the worker process (if any) and release its shared memory."""
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+
+    async def get_latest_frame(self) -> tuple[np.ndarray | None, int, float]:
+        """Return (frame, seq, timestamp) for the latest raw frame without copying it."""
+        async with self._lock:
+            return self._latest_frame_raw, self._latest_frame_seq, self._latest_frame_ts
+
     async def get_latest_frame_bytes(self) -> bytes | None:
         """Encode the latest raw frame to JPEG on demand (only when capture_image is called)."""
+        slot = await self._latest_worker_slot()
+        if slot is not None:
+            encoded = await self._worker.request("encode", *slot)
+            if encoded is not None:
+                FRAMES_ENCODED.inc()
+                return encoded
         async with self._lock:
             frame = self._latest_frame_raw
         if frame is None:
             return None
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._encode_jpeg, frame)
+        encoded = await loop.run_in_executor(None, self._encode_jpeg, frame)
+        if encoded is not None:
+            FRAMES_ENCODED.inc()
+        return encoded
+
+    async def read_worksheet(self) -> WorksheetReading | None:
+        """Run the local recognition pre-pass on the latest frame (None without a recognizer)."""
+        if self.recognizer is None:
+            return None
+        async with self._lock:
+            frame = self._latest_frame_raw
+        if frame is None:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.recognizer.recognize, frame)
+        except Exception as e:
+            logger.warning("Worksheet recognition failed: %s", e)
+            return None
 
     async def get_face_center(self) -> tuple[int, int] | None:
         """
         Return (u, v) pixel coordinates of the largest face in the latest frame,
         in the original frame resolution. Returns None if no face detected.
         """
+        box = await self.detect_face_box()
+        if box is None:
+            return None
+        x, y, w, h = box
+        return (int(x + w / 2), int(y + h / 2))
+
+    async def detect_face_box(self, frame_seq: int | None = None) -> tuple[int, int, int, int] | None:
+        """
+        Largest face box in the latest frame. If frame_seq is given and the latest
+        frame has moved on, returns None so callers never mix boxes and frames.
+        """
         async with self._lock:
             frame = self._latest_frame_raw
-        if frame is None:
+            seq = self._latest_frame_seq
+            slot = self._latest_slot
+        if frame is None or (frame_seq is not None and frame_seq != seq):
             return None
+        if slot is not None and self._worker is not None:
+            box = await self._worker.request("detect", *slot)
+            if box is not None or self._worker.ring.is_current(*slot):
+                return box
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._detect_face_center, frame)
+        return await loop.run_in_executor(None, self._detect_face_box, frame)
 
     def _detect_face_center(self, frame: np.ndarray) -> tuple[int, int] | None:
         """Detect the largest face and return its center in original frame coordinates."""
-        h_orig, w_orig = frame.shape[:2]
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        small = cv2.resize(gray, FACE_DETECT_SCALE)
-
-        faces = self._face_cascade.detectMultiScale(
-            small, scaleFactor=1.1, minNeighbors=4, minSize=FACE_MIN_SIZE,
-        )
-        if len(faces) == 0:
+        box = self._detect_face_box(frame)
+        if box is None:
             return None
+        x, y, w, h = box
+        return (int(x + w / 2), int(y + h / 2))
 
-        areas = [w * h for (_, _, w, h) in faces]
-        idx = int(np.argmax(areas))
-        x, y, w, h = faces[idx]
-
-        scale_x = w_orig / FACE_DETECT_SCALE[0]
-        scale_y = h_orig / FACE_DETECT_SCALE[1]
-        cx = int((x + w / 2) * scale_x)
-        cy = int((y + h / 2) * scale_y)
-        return (cx, cy)
+    def _detect_face_box(self, frame: np.ndarray) -> tuple[int, int, int, int] | None:
+        """Detect the largest face and return its (x, y, w, h) box in original frame coordinates."""
+        if self._face_cascade is None:
+            self._face_cascade = load_face_cascade()
+        return detect_face_box(self._face_cascade, frame)
 
     @staticmethod
     def _is_white(frame: np.ndarray, threshold: float = 250.0) -> bool:
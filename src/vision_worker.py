@@ -0,0 +1,222 @@
+"""
+vision_worker.py — optional out-of-process vision pipeline.
+
+ReachyVision writes each camera frame into a FrameRing (preallocated
+multiprocessing.shared_memory slots guarded by a per-slot sequence counter).
+A separate worker process reads the frames in place and runs the heavy
+OpenCV work — JPEG encoding, Haar face detection, white-frame checks — so
+none of it competes with the audio loops for the main interpreter's GIL.
+Only small requests and results cross the pipe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing as mp
+import threading
+from contextlib import suppress
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from log_config import get_logger
+
+
+logger = get_logger("vision")
+
+FRAME_RING_SLOTS = 3             # 1.5 s of history at the 2 fps capture rate
+VISION_WORKER_TIMEOUT_S = 5.0
+VISION_WORKER_START_TIMEOUT_S = 10.0
+
+_SEQ_BYTES = 8  # one int64 sequence word per slot
+
+
+class FrameRing:
+    """
+    Fixed-shape frame slots in shared memory.
+
+    Each slot has a sequence word: odd while the writer is copying into it,
+    even once the frame is complete. Readers take a zero-copy view and compare
+    the sequence before and after using it; a mismatch means the slot was
+    overwritten and the result must be discarded.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        dtype: str = "uint8",
+        slots: int = FRAME_RING_SLOTS,
+        name: str | None = None,
+    ) -> None:
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.frame_nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        size = _SEQ_BYTES * slots + self.frame_nbytes * slots
+
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Attaching registers the segment with this process's resource tracker,
+            # which would unlink it when the worker exits; only the owner should.
+            with suppress(Exception):
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        self._seqs = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._frames = np.ndarray(
+            (slots, *self.shape), dtype=self.dtype, buffer=self.shm.buf, offset=_SEQ_BYTES * slots,
+        )
+        if self._owner:
+            self._seqs[:] = 0
+        self._next_slot = 0
+        self._seq = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, frame: np.ndarray) -> tuple[int, int]:
+        """Copy a frame into the next slot; returns (slot, seq) identifying it."""
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.slots
+        self._seq += 2
+        self._seqs[slot] = self._seq - 1   # odd: write in progress
+        np.copyto(self._frames[slot], frame, casting="no")
+        self._seqs[slot] = self._seq
+        return slot, self._seq
+
+    def view(self, slot: int, seq: int) -> np.ndarray | None:
+        """Zero-copy view of a slot, or None if it no longer holds frame `seq`."""
+        if int(self._seqs[slot]) != seq:
+            return None
+        return self._frames[slot]
+
+    def is_current(self, slot: int, seq: int) -> bool:
+        return int(self._seqs[slot]) == seq
+
+    def close(self) -> None:
+        # Views into the buffer must be dropped before the mapping can close.
+        self._seqs = None
+        self._frames = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_name: str, shape: tuple[int, ...], dtype: str, slots: int, conn) -> None:
+    """Entry point of the worker process: serve (req_id, op, slot, seq) requests until None."""
+    # Imported here so the parent never pays for it twice and the child only
+    # loads what it needs.
+    from vision import ReachyVision, detect_face_box, load_face_cascade
+
+    ring = FrameRing(shape, dtype, slots, name=ring_name)
+    cascade = load_face_cascade()
+    conn.send(("ready", None))
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            req_id, op, slot, seq = msg
+            frame = ring.view(slot, seq)
+            result = None
+            if frame is not None:
+                if op == "encode":
+                    result = ReachyVision._encode_jpeg(frame)
+                elif op == "detect":
+                    result = detect_face_box(cascade, frame)
+                elif op == "is_white":
+                    result = ReachyVision._is_white(frame)
+                # The writer lapped us mid-computation: the result belongs to a torn frame.
+                if not ring.is_current(slot, seq):
+                    result = None
+            conn.send((req_id, result))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class VisionWorker:
+    """Owns the FrameRing and the worker process; turns pipe replies into awaitables."""
+
+    def __init__(self, shape: tuple[int, ...], dtype: str = "uint8", slots: int = FRAME_RING_SLOTS) -> None:
+        self.shape = tuple(shape)
+        self.ring = FrameRing(self.shape, dtype, slots)
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._proc = ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.shape, dtype, slots, child_conn),
+            name="vision_worker",
+            daemon=True,
+        )
+        self._ids = itertools.count()
+        self._pending: dict[int, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._reader: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Spawn the process and wait for it to attach (blocking — call from an executor)."""
+        self._proc.start()
+        if not self._conn.poll(VISION_WORKER_START_TIMEOUT_S):
+            raise RuntimeError("vision worker did not start")
+        self._conn.recv()  # ("ready", None)
+        self._reader = threading.Thread(target=self._read_results, name="vision_worker_reader", daemon=True)
+        self._reader.start()
+        logger.info("Worker process started (pid %d, %d slots of %s)", self._proc.pid, self.ring.slots, self.shape)
+
+    def _read_results(self) -> None:
+        while True:
+            try:
+                req_id, result = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                entry = self._pending.pop(req_id, None)
+            if entry is None:
+                continue
+            loop, fut = entry
+            loop.call_soon_threadsafe(lambda f=fut, r=result: f.done() or f.set_result(r))
+        # Process gone: fail everything still waiting.
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for loop, fut in pending.values():
+            loop.call_soon_threadsafe(lambda f=fut: f.done() or f.set_result(None))
+
+    async def request(self, op: str, slot: int, seq: int, timeout: float = VISION_WORKER_TIMEOUT_S):
+        """Run `op` on frame (slot, seq) in the worker. Returns None on a stale frame or timeout."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        req_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[req_id] = (loop, fut)
+        try:
+            with self._send_lock:
+                self._conn.send((req_id, op, slot, seq))
+            return await asyncio.wait_for(fut, timeout)
+        except (asyncio.TimeoutError, OSError, BrokenPipeError):
+            with self._pending_lock:
+                self._pending.pop(req_id, None)
+            return None
+
+    def is_alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def stop(self) -> None:
+        """Ask the worker to exit, then release the shared memory."""
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self._proc.join(timeout=2.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join(timeout=1.0)
+        self._conn.close()
+        self.ring.close()
@@ -0,0 +1,93 @@
+"""
+BluezDisconnectMonitor._handle against fake BlueZ signal messages: which
+signals count as a device going away and which are ignored.
+"""
+
+from __future__ import annotations
+
+import types
+
+import pytest
+
+import bluez_monitor
+from bluez_monitor import DEVICE_IFACE, BluezDisconnectMonitor
+
+
+SIGNAL = "signal"
+PHONE = "/org/bluez/hci0/dev_AA_AA_AA_AA_AA_AA"
+HEADSET = "/org/bluez/hci0/dev_BB_BB_BB_BB_BB_BB"
+
+
+@pytest.fixture(autouse=True)
+def fake_message_type(monkeypatch):
+    # dbus-next isn't needed for the handler logic; only MessageType is read.
+    monkeypatch.setattr(bluez_monitor, "MessageType", types.SimpleNamespace(SIGNAL=SIGNAL, ERROR="error"), raising=False)
+
+
+def _message(member: str, path: str, body: list, message_type: str = SIGNAL):
+    return types.SimpleNamespace(message_type=message_type, member=member, path=path, body=body)
+
+
+def _properties_changed(path: str, changed: dict, interface: str = DEVICE_IFACE):
+    return _message("PropertiesChanged", path, [interface, changed, []])
+
+
+def _interfaces_removed(path: str, interfaces: list[str]):
+    return _message("InterfacesRemoved", "/", [path, interfaces])
+
+
+@pytest.fixture
+def monitor():
+    calls: list[int] = []
+    m = BluezDisconnectMonitor(lambda: calls.append(1))
+    m._active = True
+    m._connected = {PHONE, HEADSET}
+    m.calls = calls
+    return m
+
+
+def test_each_device_disconnect_reports(monitor):
+    monitor._handle(_properties_changed(HEADSET, {"Connected": False}))
+    assert len(monitor.calls) == 1
+    assert monitor._connected == {PHONE}
+
+    monitor._handle(_properties_changed(PHONE, {"Connected": False}))
+    assert len(monitor.calls) == 2
+    assert not monitor._connected
+
+
+def test_variant_values_are_unwrapped(monitor):
+    monitor._handle(_properties_changed(PHONE, {"Connected": types.SimpleNamespace(value=False)}))
+    assert len(monitor.calls) == 1
+
+
+def test_connect_is_tracked_not_reported(monitor):
+    other = "/org/bluez/hci0/dev_CC_CC_CC_CC_CC_CC"
+    monitor._handle(_properties_changed(other, {"Connected": True}))
+    assert not monitor.calls
+    assert other in monitor._connected
+
+
+def test_unrelated_signals_are_ignored(monitor):
+    monitor._handle(_properties_changed(PHONE, {"RSSI": -40}))
+    monitor._handle(_properties_changed(PHONE, {"Connected": False}, interface="org.bluez.Adapter1"))
+    monitor._handle(_message("PropertiesChanged", PHONE, [DEVICE_IFACE, {"Connected": False}], message_type="method_return"))
+    monitor._handle(_message("InterfacesAdded", "/", [PHONE, {}]))
+    assert not monitor.calls
+    assert monitor._connected == {PHONE, HEADSET}
+
+
+def test_removed_device_reports_only_if_it_was_connected(monitor):
+    monitor._handle(_interfaces_removed("/org/bluez/hci0/dev_DD_DD_DD_DD_DD_DD", [DEVICE_IFACE]))
+    monitor._handle(_interfaces_removed(PHONE, ["org.bluez.MediaControl1"]))
+    assert not monitor.calls
+
+    monitor._handle(_interfaces_removed(PHONE, [DEVICE_IFACE]))
+    assert len(monitor.calls) == 1
+    assert monitor._connected == {HEADSET}
+
+
+def test_inactive_monitor_ignores_everything(monitor):
+    monitor._active = False
+    monitor._handle(_properties_changed(PHONE, {"Connected": False}))
+    assert not monitor.calls
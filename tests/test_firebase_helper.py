@@ -0,0 +1,169 @@
+"""
+FirebaseHelper's profile watch against fakes.InMemoryFirestore: the app
+changing user_profiles/{uid} selects, switches and deselects modules and
+pushes settings, next to the BLE path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from audio_adapters import AudioControl
+from bluetooth_helper import ModuleControl
+from fakes import InMemoryFirestore
+from firebase_helper import PROFILE_MODULE_FIELD, PROFILE_MUTE_FIELD, PROFILE_VOLUME_FIELD, FirebaseHelper
+
+
+UID = "student"
+PROFILE = f"user_profiles/{UID}"
+WAIT_S = 2.0
+
+
+def _store() -> InMemoryFirestore:
+    return InMemoryFirestore({
+        PROFILE: {PROFILE_MODULE_FIELD: "fractions"},   # left over from an earlier session
+        "modules/fractions": {"title": "Fractions", "quiz_questions": {"guided": ["f1", "f2", "f3"]}},
+        "modules/decimals": {"title": "Decimals", "quiz_questions": {"guided": ["d1", "d2", "d3", "d4"]}},
+        f"{PROFILE}/modules/decimals": {"example_question_num": 1},
+    })
+
+
+async def _until(condition, timeout: float = WAIT_S) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out waiting for the profile watch"
+        await asyncio.sleep(0.01)
+
+
+async def _settle() -> None:
+    """Let queued snapshots reach the loop (the fake delivers on its own thread)."""
+    await asyncio.sleep(0.1)
+
+
+def _run(test) -> None:
+    async def main():
+        db = _store()
+        firebase = FirebaseHelper(db)
+        firebase.set_loop(asyncio.get_running_loop())
+        firebase.set_user(UID)
+        module_control = ModuleControl(asyncio.get_running_loop())
+        audio_control = AudioControl()
+        try:
+            await test(db, firebase, module_control, audio_control)
+        finally:
+            firebase.close()
+    asyncio.run(main())
+
+
+def test_initial_snapshot_applies_settings_but_not_a_stale_module():
+    async def test(db, firebase, module_control, audio_control):
+        db.set_document(PROFILE, {PROFILE_VOLUME_FIELD: 30, PROFILE_MUTE_FIELD: True})
+        firebase.watch_profile(module_control, audio_control)
+        await _until(lambda: audio_control.volume == 30)
+
+        assert audio_control.mic_muted
+        assert not module_control.module_selected_event.is_set()
+        assert module_control.module_id is None
+        assert firebase.module_id is None
+    _run(test)
+
+
+def test_module_selected_in_the_app_is_selected_and_prefetched():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.watch_profile(module_control, audio_control)
+        await _settle()
+        db.set_document(PROFILE, {PROFILE_MODULE_FIELD: "decimals"})
+        await _until(module_control.module_selected_event.is_set)
+
+        assert module_control.module_id == "decimals"
+        assert firebase.module_id == "decimals"
+        reads = db.reads
+        assert firebase.get_next_example_question() == ("d3", True)
+        await _settle()
+        assert db.reads == reads   # served from the prefetch
+    _run(test)
+
+
+def test_ble_selection_first_is_left_alone():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.watch_profile(module_control, audio_control)
+        await _settle()
+        module_control.module_id = "decimals"   # the BLE write arrived first
+        db.set_document(PROFILE, {PROFILE_MODULE_FIELD: "decimals"})
+        await _settle()
+
+        assert not module_control.module_selected_event.is_set()
+        assert not module_control.module_exited_event.is_set()
+        assert firebase.module_id is None   # main.run() calls set_module() for the BLE path
+    _run(test)
+
+
+def test_mid_session_switch_prefetches_and_ends_the_current_module():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.set_module("fractions")
+        module_control.module_id = "fractions"
+        firebase.watch_profile(module_control, audio_control)
+        await _settle()
+        db.set_document(PROFILE, {PROFILE_MODULE_FIELD: "decimals"})
+        await _until(module_control.module_exited_event.is_set)
+
+        assert module_control.module_id == "decimals"
+        assert module_control.module_selected_event.is_set()
+        assert firebase.module_id == "fractions"   # still active until main.run() switches
+        pending_id, pending = firebase._pending_prefetch
+        assert pending_id == "decimals"
+        await asyncio.wrap_future(pending)
+
+        # What main.run() does next: end the old module, start the new one.
+        reads = db.reads
+        firebase.clear_module()
+        firebase.set_module("decimals")
+        assert firebase.get_next_example_question() == ("d3", True)
+        await _settle()
+        assert db.reads == reads   # set_module() adopted the prefetch instead of fetching again
+        assert firebase._pending_prefetch is None
+    _run(test)
+
+
+def test_prefetch_for_another_module_is_not_adopted():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.prefetch_module("decimals")
+        await asyncio.wrap_future(firebase._pending_prefetch[1])
+        firebase.set_module("fractions")
+
+        assert firebase.get_next_example_question() == ("f2", True)
+        assert firebase._pending_prefetch is None
+    _run(test)
+
+
+def test_module_cleared_in_the_app_exits():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.watch_profile(module_control, audio_control)
+        await _settle()
+        db.set_document(PROFILE, {PROFILE_MODULE_FIELD: "decimals"})
+        await _until(module_control.module_selected_event.is_set)
+        db.set_document(PROFILE, {PROFILE_MODULE_FIELD: ""})
+        await _until(module_control.module_exited_event.is_set)
+
+        assert module_control.module_id is None
+        assert not module_control.module_selected_event.is_set()
+    _run(test)
+
+
+def test_snapshots_from_a_stopped_watch_are_dropped():
+    async def test(db, firebase, module_control, audio_control):
+        firebase.watch_profile(module_control, audio_control)
+        await _settle()
+        stale = firebase._profile_generation
+        firebase.watch_profile(module_control, audio_control)   # e.g. the next BLE connection
+        await _settle()
+
+        # A snapshot the old watch had already queued on the loop.
+        firebase._apply_profile(
+            stale, {PROFILE_MODULE_FIELD: "decimals", PROFILE_VOLUME_FIELD: 5}, False, module_control, audio_control,
+        )
+        assert audio_control.volume != 5
+        assert not module_control.module_selected_event.is_set()
+        assert firebase._pending_prefetch is None and firebase.module_id is None
+    _run(test)
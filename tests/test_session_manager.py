@@ -0,0 +1,106 @@
+"""
+ResilientSession reconnects against a fake Live API: the connection drops in
+the middle of a mic stream and every frame must still arrive, in order, on
+the connection that ends up live.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import session_manager
+from session_manager import ResilientSession, _LiveSession
+
+
+MIC_FRAMES = 60
+MIC_FRAME_INTERVAL_S = 0.005
+OPEN_DELAY_S = 0.05               # long enough for frames to pile up in the buffer
+SEND_DELAY_S = 0.002              # so more frames arrive while the buffer is being flushed
+
+
+class FakeSession:
+    """Accepts `fail_at` mic frames, then behaves like a dropped socket."""
+
+    def __init__(self, fail_at: int | None = None) -> None:
+        self.fail_at = fail_at
+        self.sent: list[int] = []
+
+    async def send_realtime_input(self, audio) -> None:
+        await asyncio.sleep(SEND_DELAY_S)
+        if self.fail_at is not None and len(self.sent) >= self.fail_at:
+            raise ConnectionError("socket closed")
+        self.sent.append(audio)
+
+
+class FakeManager:
+    """Hands out the given sessions in order, one per _open()."""
+
+    def __init__(self, *sessions: FakeSession) -> None:
+        self._sessions = list(sessions)
+
+    async def _open(self, resume_handle=None) -> _LiveSession:
+        await asyncio.sleep(OPEN_DELAY_S)
+        if not self._sessions:
+            raise ConnectionError("server unavailable")
+        return _LiveSession(cm=None, session=self._sessions.pop(0), opened_at=0.0)
+
+    @staticmethod
+    async def _close(live) -> None:
+        pass
+
+
+async def _stream_mic(first: FakeSession, *later: FakeSession) -> ResilientSession:
+    manager = FakeManager(*later)
+    rs = ResilientSession(manager, _LiveSession(cm=None, session=first, opened_at=0.0), summary=None)
+    rs._handle = "resume-handle"  # resume, so no flow/lesson replay is needed
+    for i in range(MIC_FRAMES):
+        await rs.send_realtime_input(audio=i)
+        await asyncio.sleep(MIC_FRAME_INTERVAL_S)
+    async with rs._reconnect_lock:
+        pass
+    return rs
+
+
+def test_drop_mid_stream_delivers_every_frame_in_order():
+    first, second = FakeSession(fail_at=10), FakeSession()
+    rs = asyncio.run(_stream_mic(first, second))
+
+    assert first.sent == list(range(10))
+    assert second.sent == list(range(10, MIC_FRAMES))
+    assert rs._live.session is second
+    assert rs._connected.is_set()
+    assert not rs._mic_buffer
+    assert rs.reconnects == 1
+    assert rs.mic_frames_lost == 0
+
+
+def test_flush_failure_counts_as_failed_attempt():
+    # The first replacement dies two frames into the flush; the next one takes over.
+    first, flaky, third = FakeSession(fail_at=10), FakeSession(fail_at=2), FakeSession()
+    rs = asyncio.run(_stream_mic(first, flaky, third))
+
+    assert first.sent + flaky.sent + third.sent == list(range(MIC_FRAMES))
+    assert len(flaky.sent) == 2
+    assert rs._live.session is third
+    assert rs._connected.is_set()
+    assert not rs._mic_buffer
+    assert rs.reconnects == 1
+
+
+def test_failed_reconnect_releases_waiting_senders(monkeypatch):
+    monkeypatch.setattr(session_manager, "LIVE_RECONNECT_DEADLINE_S", 0.3)
+
+    async def run():
+        rs = ResilientSession(FakeManager(), _LiveSession(cm=None, session=FakeSession(), opened_at=0.0), summary=None)
+        rs._handle = "resume-handle"
+        try:
+            await rs._reconnect(0, ConnectionError("socket closed"))
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("reconnect should have failed")
+        return rs
+
+    rs = asyncio.run(run())
+    assert rs._connected.is_set()
+    assert rs.reconnects == 0